@@ -1,10 +1,23 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Any
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+from typing import Annotated, Dict, List, Any, Optional
+from contextlib import nullcontext
+import asyncio
+import json
+import os
+import threading
+import uuid
+import ingest
 import matcher
-import io
-import sys
+import profiling
+import risk
+import scenarios
+import shards
+import sketches
+import store
+import telemetry
 
 app = FastAPI(title="HVAC Scheduler API", version="1.0.0")
 
@@ -16,12 +29,26 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(profiling.RequestClock)
+app.add_middleware(telemetry.RequestMetrics)
+
+class Shift(BaseModel):
+    start: float = 0
+    end: float = 24
+    days_off: List[int] = []
+
+class Location(BaseModel):
+    lat: float
+    lon: float
 
 class Technician(BaseModel):
     id: int
     skills: List[str]
     free_at_hour: int = 0
     current_job: Any = None
+    shift: Optional[Shift] = None
+    location: Optional[Location] = None
+    region: Optional[str] = None
 
 class Job(BaseModel):
     id: int
@@ -30,6 +57,8 @@ class Job(BaseModel):
     estimated_hours: int
     priority: str
     submitted_hour: int
+    location: Optional[Location] = None
+    region: Optional[str] = None
     assigned: bool = False
     assigned_to: Any = None
     start_hour: Any = None
@@ -39,6 +68,97 @@ class ScheduleRequest(BaseModel):
     technicians: List[Technician]
     jobs: List[Job]
 
+class ScenarioOverride(BaseModel):
+    name: str
+    sla_windows: Dict[str, float] = {}
+    add_technicians: List[Technician] = []
+    remove_technicians: List[int] = []
+    add_jobs: List[Job] = []
+    remove_jobs: List[int] = []
+    mode: Optional[str] = None
+
+class ScenarioRequest(ScheduleRequest):
+    scenarios: List[ScenarioOverride]
+
+class RiskRequest(ScheduleRequest):
+    replications: int = Field(1000, ge=1)
+    duration_sigma: Dict[str, float] = {}
+    seed: Optional[int] = None
+
+class AdvanceRequest(BaseModel):
+    hour: float
+
+class AvailabilityRequest(BaseModel):
+    available: bool
+
+# Server-side schedules that accept incremental edits, keyed by session id.
+# Each session has its own lock, so edits to different sessions run in parallel.
+class ScheduleSession:
+    def __init__(self, scheduler, session_id=None):
+        self.scheduler = scheduler
+        self.session_id = session_id
+        self.lock = threading.RLock()
+        self.ingest = None      # IngestQueue, created by the first ingested job
+        self.queued_ids = set() # ids of ingested jobs not flushed yet
+
+sessions = {}
+sessions_lock = threading.Lock()
+
+# With TTC_STORE_DIR set, sessions are persisted there and restored on startup
+session_store = None
+
+def open_store(directory):
+    """Persist sessions under directory and load the ones already there"""
+    global session_store
+    session_store = store.ScheduleStore(directory)
+    with sessions_lock:
+        for session_id, scheduler in session_store.load():
+            sessions[session_id] = ScheduleSession(scheduler, session_id)
+
+if os.environ.get("TTC_STORE_DIR"):
+    open_store(os.environ["TTC_STORE_DIR"])
+
+def ingest_queue_depth():
+    """Jobs waiting in session ingest queues, over all sessions"""
+    return sum(session.ingest.pending() for session in list(sessions.values()) if session.ingest is not None)
+
+telemetry.registry.register(telemetry.Gauge(
+    "ttc_ingest_queue_depth", "Jobs waiting in session ingest queues", ingest_queue_depth))
+telemetry.registry.register(telemetry.Gauge("ttc_sessions", "Open sessions", lambda: len(sessions)))
+
+def get_session(session_id):
+    session = sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Unknown session {session_id}")
+    return session
+
+def dispatch_issues(mode, order):
+    """Validation issues for unknown mode or order query values"""
+    issues = []
+    if mode not in matcher.DISPATCH_MODES:
+        issues.append(matcher.ValidationIssue("invalid_mode", "input", detail=mode))
+    if order not in matcher.DISPATCH_ORDERS:
+        issues.append(matcher.ValidationIssue("invalid_order", "input", detail=order))
+    return issues
+
+def apply_edit(session, edit):
+    """Apply one edit record under the session lock, log it, and return the events it produced"""
+    with session.lock:
+        try:
+            events = store.apply(session.scheduler, edit)
+        except matcher.UnknownIdError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if session_store is not None:
+            session_store.append(session.session_id, session.scheduler, edit)
+        telemetry.record_assignments(events)
+        return {
+            "success": True,
+            "clock": session.scheduler.clock,
+            "events": [matcher.event_to_dict(e) for e in events]
+        }
+
 @app.get("/")
 def read_root():
     return {"message": "HVAC Scheduler API is running", "version": "1.0.0"}
@@ -47,35 +167,362 @@ def read_root():
 def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics")
+def metrics():
+    """Request latency, scheduling throughput and queue depth in the Prometheus text format (see telemetry.py)"""
+    return PlainTextResponse(telemetry.registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.post("/api/schedule")
-def create_schedule(request: ScheduleRequest):
-    old_stdout = sys.stdout
-    sys.stdout = buffer = io.StringIO()
+def create_schedule(request: ScheduleRequest, include_output: bool = False, mode: str = "greedy",
+                    preempt: bool = False, order: str = "priority", profile: bool = False):
+    """With profile=1 the response includes per-phase timings and scheduler counters (see profiling.py)"""
+    timer = profiling.PhaseTimer()
+    profiling.time_since_request(timer)
+    try:
+        with profiling.request_hook("schedule") if profile else nullcontext({}) as hook:
+            with timer.phase("model_dump"):
+                techs = [t.dict() for t in request.technicians]
+                jobs_list = [j.dict() for j in request.jobs]
+
+            config = matcher.ScheduleConfig(mode=mode, preempt=preempt, order=order)
+            result = matcher.schedule(techs, jobs_list, config)
+            telemetry.record_schedule(result)
+            for phase, seconds in result.timings.items():
+                timer.add(phase, seconds)
+            response = schedule_response(result, include_output, timer)
+
+        if profile:
+            response["profile"] = {"phases_ms": timer.to_dict(), "counters": result.counters}
+            if hook:
+                response["profile"]["hook"] = hook
+        return response
     
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+def schedule_response(result, include_output, timer=None):
+    if timer is None:
+        timer = profiling.PhaseTimer()
+    with timer.phase("response"):
+        response = {
+            "success": result.success,
+            "errors": [issue.to_dict() for issue in result.errors],
+            "events": result.events.to_dicts(),
+            "technicians": result.technicians,
+            "jobs": result.jobs
+        }
+    # The text report is only rendered when a caller asks for it
+    if include_output:
+        with timer.phase("render"):
+            response["output"] = matcher.render_report(result)
+    return response
+
+@app.post("/api/schedule/metrics")
+def schedule_metrics(request: ScheduleRequest, mode: str = "greedy", preempt: bool = False, order: str = "priority"):
+    """Schedule the jobs and return the final metrics (per priority, per tech) as JSON instead of report text"""
     try:
         techs = [t.dict() for t in request.technicians]
         jobs_list = [j.dict() for j in request.jobs]
-        
-        matcher.technicians = techs
-        matcher.jobs = jobs_list
-        
-        success = matcher.run_simulation()
-        
-        output = buffer.getvalue()
-        
+
+        config = matcher.ScheduleConfig(mode=mode, preempt=preempt, order=order)
+        result = matcher.schedule(techs, jobs_list, config)
+        telemetry.record_schedule(result)
+        response = {
+            "success": result.success,
+            "errors": [issue.to_dict() for issue in result.errors],
+        }
+        if result.success:
+            response["metrics"] = matcher.aggregate_results(result.technicians, result.jobs, config.sla_windows)
+        return response
+
+    except Exception as e:
         return {
-            "success": success,
-            "output": output,
-            "technicians": matcher.technicians,
-            "jobs": matcher.jobs
+            "success": False,
+            "error": str(e)
         }
-    
+
+@app.post("/api/schedule/sharded")
+def create_sharded_schedule(request: ScheduleRequest, include_output: bool = False, mode: str = "greedy",
+                            workers: Annotated[Optional[int], Query(ge=1)] = None, preempt: bool = False,
+                            order: str = "priority"):
+    """/api/schedule split into region and skill-cluster shards scheduled in parallel worker processes"""
+    try:
+        techs = [t.dict() for t in request.technicians]
+        jobs_list = [j.dict() for j in request.jobs]
+
+        config = matcher.ScheduleConfig(mode=mode, preempt=preempt, order=order)
+        result = shards.schedule_sharded(techs, jobs_list, config, workers=workers)
+        telemetry.record_schedule(result)
+        return schedule_response(result, include_output)
+
     except Exception as e:
         return {
             "success": False,
-            "error": str(e),
-            "output": buffer.getvalue()
+            "error": str(e)
         }
+
+@app.post("/api/schedule/risk")
+def schedule_risk(request: RiskRequest, include_output: bool = False, mode: str = "greedy"):
+    """Schedule the jobs and estimate each job's SLA breach probability under random durations"""
+    try:
+        techs = [t.dict() for t in request.technicians]
+        jobs_list = [j.dict() for j in request.jobs]
+
+        estimate = risk.estimate_sla_risk(techs, jobs_list, matcher.ScheduleConfig(mode=mode),
+                                          replications=request.replications,
+                                          duration_sigma=request.duration_sigma, seed=request.seed)
+        result = estimate.result
+
+        response = {
+            "success": result.success,
+            "errors": [issue.to_dict() for issue in result.errors],
+            "replications": estimate.replications,
+            "expected_breaches": estimate.expected_breaches,
+            "jobs": [{**job, "breach_probability": estimate.breach_probability.get(job["id"])}
+                     for job in result.jobs]
+        }
+        if include_output and result.success:
+            response["output"] = "\n".join(risk.format_risk(estimate))
+        return response
+
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+@app.post("/api/scenarios")
+def compare_scenarios(request: ScenarioRequest, include_output: bool = False, workers: Optional[int] = None):
+    """Run the base schedule and every override in parallel and compare SLA violations and utilization"""
+    try:
+        techs = [t.dict() for t in request.technicians]
+        jobs_list = [j.dict() for j in request.jobs]
+        overrides = [s.dict() for s in request.scenarios]
+
+        summaries = scenarios.run_scenarios(techs, jobs_list, overrides, workers=workers)
+
+        response = {"success": True, "scenarios": summaries}
+        if include_output:
+            response["output"] = "\n".join(scenarios.format_comparison(summaries))
+        return response
+
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+# NDJSON streaming: one {"technician": {...}} or {"job": {...}} object per
+# input line, one event (or {"type": "error", ...}) per output line.
+STREAM_RECORDS = {"technician": Technician, "job": Job}
+
+async def ndjson_lines(chunks):
+    """Split an async stream of byte chunks into non-empty lines"""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+def parse_stream_line(line, number):
+    """Return (kind, record dict) for one input line, or raise ValueError"""
+    try:
+        obj = json.loads(line)
+        (kind, fields), = obj.items()
+        return kind, STREAM_RECORDS[kind](**fields).dict()
+    except (ValueError, TypeError, KeyError, AttributeError, ValidationError) as e:
+        raise ValueError(matcher.ValidationIssue("invalid_line", "input", number, str(e) or repr(e)))
+
+def ndjson(record):
+    return json.dumps(record) + "\n"
+
+def stream_output(issues, events=()):
+    """NDJSON text for some issues (as error records) followed by some events"""
+    return ("".join(ndjson({"type": "error", **issue.to_dict()}) for issue in issues) +
+            "".join(ndjson(matcher.event_to_dict(event)) for event in events))
+
+async def stream_events(chunks, config):
+    """Feed NDJSON input into a StreamingSchedule and yield NDJSON events as they become final"""
+    stream = matcher.StreamingSchedule(config)
+    number = 0
+    async for line in ndjson_lines(chunks):
+        number += 1
+        try:
+            kind, record = parse_stream_line(line, number)
+        except ValueError as e:
+            yield stream_output(e.args)
+            continue
+
+        if kind == "technician":
+            output = stream_output(stream.add_technician(record))
+        else:
+            # Scheduling is CPU-bound; keep it off the event loop (one call at a time, in order)
+            output = stream_output(*await asyncio.to_thread(stream.add_job, record))
+        if output:
+            yield output
+        if stream.failed:
+            return
+
+    yield stream_output(*await asyncio.to_thread(stream.finish))
+
+@app.post("/api/schedule/stream")
+async def create_schedule_stream(request: Request, mode: str = "greedy"):
+    """
+    Schedule an NDJSON batch while it is still uploading. Techs come first,
+    then jobs in submitted_hour order; assignment events are streamed back
+    as soon as no later job can change them.
+    """
+    if mode not in matcher.DISPATCH_MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown dispatch mode '{mode}'")
+    config = matcher.ScheduleConfig(mode=mode)
+    return StreamingResponse(stream_events(request.stream(), config), media_type="application/x-ndjson")
+
+@app.post("/api/sessions")
+def create_session(request: ScheduleRequest, mode: str = "greedy", preempt: bool = False,
+                   order: str = "priority"):
+    techs = [t.dict() for t in request.technicians]
+    jobs_list = [j.dict() for j in request.jobs]
+    
+    issues = dispatch_issues(mode, order) or matcher.default_validator.validate(techs, jobs_list)
+    if issues:
+        return {"success": False, "errors": [issue.to_dict() for issue in issues]}
+    
+    tech_records, job_records, skill_bits = matcher.to_records(techs, jobs_list)
+    scheduler = matcher.EventScheduler(tech_records, job_records, skill_bits=skill_bits, mode=mode,
+                                       preempt=preempt, order=order, sketches=sketches.ResponseSketches())
+    events = scheduler.run_until(scheduler.clock)
+    telemetry.record_assignments(events)
     
+    session_id = uuid.uuid4().hex
+    with sessions_lock:
+        sessions[session_id] = ScheduleSession(scheduler, session_id)
+        if session_store is not None:
+            session_store.create(session_id, scheduler)
+    
+    technicians, jobs = scheduler.snapshot()
+    return {
+        "success": True,
+        "session_id": session_id,
+        "clock": scheduler.clock,
+        "events": [matcher.event_to_dict(e) for e in events],
+        "technicians": technicians,
+        "jobs": jobs
+    }
+
+@app.get("/api/sessions/{session_id}")
+def get_session_state(session_id: str):
+    session = get_session(session_id)
+    with session.lock:
+        technicians, jobs = session.scheduler.snapshot()
+        return {
+            "success": True,
+            "clock": session.scheduler.clock,
+            "technicians": technicians,
+            "jobs": jobs
+        }
+
+@app.get("/api/sessions/{session_id}/stats")
+def get_session_stats(session_id: str):
+    """Streaming response-time percentiles and SLA breach rates per priority and per skill"""
+    session = get_session(session_id)
+    with session.lock:
+        scheduler = session.scheduler
+        if scheduler.sketches is None:
+            raise HTTPException(status_code=404, detail=f"Session {session_id} has no response statistics")
+        return {"success": True, "clock": scheduler.clock, **scheduler.sketches.to_dict()}
+
+@app.delete("/api/sessions/{session_id}")
+def delete_session(session_id: str):
+    with sessions_lock:
+        session = sessions.pop(session_id, None)
+        if session is None:
+            raise HTTPException(status_code=404, detail=f"Unknown session {session_id}")
+    if session.ingest is not None:
+        session.ingest.close()
+    if session_store is not None:
+        with session.lock:
+            session_store.delete(session_id)
+    return {"success": True}
+
+@app.post("/api/sessions/{session_id}/advance")
+def advance_session(session_id: str, request: AdvanceRequest):
+    session = get_session(session_id)
+    return apply_edit(session, {"op": "advance", "hour": request.hour})
+
+@app.post("/api/sessions/{session_id}/jobs")
+def add_session_job(session_id: str, job: Job):
+    session = get_session(session_id)
+    job_dict = job.dict()
+    issues = []
+    matcher.default_validator.check_job(job_dict, job.id, issues)
+    if issues:
+        return {"success": False, "errors": [issue.to_dict() for issue in issues]}
+    # The record is built under the session lock because it may grow the skill vocabulary
+    return apply_edit(session, {"op": "add_job", "job": job_dict})
+
+@app.post("/api/sessions/{session_id}/ingest")
+async def ingest_session_job(session_id: str, job: Job):
+    """
+    Queue a job for the session and return without scheduling it. Queued
+    jobs are added in micro-batches, one dispatch round per batch.
+    """
+    session = get_session(session_id)
+    job_dict = job.dict()
+    issues = []
+    matcher.default_validator.check_job(job_dict, job.id, issues)
+    # Read without the session lock so a running batch never blocks intake; the flush checks again
+    if job.id in session.queued_ids or session.scheduler.has_job(job.id):
+        issues.append(matcher.ValidationIssue("duplicate_job_id", "job", job.id))
+    if issues:
+        return {"success": False, "errors": [issue.to_dict() for issue in issues]}
+
+    if session.ingest is None:
+        session.ingest = ingest.IngestQueue(lambda batch: flush_ingested(session, batch))
+    session.queued_ids.add(job.id)
+    session.ingest.put(job_dict)
+    return {"success": True, "pending": session.ingest.pending()}
+
+async def flush_ingested(session, jobs):
+    """Add one micro-batch of ingested jobs in a worker thread, so intake keeps running"""
+    try:
+        await asyncio.to_thread(add_ingested_jobs, session, jobs)
     finally:
-        sys.stdout = old_stdout
\ No newline at end of file
+        session.queued_ids.difference_update(job["id"] for job in jobs)
+
+def add_ingested_jobs(session, jobs):
+    with session.lock:
+        # A job with the same id may have been added directly since it was queued
+        jobs = [job for job in jobs if not session.scheduler.has_job(job["id"])]
+        if jobs:
+            apply_edit(session, {"op": "add_jobs", "jobs": jobs})
+
+@app.get("/api/sessions/{session_id}/ingest")
+def get_ingest_status(session_id: str):
+    """Counts for the session's ingest queue: received, flushed, pending, batches, failed"""
+    session = get_session(session_id)
+    if session.ingest is None:
+        return {"success": True, "received": 0, "flushed": 0, "pending": 0, "batches": 0, "failed": 0,
+                "last_error": None}
+    return {"success": True, **session.ingest.stats()}
+
+@app.delete("/api/sessions/{session_id}/jobs/{job_id}")
+def cancel_session_job(session_id: str, job_id: int):
+    session = get_session(session_id)
+    return apply_edit(session, {"op": "cancel_job", "job_id": job_id})
+
+@app.post("/api/sessions/{session_id}/jobs/{job_id}/complete")
+def complete_session_job(session_id: str, job_id: int):
+    session = get_session(session_id)
+    return apply_edit(session, {"op": "complete_job", "job_id": job_id})
+
+@app.put("/api/sessions/{session_id}/technicians/{tech_id}/availability")
+def set_session_availability(session_id: str, tech_id: int, request: AvailabilityRequest):
+    session = get_session(session_id)
+    return apply_edit(session, {"op": "set_availability", "tech_id": tech_id, "available": request.available})
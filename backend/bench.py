@@ -0,0 +1,336 @@
+"""
+Benchmark harness for the scheduler.
+
+Generates seeded synthetic workloads and times the main entry points on
+them: validate_inputs, assign_jobs_at_time, run_simulation, the
+/api/schedule round-trip (JSON in, pydantic models, schedule, JSON out)
+and the sharded schedule.
+Results are written as a JSON baseline that later runs can be compared
+against. --orders instead reports SLA outcomes of the priority and
+deadline dispatch orders on the same workloads.
+
+    python bench.py --jobs 1000 10000 100000 --output baseline.json
+    python bench.py --jobs 1000 10000 100000 --compare baseline.json
+    python bench.py --jobs 1000 10000 --arrival burst --orders
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import api
+import matcher
+import scenarios
+import shards
+
+SKILLS = ("plumbing", "electrical", "hvac", "roofing", "carpentry", "painting", "appliances", "locksmith")
+PRIORITY_MIX = {"critical": 0.02, "emergency": 0.08, "urgent": 0.3, "routine": 0.6}
+ARRIVALS = ("batch", "uniform", "poisson", "burst")
+BENCHMARKS = ("validate_inputs", "assign_jobs_at_time", "run_simulation", "api_schedule", "sharded_schedule")
+
+# Step 1: Synthetic workloads
+def pick_skills(rng, skills, weights, low, high):
+    """Draw between low and high distinct skills; popular skills come up more often"""
+    count = rng.randint(low, high)
+    return list(dict.fromkeys(rng.choices(skills, weights, k=count)))
+
+def arrival_hours(rng, n_jobs, arrival, horizon):
+    """Integer submission hours for n_jobs under one arrival pattern"""
+    if arrival == "batch":
+        return [0] * n_jobs
+    if arrival == "uniform":
+        return [rng.randint(0, horizon) for _ in range(n_jobs)]
+    if arrival == "poisson":
+        # Exponential gaps at a rate that spreads the batch over the horizon
+        rate = n_jobs / max(horizon, 1)
+        hours, now = [], 0.0
+        for _ in range(n_jobs):
+            now += rng.expovariate(rate)
+            hours.append(int(now))
+        return hours
+    if arrival == "burst":
+        # Most calls land in the first few hours of each 24h day
+        days = max(horizon // 24, 1)
+        return [min(rng.randrange(days) * 24 + int(rng.expovariate(0.5)), horizon) for _ in range(n_jobs)]
+    raise ValueError(f"Unknown arrival pattern '{arrival}' (must be one of {', '.join(ARRIVALS)})")
+
+def generate_workload(n_jobs, n_techs=50, seed=0, skills=SKILLS, skill_skew=1.0,
+                      priority_mix=None, arrival="uniform", horizon=80, shifts=False, regions=0):
+    """
+    Return (technicians, jobs) as dicts in the shape matcher expects.
+    skill_skew is a Zipf exponent over the skill list (0 = every skill
+    equally common). With shifts, each tech works 8 hours a day with two
+    days off. With regions, techs and jobs are spread round-robin over that
+    many regions. The same arguments always give the same workload.
+    """
+    if priority_mix is None:
+        priority_mix = PRIORITY_MIX
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) ** skill_skew for rank in range(len(skills))]
+
+    technicians = [
+        {"id": i + 1, "skills": pick_skills(rng, skills, weights, 1, 3),
+         "free_at_hour": 0, "current_job": None}
+        for i in range(n_techs)
+    ]
+    # Hand out skills nobody drew so every skill has a tech and the workload validates
+    for group in range(max(regions, 1)):
+        members = technicians[group::max(regions, 1)]
+        covered = {skill for tech in members for skill in tech["skills"]}
+        for k, skill in enumerate(s for s in skills if s not in covered):
+            if members:
+                members[k % len(members)]["skills"].append(skill)
+    if shifts:
+        for tech in technicians:
+            start = rng.choice((6, 8, 9, 14, 22))
+            tech["shift"] = {"start": start, "end": start + 8, "days_off": rng.sample(range(7), 2)}
+
+    priorities = rng.choices(list(priority_mix), list(priority_mix.values()), k=n_jobs)
+    hours = arrival_hours(rng, n_jobs, arrival, horizon)
+    jobs = [
+        {"id": 100 + i, "required_skills": pick_skills(rng, skills, weights, 1, 2),
+         "days_waited": rng.randint(0, 10), "estimated_hours": rng.randint(1, 6),
+         "priority": priority, "submitted_hour": hour,
+         "assigned": False, "assigned_to": None, "start_hour": None, "sla_met": None}
+        for i, (priority, hour) in enumerate(zip(priorities, hours))
+    ]
+    if regions and technicians:
+        for i, tech in enumerate(technicians):
+            tech["region"] = f"region-{i % regions}"
+        for i, job in enumerate(jobs):
+            # Skills one of the region's techs has, so the region can serve it alone
+            members = technicians[i % regions::regions] or technicians
+            tech = rng.choice(members)
+            job["region"] = tech["region"]
+            job["required_skills"] = rng.sample(tech["skills"], min(len(job["required_skills"]), len(tech["skills"])))
+    elif technicians:
+        # A skill pair no single tech has would leave the job unassignable; keep
+        # the job's first skill and whatever else one tech with that skill also has
+        skill_sets = {frozenset(tech["skills"]) for tech in technicians}
+        servable = {}
+        for job in jobs:
+            needed = frozenset(job["required_skills"])
+            if needed not in servable:
+                servable[needed] = any(needed <= skills for skills in skill_sets)
+            if not servable[needed]:
+                first = job["required_skills"][0]
+                tech = rng.choice([t for t in technicians if first in t["skills"]])
+                job["required_skills"] = [skill for skill in job["required_skills"] if skill in tech["skills"]]
+    return technicians, jobs
+
+# Step 2: One runner per benchmark. Each gets fresh copies of the workload.
+@contextlib.contextmanager
+def module_data(technicians, jobs):
+    """Swap the workload into matcher's module-level lists for the legacy entry points"""
+    saved = matcher.technicians[:], matcher.jobs[:]
+    matcher.technicians[:] = [dict(t) for t in technicians]
+    matcher.jobs[:] = [dict(j) for j in jobs]
+    try:
+        yield
+    finally:
+        matcher.technicians[:], matcher.jobs[:] = saved
+
+def bench_validate_inputs(technicians, jobs):
+    matcher.validate_inputs(technicians, jobs)
+
+def bench_assign_jobs_at_time(technicians, jobs):
+    with module_data(technicians, jobs):
+        matcher.assign_jobs_at_time(0)
+
+def bench_run_simulation(technicians, jobs):
+    with module_data(technicians, jobs), open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+        matcher.run_simulation()
+
+def bench_api_schedule(technicians, jobs):
+    body = json.dumps({"technicians": technicians, "jobs": jobs})
+    response = api.create_schedule(api.ScheduleRequest(**json.loads(body)))
+    json.dumps(response)
+
+def bench_sharded_schedule(technicians, jobs):
+    shards.schedule_sharded(technicians, jobs)
+
+RUNNERS = {
+    "validate_inputs": bench_validate_inputs,
+    "assign_jobs_at_time": bench_assign_jobs_at_time,
+    "run_simulation": bench_run_simulation,
+    "api_schedule": bench_api_schedule,
+    "sharded_schedule": bench_sharded_schedule,
+}
+
+# Step 3: Measurement
+def measure(runner, technicians, jobs, repeat=3, memory=True):
+    """Best wall time over repeat runs, plus peak traced memory from one extra run"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        runner(technicians, jobs)
+        best = min(best, time.perf_counter() - start)
+
+    result = {"seconds": round(best, 6), "jobs_per_sec": round(len(jobs) / best, 1) if best else None}
+    if memory:
+        # A separate run, since tracing slows everything down
+        tracemalloc.start()
+        try:
+            runner(technicians, jobs)
+            result["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+        finally:
+            tracemalloc.stop()
+    return result
+
+def case_name(n_jobs, n_techs, arrival, horizon=80, shifts=False, regions=0):
+    name = f"jobs={n_jobs},techs={n_techs},arrival={arrival}"
+    if horizon != 80:
+        name += f",horizon={horizon}"
+    if shifts:
+        name += ",shifts"
+    if regions:
+        name += f",regions={regions}"
+    return name
+
+def run_benchmarks(job_counts, n_techs=50, seed=0, arrival="uniform", skill_skew=1.0,
+                   priority_mix=None, benchmarks=BENCHMARKS, repeat=3, memory=True, log=None,
+                   horizon=80, shifts=False, regions=0):
+    """Run every benchmark on one workload per job count; returns the baseline dict"""
+    results = {}
+    for n_jobs in job_counts:
+        technicians, jobs = generate_workload(n_jobs, n_techs, seed, skill_skew=skill_skew,
+                                              priority_mix=priority_mix, arrival=arrival,
+                                              horizon=horizon, shifts=shifts, regions=regions)
+        name = case_name(n_jobs, n_techs, arrival, horizon, shifts, regions)
+        case = results.setdefault(name, {})
+        for bench in benchmarks:
+            case[bench] = measure(RUNNERS[bench], technicians, jobs, repeat, memory)
+            if log:
+                log(f"{name:<40} {bench:<20} {format_result(case[bench])}")
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "skill_skew": skill_skew,
+            "priority_mix": priority_mix or PRIORITY_MIX,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+def format_result(result):
+    text = f"{result['seconds'] * 1000:>10.1f} ms {result['jobs_per_sec'] or 0:>12,.0f} jobs/s"
+    if "peak_mb" in result:
+        text += f" {result['peak_mb']:>9.1f} MB peak"
+    return text
+
+# Step 4: Compare against a saved baseline
+def compare(current, baseline, tolerance=0.25):
+    """
+    Return (lines, regressions). A benchmark regresses when it is more than
+    tolerance slower than the baseline; cases missing from either side are skipped.
+    """
+    lines, regressions = [], []
+    for case, benches in current["results"].items():
+        for name, result in benches.items():
+            before = baseline.get("results", {}).get(case, {}).get(name)
+            if before is None:
+                continue
+            ratio = result["seconds"] / before["seconds"] if before["seconds"] else float("inf")
+            flag = ""
+            if ratio > 1 + tolerance:
+                flag = "  ✗ SLOWER"
+                regressions.append((case, name, ratio))
+            elif ratio < 1 - tolerance:
+                flag = "  ✓ faster"
+            memory = ""
+            if "peak_mb" in result and "peak_mb" in before:
+                memory = f"  mem {before['peak_mb']:.1f} -> {result['peak_mb']:.1f} MB"
+            lines.append(f"{case:<40} {name:<20} {before['seconds'] * 1000:>9.1f} -> "
+                         f"{result['seconds'] * 1000:>9.1f} ms ({ratio:.2f}x){memory}{flag}")
+    return lines, regressions
+
+# Step 5: Dispatch order comparison
+def compare_orders(job_counts, n_techs=50, seed=0, arrival="uniform", skill_skew=1.0, priority_mix=None,
+                   horizon=80, shifts=False, regions=0):
+    """Return report lines comparing order="deadline" with the default order on each workload"""
+    lines = []
+    for n_jobs in job_counts:
+        technicians, jobs = generate_workload(n_jobs, n_techs, seed, skill_skew=skill_skew,
+                                              priority_mix=priority_mix, arrival=arrival,
+                                              horizon=horizon, shifts=shifts, regions=regions)
+        summaries = scenarios.run_scenarios(technicians, jobs, [scenarios.Scenario("deadline order", order="deadline")],
+                                            workers=1)
+        summaries[0]["name"] = "priority order"
+        lines.append(case_name(n_jobs, n_techs, arrival, horizon, shifts, regions))
+        lines.extend(scenarios.format_comparison(summaries))
+        for summary in summaries:
+            by_priority = summary.get("violations_by_priority", {})
+            lines.append(f"  {summary['name']:<26} SLA violations by priority: " + ", ".join(
+                f"{priority} {by_priority.get(priority, 0)}" for priority in matcher.SLA_WINDOWS))
+        lines.append("")
+    return lines
+
+def parse_mix(text):
+    """'critical=0.02,emergency=0.1,...' -> dict"""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight)
+    return mix
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the scheduler on synthetic workloads")
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1000, 10000], help="job counts to run (one workload each)")
+    parser.add_argument("--techs", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--arrival", choices=ARRIVALS, default="uniform")
+    parser.add_argument("--horizon", type=int, default=80, help="hours over which jobs are submitted")
+    parser.add_argument("--shifts", action="store_true", help="give every tech an 8h shift with two days off")
+    parser.add_argument("--regions", type=int, default=0, help="spread techs and jobs over this many regions")
+    parser.add_argument("--skill-skew", type=float, default=1.0, help="Zipf exponent for skill popularity")
+    parser.add_argument("--priority-mix", type=parse_mix, default=None,
+                        help="e.g. critical=0.02,emergency=0.08,urgent=0.3,routine=0.6")
+    parser.add_argument("--benchmarks", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak-memory run")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before a run counts as a regression")
+    parser.add_argument("--orders", action="store_true",
+                        help="compare SLA outcomes of the priority and deadline dispatch orders instead of timing")
+    args = parser.parse_args(argv)
+
+    if args.orders:
+        for line in compare_orders(args.jobs, args.techs, args.seed, args.arrival, args.skill_skew,
+                                   args.priority_mix, args.horizon, args.shifts, args.regions):
+            print(line)
+        return 0
+
+    current = run_benchmarks(args.jobs, args.techs, args.seed, args.arrival, args.skill_skew,
+                             args.priority_mix, args.benchmarks, args.repeat, not args.no_memory, log=print,
+                             horizon=args.horizon, shifts=args.shifts, regions=args.regions)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        lines, regressions = compare(current, baseline, args.tolerance)
+        print(f"\nCompared with {args.compare} (tolerance {args.tolerance:.0%}):")
+        for line in lines:
+            print(line)
+        if regressions:
+            print(f"\n✗ {len(regressions)} benchmark(s) regressed")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Micro-batched job intake for sessions.
+
+An intake system posting single jobs at a high rate should not pay for one
+scheduling pass per job. IngestQueue puts each job on an asyncio queue and
+returns at once. A background task drains the queue in micro-batches: it
+flushes once max_batch items are waiting, or max_wait seconds after the
+first item of a batch arrived, whichever comes first. Each batch is handed
+to one flush call, which for sessions is a single add_jobs edit (one
+dispatch round for the whole batch).
+
+Queued jobs only live in memory until their batch is flushed; a session
+store persists them from then on.
+"""
+
+import asyncio
+
+BATCH_SIZE = 500
+BATCH_WAIT_SECONDS = 0.2
+
+class IngestQueue:
+    """Collects items from async code and passes them to flush(batch) in micro-batches"""
+
+    def __init__(self, flush, max_batch=BATCH_SIZE, max_wait=BATCH_WAIT_SECONDS):
+        self.flush = flush  # async callable taking a list of items
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.received = 0
+        self.flushed = 0
+        self.batches = 0
+        self.failed = 0     # items in batches whose flush raised
+        self.last_error = None
+        self._queue = asyncio.Queue()
+        self._full = asyncio.Event()
+        self._task = None
+
+    def put(self, item):
+        """Queue one item; the drain task is started on first use"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._drain())
+        self._queue.put_nowait(item)
+        self.received += 1
+        if self._queue.qsize() >= self.max_batch:
+            self._full.set()
+
+    def pending(self):
+        """Items put but not yet flushed (including a batch being flushed now)"""
+        return self.received - self.flushed - self.failed
+
+    async def _drain(self):
+        while True:
+            batch = [await self._queue.get()]
+            # One timer per batch rather than one per item
+            if self._queue.qsize() + 1 < self.max_batch:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.max_wait)
+                except asyncio.TimeoutError:
+                    pass
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            if self._queue.qsize() < self.max_batch:
+                self._full.clear()
+
+            try:
+                await self.flush(batch)
+                self.flushed += len(batch)
+                self.batches += 1
+            except Exception as e:
+                self.failed += len(batch)
+                self.last_error = str(e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def join(self):
+        """Wait until every item put so far has been flushed"""
+        await self._queue.join()
+
+    def close(self):
+        """Stop the drain task; items still queued are dropped"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self):
+        return {
+            "received": self.received,
+            "flushed": self.flushed,
+            "pending": self.pending(),
+            "batches": self.batches,
+            "failed": self.failed,
+            "last_error": self.last_error,
+        }
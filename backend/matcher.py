@@ -1,6 +1,17 @@
 # Phase 2: Time-simulated weighted matching with workload and urgency
 # WITH ROBUST VALIDATION, ERROR HANDLING, PRIORITY LEVELS, AND SLA TRACKING
 
+import heapq
+import math
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, NamedTuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import min_weight_full_bipartite_matching
+
 # Step 1: Define technicians
 technicians = [
     {"id": 1, "skills": ["plumbing"], "free_at_hour": 0, "current_job": None},
@@ -26,114 +37,264 @@ SLA_WINDOWS = {
     "routine": 24
 }
 
-# Step 4: Validation function (enhanced with priority validation)
+# Step 4: Validation (single pass, structured error codes)
+VALIDATION_MESSAGES = {
+    "no_technicians": "ERROR: No technicians available",
+    "tech_missing_id": "ERROR: Technician missing 'id' field: {detail}",
+    "duplicate_tech_id": "ERROR: Duplicate technician ID: {id}",
+    "tech_no_skills": "ERROR: Tech {id} has no skills",
+    "tech_skills_not_list": "ERROR: Tech {id} skills must be a list",
+    "no_jobs": "ERROR: No jobs provided",
+    "job_missing_id": "ERROR: Job missing 'id' field: {detail}",
+    "duplicate_job_id": "ERROR: Duplicate job ID: {id}",
+    "job_no_skills": "ERROR: Job {id} has no required skills",
+    "job_skills_not_list": "ERROR: Job {id} required_skills must be a list",
+    "job_missing_estimated_hours": "ERROR: Job {id} missing estimated_hours",
+    "job_invalid_duration": "ERROR: Job {id} has invalid duration (must be > 0)",
+    "job_missing_days_waited": "ERROR: Job {id} missing days_waited",
+    "job_negative_wait": "ERROR: Job {id} has negative wait time",
+    "job_missing_priority": "ERROR: Job {id} missing priority field",
+    "job_invalid_priority": "ERROR: Job {id} has invalid priority '{detail}' (must be 'emergency', 'urgent', or 'routine')",
+    "job_missing_submitted_hour": "ERROR: Job {id} missing submitted_hour",
+    "job_invalid_submitted_hour": "ERROR: Job {id} has invalid submitted_hour",
+    "job_skills_unavailable": "ERROR: Job {id} requires skills {detail} but no tech has these skills",
+    "tech_invalid_shift": "ERROR: Tech {id} has an invalid shift: {detail}",
+    "tech_invalid_location": "ERROR: Tech {id} has an invalid location: {detail}",
+    "job_invalid_location": "ERROR: Job {id} has an invalid location: {detail}",
+    "tech_after_jobs": "ERROR: Tech {id} listed after the first job",
+    "invalid_line": "ERROR: Line {id} is not a valid technician or job record: {detail}",
+    "invalid_mode": "ERROR: Unknown dispatch mode '{detail}' (must be 'greedy' or 'optimal')",
+    "invalid_order": "ERROR: Unknown dispatch order '{detail}' (must be 'priority' or 'deadline')",
+}
+
+class ValidationIssue(NamedTuple):
+    """One validation problem: a code from VALIDATION_MESSAGES plus the offending record's id"""
+    code: str
+    entity: str         # "technician", "job" or "input"
+    id: Any = None
+    detail: Any = None  # the bad value, the record missing its id, or the uncovered skills
+
+    @property
+    def message(self):
+        return VALIDATION_MESSAGES[self.code].format(id=self.id, detail=self.detail)
+
+    def to_dict(self):
+        return {"code": self.code, "entity": self.entity, "id": self.id, "message": self.message}
+
+VALID_PRIORITIES = ("critical", "emergency", "urgent", "routine")
+_NUMBER = (int, float)
+_MISSING = object()
+
+def shift_problem(shift):
+    """What is wrong with a tech's shift dict, or None if it is usable"""
+    if not isinstance(shift, dict):
+        return "must be an object with start, end and days_off"
+    start = shift.get("start", 0)
+    end = shift.get("end", 24)
+    if not isinstance(start, _NUMBER) or not isinstance(end, _NUMBER):
+        return "start and end must be numbers"
+    if not 0 <= start < 24:
+        return "start must be in [0, 24)"
+    if not start < end <= start + 24:
+        return "end must be after start and at most 24 hours later"
+    days_off = shift.get("days_off") or []
+    if not isinstance(days_off, list) or not all(isinstance(d, int) and 0 <= d < 7 for d in days_off):
+        return "days_off must be a list of day numbers 0-6"
+    if len(set(days_off)) == 7:
+        return "no working days"
+    return None
+
+def location_problem(location):
+    """What is wrong with a {"lat", "lon"} location, or None if it is usable"""
+    if not isinstance(location, dict):
+        return "must be an object with lat and lon"
+    lat, lon = location.get("lat"), location.get("lon")
+    if not isinstance(lat, _NUMBER) or not isinstance(lon, _NUMBER):
+        return "lat and lon must be numbers"
+    if not -90 <= lat <= 90 or not -180 <= lon <= 180:
+        return "lat must be in [-90, 90] and lon in [-180, 180]"
+    return None
+
+class InputValidator:
+    """
+    Validates techs and jobs in one pass over each list. The priority table
+    is built once per validator, and the tech skill vocabulary is collected
+    during the tech pass so the job pass can check skill coverage inline.
+    """
+
+    def __init__(self, priorities=None):
+        self.priorities = frozenset(VALID_PRIORITIES if priorities is None else priorities)
+
+    def check_job(self, job, job_id, issues):
+        """Field checks for a single job, appended to issues"""
+        skills = job.get("required_skills", _MISSING)
+        if not skills or skills is _MISSING:
+            issues.append(ValidationIssue("job_no_skills", "job", job_id))
+        elif not isinstance(skills, list):
+            issues.append(ValidationIssue("job_skills_not_list", "job", job_id))
+
+        hours = job.get("estimated_hours", _MISSING)
+        if hours is _MISSING:
+            issues.append(ValidationIssue("job_missing_estimated_hours", "job", job_id))
+        elif not isinstance(hours, _NUMBER) or hours <= 0:
+            issues.append(ValidationIssue("job_invalid_duration", "job", job_id, hours))
+
+        waited = job.get("days_waited", _MISSING)
+        if waited is _MISSING:
+            issues.append(ValidationIssue("job_missing_days_waited", "job", job_id))
+        elif not isinstance(waited, _NUMBER) or waited < 0:
+            issues.append(ValidationIssue("job_negative_wait", "job", job_id, waited))
+
+        priority = job.get("priority", _MISSING)
+        if priority is _MISSING:
+            issues.append(ValidationIssue("job_missing_priority", "job", job_id))
+        elif priority not in self.priorities:
+            issues.append(ValidationIssue("job_invalid_priority", "job", job_id, priority))
+
+        submitted = job.get("submitted_hour", _MISSING)
+        if submitted is _MISSING:
+            issues.append(ValidationIssue("job_missing_submitted_hour", "job", job_id))
+        elif not isinstance(submitted, _NUMBER) or submitted < 0:
+            issues.append(ValidationIssue("job_invalid_submitted_hour", "job", job_id, submitted))
+
+        location = job.get("location")
+        if location is not None:
+            problem = location_problem(location)
+            if problem:
+                issues.append(ValidationIssue("job_invalid_location", "job", job_id, problem))
+
+    def check_technicians(self, technicians, issues, fail_fast=False):
+        """Field and duplicate checks for the tech list; returns every skill the techs have"""
+        tech_ids = set()
+        tech_skills = set()
+        for tech in technicians:
+            skills = tech.get("skills")
+            if skills:
+                tech_skills.update(skills)
+
+            tech_id = tech.get("id", _MISSING)
+            if tech_id is _MISSING:
+                issues.append(ValidationIssue("tech_missing_id", "technician", None, tech))
+            else:
+                if tech_id in tech_ids:
+                    issues.append(ValidationIssue("duplicate_tech_id", "technician", tech_id))
+                tech_ids.add(tech_id)
+
+                if not skills:
+                    issues.append(ValidationIssue("tech_no_skills", "technician", tech_id))
+                elif not isinstance(skills, list):
+                    issues.append(ValidationIssue("tech_skills_not_list", "technician", tech_id))
+
+                shift = tech.get("shift")
+                if shift is not None:
+                    problem = shift_problem(shift)
+                    if problem:
+                        issues.append(ValidationIssue("tech_invalid_shift", "technician", tech_id, problem))
+
+                location = tech.get("location")
+                if location is not None:
+                    problem = location_problem(location)
+                    if problem:
+                        issues.append(ValidationIssue("tech_invalid_location", "technician", tech_id, problem))
+
+            if fail_fast and issues:
+                break
+        return tech_skills
+
+    def check_job_entry(self, job, job_ids, tech_skills, issues, uncovered):
+        """
+        All checks for one job in a list: id, duplicates (job_ids is updated),
+        fields, and whether any tech has its skills (reported into uncovered)
+        """
+        job_id = job.get("id", _MISSING)
+        if job_id is _MISSING:
+            issues.append(ValidationIssue("job_missing_id", "job", None, job))
+            return
+
+        if job_id in job_ids:
+            issues.append(ValidationIssue("duplicate_job_id", "job", job_id))
+        job_ids.add(job_id)
+
+        self.check_job(job, job_id, issues)
+
+        skills = job.get("required_skills")
+        if skills and isinstance(skills, list) and tech_skills.isdisjoint(skills):
+            uncovered.append(ValidationIssue("job_skills_unavailable", "job", job_id, list(set(skills))))
+
+    def validate(self, technicians, jobs, fail_fast=False):
+        """
+        Return a list of ValidationIssue (empty when the input is valid).
+        With fail_fast, stop at the first record that has a problem.
+        """
+        issues = []
+
+        if not technicians:
+            issues.append(ValidationIssue("no_technicians", "input"))
+            return issues
+
+        tech_skills = self.check_technicians(technicians, issues, fail_fast)
+        if fail_fast and issues:
+            return issues
+
+        if not jobs:
+            issues.append(ValidationIssue("no_jobs", "input"))
+            return issues
+
+        # Coverage problems are reported after all field problems, as before
+        uncovered = []
+        job_ids = set()
+        for job in jobs:
+            self.check_job_entry(job, job_ids, tech_skills, issues, uncovered)
+            if fail_fast and (issues or uncovered):
+                return issues + uncovered
+
+        issues.extend(uncovered)
+        return issues
+
+default_validator = InputValidator()
+
 def validate_inputs(technicians, jobs):
     """
     Validate all inputs before simulation.
     Returns: (is_valid: bool, error_messages: list)
     """
-    errors = []
-    
-    # Validate technicians list exists
-    if not technicians:
-        errors.append("ERROR: No technicians available")
-        return False, errors
-    
-    # Validate each technician
-    tech_ids_seen = set()
-    for tech in technicians:
-        # Check for missing id
-        if "id" not in tech:
-            errors.append(f"ERROR: Technician missing 'id' field: {tech}")
-            continue
-        
-        tech_id = tech["id"]
-        
-        # Check for duplicate IDs
-        if tech_id in tech_ids_seen:
-            errors.append(f"ERROR: Duplicate technician ID: {tech_id}")
-        tech_ids_seen.add(tech_id)
-        
-        # Check for empty skills
-        if "skills" not in tech or not tech["skills"]:
-            errors.append(f"ERROR: Tech {tech_id} has no skills")
-        elif not isinstance(tech["skills"], list):
-            errors.append(f"ERROR: Tech {tech_id} skills must be a list")
-    
-    # Validate jobs list exists
-    if not jobs:
-        errors.append("ERROR: No jobs provided")
-        return len(errors) == 0, errors
-    
-    # Validate each job
-    job_ids_seen = set()
-    all_skills_in_jobs = set()
-    
-    for job in jobs:
-        # Check for missing id
-        if "id" not in job:
-            errors.append(f"ERROR: Job missing 'id' field: {job}")
-            continue
-        
-        job_id = job["id"]
-        
-        # Check for duplicate IDs
-        if job_id in job_ids_seen:
-            errors.append(f"ERROR: Duplicate job ID: {job_id}")
-        job_ids_seen.add(job_id)
-        
-        # Check for required_skills
-        if "required_skills" not in job or not job["required_skills"]:
-            errors.append(f"ERROR: Job {job_id} has no required skills")
-        elif not isinstance(job["required_skills"], list):
-            errors.append(f"ERROR: Job {job_id} required_skills must be a list")
-        else:
-            all_skills_in_jobs.update(job["required_skills"])
-        
-        # Check estimated_hours
-        if "estimated_hours" not in job:
-            errors.append(f"ERROR: Job {job_id} missing estimated_hours")
-        elif not isinstance(job["estimated_hours"], (int, float)) or job["estimated_hours"] <= 0:
-            errors.append(f"ERROR: Job {job_id} has invalid duration (must be > 0)")
-        
-        # Check days_waited
-        if "days_waited" not in job:
-            errors.append(f"ERROR: Job {job_id} missing days_waited")
-        elif not isinstance(job["days_waited"], (int, float)) or job["days_waited"] < 0:
-            errors.append(f"ERROR: Job {job_id} has negative wait time")
-        
-        # Check priority
-        if "priority" not in job:
-            errors.append(f"ERROR: Job {job_id} missing priority field")
-        elif job["priority"] not in ["critical", "emergency", "urgent", "routine"]:
-            errors.append(f"ERROR: Job {job_id} has invalid priority '{job['priority']}' (must be 'emergency', 'urgent', or 'routine')")
-        
-        # Check submitted_hour
-        if "submitted_hour" not in job:
-            errors.append(f"ERROR: Job {job_id} missing submitted_hour")
-        elif not isinstance(job["submitted_hour"], (int, float)) or job["submitted_hour"] < 0:
-            errors.append(f"ERROR: Job {job_id} has invalid submitted_hour")
-    
-    # Check if any tech can do any job
-    all_tech_skills = set()
-    for tech in technicians:
-        if "skills" in tech and tech["skills"]:
-            all_tech_skills.update(tech["skills"])
-    
-    for job in jobs:
-        if "required_skills" in job and job["required_skills"]:
-            job_skills = set(job["required_skills"])
-            if not job_skills.intersection(all_tech_skills):
-                errors.append(f"ERROR: Job {job['id']} requires skills {list(job_skills)} but no tech has these skills")
-    
-    return len(errors) == 0, errors
+    issues = default_validator.validate(technicians, jobs)
+    return len(issues) == 0, [issue.message for issue in issues]
 
 # Step 5: Function to calculate tech-job match score
+TRAVEL_SPEED_KMH = 40   # average road speed used to turn distance into travel hours
+EARTH_RADIUS_KM = 6371.0
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km; works on floats and on numpy arrays"""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+def distance_km(origin, destination):
+    """haversine_km for two (lat, lon) tuples, without numpy's per-call overhead"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (*origin, *destination))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+def travel_hours(origin, destination, speed_kmh=TRAVEL_SPEED_KMH):
+    """Hours to drive between two (lat, lon) points, rounded to 0.01h; 0 if either is unknown"""
+    if origin is None or destination is None:
+        return 0
+    return round(distance_km(origin, destination) / speed_kmh, 2)
+
+def as_location(location):
+    """A {"lat", "lon"} dict (or None) as a (lat, lon) tuple (or None)"""
+    if not location:
+        return None
+    return (location["lat"], location["lon"])
+
 def match_score(tech, job):
     skill_match_count = sum(1 for skill in job["required_skills"] if skill in tech["skills"])
     skill_score = skill_match_count / len(job["required_skills"])  # fraction of skills matched
     urgency_score = job["days_waited"] / 5                          # normalize urgency
-    total_score = skill_score + urgency_score
+    travel_penalty = travel_hours(as_location(tech.get("location")), as_location(job.get("location")))
+    total_score = skill_score + urgency_score - travel_penalty
     return total_score
 
 # Step 6: Helper function to check if tech has required skills
@@ -142,139 +303,1503 @@ def can_do_job(tech, job):
     return all(skill in tech["skills"] for skill in job["required_skills"])
 
 # Step 7: Helper function to get SLA window for a job
-def get_sla_window(job):
+def get_sla_window(job, sla_windows=None):
     """Return the SLA window in hours for this job"""
-    return SLA_WINDOWS.get(job["priority"], 24)
+    if sla_windows is None:
+        sla_windows = SLA_WINDOWS
+    return sla_windows.get(job["priority"], 24)
 
 # Step 8: Helper function to check if job meets SLA
-def check_sla_met(job):
+def check_sla_met(job, sla_windows=None):
     """Check if a job was assigned within its SLA window"""
     if not job["assigned"] or job["start_hour"] is None:
         return False  # Not assigned
     
     assignment_delay = job["start_hour"] - job["submitted_hour"]
-    sla_window = get_sla_window(job)
+    sla_window = get_sla_window(job, sla_windows)
     return assignment_delay <= sla_window
 
-# Step 9: Try to assign unassigned jobs to available techs at given time
-def assign_jobs_at_time(current_hour):
+# Step 9: Compact internal records for techs and jobs
+PRIORITY_ORDER = {"critical": 0, "emergency": 1, "urgent": 2, "routine": 3}
+
+def skill_mask(skills, skill_bits):
+    """Bitmask for a list of skills, adding unseen skills to the shared skill_bits vocabulary"""
+    mask = 0
+    for skill in skills:
+        bit = skill_bits.get(skill)
+        if bit is None:
+            bit = skill_bits[skill] = 1 << len(skill_bits)
+        mask |= bit
+    return mask
+
+HOURS_PER_DAY = 24
+DAYS_PER_WEEK = 7
+
+@dataclass(frozen=True, slots=True)
+class Shift:
     """
-    Find unassigned jobs and try to assign them to available techs.
-    Prioritizes by: priority level first, then days_waited
-    Returns True if any jobs were assigned, False otherwise.
+    A tech's weekly calendar: the same working hours every day except days_off.
+    Hour 0 is midnight at the start of day 0, and days_off are day-of-week
+    numbers (day % 7). end may go past 24 for overnight shifts. A job can
+    only start during a shift but is always finished, even past the end.
     """
-    unassigned = [j for j in jobs if not j["assigned"]]
-    if not unassigned:
-        return False
-    
-    # Sort by priority first, then by days_waited
-    priority_order = {"critical": 0, "emergency": 1, "urgent": 2, "routine": 3}
-    unassigned.sort(key=lambda j: (priority_order.get(j["priority"], 3), -j["days_waited"]))
-    
-    assigned_this_round = False
-    
-    for job in unassigned:
-        # Find techs that are free at this time
-        available_techs = [t for t in technicians if t["free_at_hour"] <= current_hour and can_do_job(t, job)]
-        
-        if not available_techs:
-            continue  # No tech available for this job right now
-        
-        # Find best tech by match score
-        best_tech = max(available_techs, key=lambda t: match_score(t, job))
-        
-        # Assign the job
-        job["assigned"] = True
-        job["assigned_to"] = best_tech["id"]
-        job["start_hour"] = current_hour
-        job["sla_met"] = check_sla_met(job)
-        best_tech["current_job"] = job["id"]
-        best_tech["free_at_hour"] = current_hour + job["estimated_hours"]
-        
-        sla_indicator = "✓" if job["sla_met"] else "✗"
-        assignment_time = current_hour - job["submitted_hour"]
-        sla_window = get_sla_window(job)
-        
-        print(f"Hour {current_hour}: Tech {best_tech['id']} starts Job {job['id']} "
-              f"({job['priority'].upper()}, {job['estimated_hours']}h, "
-              f"response: {assignment_time}h/{sla_window}h {sla_indicator})")
-        assigned_this_round = True
-    
-    return assigned_this_round
+    start: float = 0
+    end: float = HOURS_PER_DAY
+    days_off: frozenset = frozenset()
 
-# Step 10: Main simulation with error handling
-def run_simulation():
-    """Run the scheduling simulation with comprehensive error handling"""
-    print("=" * 80)
-    print("EMERGENCY PRIORITY SCHEDULING SYSTEM WITH SLA TRACKING")
-    print("=" * 80 + "\n")
-    
-    # Step 10a: Validate inputs
-    print("Validating inputs...\n")
-    is_valid, error_messages = validate_inputs(technicians, jobs)
-    
-    if error_messages:
-        print("VALIDATION ERRORS FOUND:\n")
-        for error in error_messages:
-            print(f"  {error}")
-        print()
-    
-    if not is_valid:
-        print("✗ Validation failed. Stopping simulation.\n")
+    @classmethod
+    def from_dict(cls, shift):
+        return cls(shift.get("start", 0), shift.get("end", HOURS_PER_DAY), frozenset(shift.get("days_off") or ()))
+
+    def to_dict(self):
+        return {"start": self.start, "end": self.end, "days_off": sorted(self.days_off)}
+
+    def window(self, hour):
+        """(start, end) hours of the shift covering hour, or None if off then"""
+        day = int(hour // HOURS_PER_DAY)
+        for d in (day - 1, day):  # yesterday's overnight shift may still be running
+            if d % DAYS_PER_WEEK in self.days_off:
+                continue
+            begin = d * HOURS_PER_DAY + self.start
+            if begin <= hour < d * HOURS_PER_DAY + self.end:
+                return begin, d * HOURS_PER_DAY + self.end
+        return None
+
+    def next_start(self, hour):
+        """The first hour >= hour that is on shift, found without stepping through the idle hours"""
+        if self.window(hour) is not None:
+            return hour
+        day = int(hour // HOURS_PER_DAY)
+        for d in range(day, day + DAYS_PER_WEEK + 1):
+            begin = d * HOURS_PER_DAY + self.start
+            if d % DAYS_PER_WEEK not in self.days_off and begin >= hour:
+                return begin
+        return None
+
+@dataclass(slots=True)
+class TechRecord:
+    """Slotted stand-in for a technician dict while the scheduler runs"""
+    id: Any
+    skills: list
+    skill_mask: int
+    free_at_hour: float = 0
+    current_job: Any = None
+    shift: Any = None     # Shift, or None to work around the clock
+    location: Any = None  # current (lat, lon); moves to each job's site
+    region: Any = None    # only used to split sharded schedules; echoed back as given
+
+    @classmethod
+    def from_dict(cls, tech, skill_bits):
+        shift = tech.get("shift")
+        return cls(tech["id"], tech["skills"], skill_mask(tech["skills"], skill_bits),
+                   tech.get("free_at_hour", 0), tech.get("current_job"),
+                   Shift.from_dict(shift) if shift else None, as_location(tech.get("location")),
+                   tech.get("region"))
+
+    def to_dict(self):
+        tech = {"id": self.id, "skills": self.skills,
+                "free_at_hour": self.free_at_hour, "current_job": self.current_job}
+        if self.shift is not None:
+            tech["shift"] = self.shift.to_dict()
+        if self.location is not None:
+            tech["location"] = {"lat": self.location[0], "lon": self.location[1]}
+        if self.region is not None:
+            tech["region"] = self.region
+        return tech
+
+@dataclass(slots=True)
+class JobRecord:
+    """Slotted stand-in for a job dict; priority is interned and ranked once up front"""
+    id: Any
+    required_skills: list
+    skill_mask: int
+    days_waited: float
+    estimated_hours: float
+    priority: str
+    rank: int
+    submitted_hour: float
+    assigned: bool = False
+    assigned_to: Any = None
+    start_hour: Any = None
+    sla_met: Any = None
+    location: Any = None    # (lat, lon) of the site, if known
+    travel_hours: float = 0  # drive time of the assigned tech; start_hour is on arrival
+    remaining_hours: Any = None  # work left after being preempted; None if never interrupted
+    end_hour: Any = None    # when the work ends (or ended); after a preemption, the end of the last stint
+    region: Any = None
+
+    @classmethod
+    def from_dict(cls, job, skill_bits):
+        priority = sys.intern(job["priority"])
+        return cls(job["id"], job["required_skills"], skill_mask(job["required_skills"], skill_bits),
+                   job["days_waited"], job["estimated_hours"], priority, PRIORITY_ORDER.get(priority, 3),
+                   job["submitted_hour"], job.get("assigned", False), job.get("assigned_to"),
+                   job.get("start_hour"), job.get("sla_met"),
+                   as_location(job.get("location")), job.get("travel_hours", 0),
+                   region=job.get("region"))
+
+    def to_dict(self):
+        job = {"id": self.id, "required_skills": self.required_skills,
+               "days_waited": self.days_waited, "estimated_hours": self.estimated_hours,
+               "priority": self.priority, "submitted_hour": self.submitted_hour,
+               "assigned": self.assigned, "assigned_to": self.assigned_to,
+               "start_hour": self.start_hour, "sla_met": self.sla_met}
+        if self.location is not None:
+            job["location"] = {"lat": self.location[0], "lon": self.location[1]}
+            job["travel_hours"] = self.travel_hours
+        if self.remaining_hours is not None:
+            job["remaining_hours"] = self.remaining_hours
+        if self.end_hour is not None:
+            job["end_hour"] = self.end_hour
+        if self.region is not None:
+            job["region"] = self.region
+        return job
+
+def to_records(technicians, jobs, skill_bits=None):
+    """Convert tech and job dicts into records that share one skill vocabulary"""
+    if skill_bits is None:
+        skill_bits = {}
+    tech_records = [TechRecord.from_dict(t, skill_bits) for t in technicians]
+    job_records = [JobRecord.from_dict(j, skill_bits) for j in jobs]
+    return tech_records, job_records, skill_bits
+
+def dispatch_key(job, index):
+    """Sort key for pending jobs (priority level first, then days_waited); the index keeps ties in input order"""
+    return (job.rank, -job.days_waited, index)
+
+def deadline_key(job, index, sla_windows):
+    """Sort key for order="deadline": the hour the job breaches its SLA, then dispatch_key order"""
+    return (job.submitted_hour + sla_windows.get(job.priority, 24), job.rank, -job.days_waited, index)
+
+# Step 9a: Vectorized match scoring for whole batches of techs and jobs
+def mask_matrix(masks, width):
+    """Expand skill bitmasks into a (len(masks), width) boolean matrix"""
+    matrix = np.zeros((len(masks), width), dtype=bool)
+    for row, mask in enumerate(masks):
+        while mask:
+            bit = mask & -mask
+            matrix[row, bit.bit_length() - 1] = True
+            mask ^= bit
+    return matrix
+
+def score_matrix(tech_skills, job_skills, days_waited):
+    """
+    match_score for every (tech, job) pair in one pass.
+    tech_skills is (techs, skills) and job_skills is (jobs, skills), both boolean;
+    days_waited has one entry per job.
+    Returns (scores, qualified), both shaped (techs, jobs).
+    """
+    overlap = tech_skills.astype(np.int32) @ job_skills.T.astype(np.int32)
+    required = job_skills.sum(axis=1)
+    scores = overlap / required + np.asarray(days_waited, dtype=float) / 5
+    qualified = overlap == required
+    return scores, qualified
+
+# Step 9b: Skill-indexed pool of free technicians
+GRID_CELL_DEGREES = 0.1  # about 11 km north-south
+GRID_MIN_CELL_DEGREES = 0.005
+GRID_TECHS_PER_CELL = 8   # dense areas get smaller cells until they hold about this many techs
+KM_PER_DEGREE = 111.32
+
+class GeoGrid:
+    """
+    Free techs with a known location, bucketed into square lat/lon cells.
+    nearest() searches outward from the job's cell one ring of cells at a
+    time and stops once no unvisited ring can hold anything closer, so a
+    lookup touches the neighbourhood of the job rather than every tech.
+    """
+
+    def __init__(self, cell_degrees=GRID_CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self._cells = {}  # (row, col) -> {tech index: (lat, lon)}
+        self.visited = 0  # techs looked at by nearest(), for profiling
+
+    @classmethod
+    def for_locations(cls, locations):
+        """A grid whose cells are small enough that the techs at locations spread out over them"""
+        cell_degrees = GRID_CELL_DEGREES
+        while cell_degrees / 2 >= GRID_MIN_CELL_DEGREES:
+            cells = {(math.floor(lat / cell_degrees), math.floor(lon / cell_degrees)) for lat, lon in locations}
+            if len(locations) <= GRID_TECHS_PER_CELL * len(cells):
+                break
+            cell_degrees /= 2
+        return cls(cell_degrees)
+
+    def _cell(self, location):
+        return (math.floor(location[0] / self.cell_degrees), math.floor(location[1] / self.cell_degrees))
+
+    def add(self, index, location):
+        self._cells.setdefault(self._cell(location), {})[index] = location
+
+    def remove(self, index, location):
+        key = self._cell(location)
+        cell = self._cells.get(key)
+        if cell is not None:
+            cell.pop(index, None)
+            if not cell:
+                del self._cells[key]
+
+    def _ring(self, row, col, radius):
+        if radius == 0:
+            return [(row, col)]
+        cells = [(row + dr, col + dc) for dr in (-radius, radius) for dc in range(-radius, radius + 1)]
+        cells += [(row + dr, col + dc) for dc in (-radius, radius) for dr in range(-radius + 1, radius)]
+        return cells
+
+    def _ring_min_km(self, location, radius):
+        """A lower bound on the distance from a point to anything in ring radius of its cell"""
+        if radius == 0:
+            return 0.0
+        row, col = self._cell(location)
+        edge = min(location[0] - row * self.cell_degrees, (row + 1) * self.cell_degrees - location[0],
+                   location[1] - col * self.cell_degrees, (col + 1) * self.cell_degrees - location[1])
+        widest_lat = min(abs(location[0]) + (radius + 1) * self.cell_degrees, 89.9)
+        return (edge + (radius - 1) * self.cell_degrees) * KM_PER_DEGREE * math.cos(math.radians(widest_lat))
+
+    def nearest(self, location, accept):
+        """(distance_km, index) of the closest tech with accept(index) true, or None"""
+        row, col = self._cell(location)
+        best = None
+
+        def visit(cell):
+            nonlocal best
+            self.visited += len(cell)
+            for index, where in cell.items():
+                if accept(index):
+                    km = distance_km(location, where)
+                    if best is None or (km, index) < best:
+                        best = (km, index)
+
+        radius = 0
+        while self._cells:
+            if best is not None and self._ring_min_km(location, radius) > best[0]:
+                break
+            ring = self._ring(row, col, radius)
+            if len(ring) > len(self._cells):
+                # Sparse grid: cheaper to check the occupied cells left than to keep walking rings
+                for (r, c), cell in self._cells.items():
+                    if max(abs(r - row), abs(c - col)) >= radius:
+                        visit(cell)
+                break
+            for key in ring:
+                cell = self._cells.get(key)
+                if cell:
+                    visit(cell)
+            radius += 1
+        return best
+
+class SkillIndex:
+    """
+    Answers "which free techs have all of these skills" without scanning
+    techs that cannot do the job. Each skill bit keeps the set of free
+    techs (by list index) whose skill mask has it. Free techs with a known
+    location are also kept in a GeoGrid for nearest-tech lookups.
+
+    The answer for each job signature is cached the first time it is asked
+    for and then kept current as techs are marked free or busy, so repeat
+    lookups for common signatures cost no set intersections. best_free_with
+    also keeps the signature's free techs in a heap by skill score, so
+    picking the best one does not scan them all.
+    """
+
+    def __init__(self, technicians):
+        self.tech_masks = [tech.skill_mask for tech in technicians]
+        self.locations = [tech.location for tech in technicians]
+        self._free_by_skill = {}  # skill bit -> set of free tech indices
+        self._free = set()
+        self._free_by_mask = {0: self._free}  # cached signature -> set of free techs covering it
+        self._covers = [[] for _ in technicians]  # tech index -> cached signatures the tech covers
+        self._ranked = {}  # signature -> (skill score row, heap of (-score, tech index)); busy techs are skipped lazily
+        self.scanned = 0   # candidate techs looked at, for profiling
+        self.grid = GeoGrid.for_locations([location for location in self.locations if location is not None])
+        self._roaming = sum(location is None for location in self.locations)  # techs with no location
+        self._roaming_by_mask = {}  # cached signature -> free techs covering it that have no location
+
+    def _bits(self, mask):
+        while mask:
+            bit = mask & -mask
+            yield bit
+            mask ^= bit
+
+    def mark_free(self, index):
+        self._free.add(index)
+        for bit in self._bits(self.tech_masks[index]):
+            self._free_by_skill.setdefault(bit, set()).add(index)
+        roaming = self.locations[index] is None
+        for mask in self._covers[index]:
+            self._free_by_mask[mask].add(index)
+            ranked = self._ranked.get(mask)
+            if ranked is not None:
+                heapq.heappush(ranked[1], (-ranked[0][index], index))
+            if roaming and mask in self._roaming_by_mask:
+                self._roaming_by_mask[mask].add(index)
+        if not roaming:
+            self.grid.add(index, self.locations[index])
+
+    def is_free(self, index):
+        return index in self._free
+
+    def mark_busy(self, index):
+        if index not in self._free:
+            return
+        self._free.discard(index)
+        for bit in self._bits(self.tech_masks[index]):
+            self._free_by_skill[bit].discard(index)
+        roaming = self.locations[index] is None
+        for mask in self._covers[index]:
+            self._free_by_mask[mask].discard(index)
+            if roaming and mask in self._roaming_by_mask:
+                self._roaming_by_mask[mask].discard(index)
+        if not roaming:
+            self.grid.remove(index, self.locations[index])
+
+    def move(self, index, location):
+        """Record a busy tech's new location; it is used when they are freed"""
+        if self.locations[index] is None:
+            self._roaming -= 1
+        self.locations[index] = location
+
+    def nearest_free_with(self, mask, location):
+        """
+        (index, km) of the closest free tech covering mask, or None. Techs
+        with no location count as zero distance and win, lowest index first.
+        """
+        if self._roaming:
+            roaming = self._roaming_by_mask.get(mask)
+            if roaming is None:
+                roaming = {i for i in self.free_techs_with(mask) if self.locations[i] is None}
+                if mask:  # mask 0 is not in _covers, so it cannot be kept current
+                    self._roaming_by_mask[mask] = roaming
+            if roaming:
+                return min(roaming), 0.0
+        found = self.grid.nearest(location, lambda i: not mask & ~self.tech_masks[i])
+        if found is None:
+            return None
+        return found[1], found[0]
+
+    def free_techs_with(self, mask):
+        """
+        Indices of free techs whose skills cover every bit in mask. The set is
+        the live cache entry: copy it before marking techs free or busy.
+        """
+        cached = self._free_by_mask.get(mask)
+        if cached is not None:
+            return cached
+
+        pools = [self._free_by_skill.get(bit, set()) for bit in self._bits(mask)]
+        pools.sort(key=len)
+        cached = self._free_by_mask[mask] = pools[0].intersection(*pools[1:])
+        for index, tech_mask in enumerate(self.tech_masks):
+            if not mask & ~tech_mask:
+                self._covers[index].append(mask)
+        return cached
+
+    def best_free_with(self, mask, row):
+        """
+        The free tech covering mask with the highest row score (lowest index
+        on ties), or None. row must be the same list on every call for mask.
+        """
+        free = self.free_techs_with(mask)
+        ranked = self._ranked.get(mask)
+        if ranked is None or len(ranked[1]) > 2 * len(free) + 64:
+            # First lookup, or too many stale entries: rebuild from the free set
+            ranked = self._ranked[mask] = (row, [(-row[i], i) for i in free])
+            heapq.heapify(ranked[1])
+            self.scanned += len(free)
+        heap = ranked[1]
+        while heap and heap[0][1] not in free:
+            heapq.heappop(heap)
+            self.scanned += 1
+        self.scanned += 1
+        return heap[0][1] if heap else None
+
+class RunningJobs:
+    """
+    Techs part-way through a job, grouped by the job's priority rank and
+    indexed by skill the same way as SkillIndex, so preemption only looks at
+    techs who could take the job and are busy with something less urgent.
+    """
+
+    _bits = SkillIndex._bits
+
+    def __init__(self, tech_masks):
+        self.tech_masks = tech_masks
+        self.stints = {}    # tech index -> (job index, rank, start hour, hours of work)
+        self._by_rank = {}  # rank -> skill bit -> set of tech indices
+
+    def add(self, tech_index, job_index, rank, start_hour, hours):
+        self.discard(tech_index)
+        self.stints[tech_index] = (job_index, rank, start_hour, hours)
+        by_skill = self._by_rank.setdefault(rank, {})
+        for bit in self._bits(self.tech_masks[tech_index]):
+            by_skill.setdefault(bit, set()).add(tech_index)
+
+    def discard(self, tech_index):
+        """Forget the tech's stint and return it (None if they had none)"""
+        stint = self.stints.pop(tech_index, None)
+        if stint is not None:
+            by_skill = self._by_rank[stint[1]]
+            for bit in self._bits(self.tech_masks[tech_index]):
+                by_skill[bit].discard(tech_index)
+        return stint
+
+    def ranks(self):
+        """Ranks with running jobs, least urgent first"""
+        return sorted(self._by_rank, reverse=True)
+
+    def techs_with(self, mask, rank):
+        """Techs covering mask whose running job has this rank"""
+        by_skill = self._by_rank.get(rank, {})
+        pools = []
+        for bit in self._bits(mask):
+            pool = by_skill.get(bit)
+            if not pool:
+                return set()
+            pools.append(pool)
+        if not pools:
+            return {i for i, stint in self.stints.items() if stint[1] == rank}
+        pools.sort(key=len)
+        return pools[0].intersection(*pools[1:])
+
+# Step 9c: Scheduler events
+class AssignmentEvent(NamedTuple):
+    """A tech starting a job"""
+    hour: float
+    tech_id: Any
+    job_id: Any
+    priority: str
+    estimated_hours: float
+    response_hours: float
+    sla_window: float
+    sla_met: bool
+    travel_hours: float = 0
+    type = "assigned"
+
+class ClockEvent(NamedTuple):
+    """Techs freeing up, jobs arriving, live edits, or the run ending"""
+    type: str           # "tech_free", "submitted", "all_assigned", "unassignable", "max_hours",
+                        # "cancelled", "completed", "tech_off", "tech_on", "preempted" or "resumed"
+    hour: float
+    value: Any = None   # techs freed, jobs submitted, the horizon cap, or the tech id for
+                        # tech_off/tech_on/preempted/resumed
+    job_ids: tuple = ()  # jobs left without a qualified tech, cancelled, or completed
+
+class EventLog:
+    """
+    Append-only collector for scheduler events. Events are plain tuples;
+    text and JSON are only produced when somebody asks for them.
+    """
+
+    __slots__ = ("events",)
+
+    def __init__(self):
+        self.events = []
+
+    def append(self, event):
+        self.events.append(event)
+
+    def __iter__(self):
+        return iter(self.events)
+
+    def __len__(self):
+        return len(self.events)
+
+    def assignments(self):
+        return [e for e in self.events if e.type == "assigned"]
+
+    def to_dicts(self):
+        """JSON-ready dicts, one per event"""
+        return [event_to_dict(e) for e in self.events]
+
+def event_to_dict(event):
+    """JSON-ready dict for one scheduler event"""
+    return {"type": event.type, **event._asdict()}
+
+# Step 10: Event-driven scheduler
+TECH_FREE = 0
+JOB_ARRIVAL = 1
+SHIFT_START = 2
+SHIFT_END = 3
+DISPATCH_MODES = ("greedy", "optimal")
+DISPATCH_ORDERS = ("priority", "deadline")
+
+class UnknownIdError(KeyError):
+    """A live edit named a job or tech the scheduler does not have"""
+
+    def __init__(self, kind, item_id):
+        super().__init__(item_id)
+        self.kind = kind
+        self.item_id = item_id
+
+    def __str__(self):
+        return f"Unknown {self.kind} {self.item_id}"
+
+class EventScheduler:
+    """
+    Discrete-event dispatcher over lists of TechRecord and JobRecord.
+
+    Keeps a min-heap of (hour, kind, index) events for techs becoming free and
+    jobs being submitted, and one pending-job heap per required-skill signature.
+    A dispatch round only runs at hours where an event fired, so idle hours
+    cost nothing and each assignment is a couple of heap operations.
+
+    Techs with a Shift are only in the free pool while on shift. An idle tech
+    gets one event for the end of the shift and one for the start of the next
+    shift they could use, so nights and days off are jumped over, not stepped
+    through. Techs with nothing they could do are parked until such a job
+    turns up.
+
+    The scheduler only touches the records it is given and records what
+    happened in an EventLog instead of printing.
+
+    mode="greedy" hands out techs job by job in dispatch order; mode="optimal"
+    solves each round as a weighted bipartite assignment instead.
+
+    With preempt=True, a job that no free tech can take and that would miss
+    its SLA waiting for one may interrupt a less urgent job in progress. The
+    interrupted job goes back in the queue with the work it has left.
+
+    order="priority" dispatches by priority level, then days_waited.
+    order="deadline" dispatches the job closest to breaching its SLA first
+    (earliest deadline; with one SLA window per priority that is also least
+    slack). Greedy rounds then also look ahead at jobs not yet submitted: a
+    free tech is held back for one that would otherwise breach if no other
+    qualified tech frees up in time and the job it was about to take can
+    still make its own deadline afterwards.
+
+    sketches, if given, is called as sketches.record(priority, skills,
+    response_hours, sla_met) for every job that starts (see sketches.py).
+    """
+
+    def __init__(self, technicians, jobs, start_hour=0, sla_windows=None, events=None, skill_bits=None,
+                 mode="greedy", travel_speed_kmh=TRAVEL_SPEED_KMH, preempt=False, order="priority",
+                 sketches=None):
+        if mode not in DISPATCH_MODES:
+            raise ValueError(f"Unknown dispatch mode '{mode}' (must be one of {', '.join(DISPATCH_MODES)})")
+        if order not in DISPATCH_ORDERS:
+            raise ValueError(f"Unknown dispatch order '{order}' (must be one of {', '.join(DISPATCH_ORDERS)})")
+        self.mode = mode
+        self.order = order
+        self.sketches = sketches
+        self.travel_speed_kmh = travel_speed_kmh
+        self.technicians = technicians
+        self.jobs = jobs
+        self.skill_bits = {} if skill_bits is None else skill_bits
+        self.clock = start_hour
+        self.sla_windows = SLA_WINDOWS if sla_windows is None else sla_windows
+        self.events = EventLog() if events is None else events
+        self._timeline = []
+        self._pending = {}       # required-skills bitmask -> heap of dispatch keys
+        self._pending_count = 0
+        self._arrivals_left = 0
+        self.index = SkillIndex(technicians)
+        self._skill_rows = {}    # required-skills bitmask -> per-tech skill score
+        self._removed = set()    # indices of cancelled jobs
+        self._off_duty = set()   # indices of techs taken out of the pool
+        self._job_positions = {job.id: index for index, job in enumerate(jobs)}
+        self._tech_positions = {tech.id: index for index, tech in enumerate(technicians)}
+        self._shift_events = {}  # tech index -> the (hour, kind) of its live shift event
+        self._parked = {}        # skill mask -> indices of off-shift techs waiting for work
+        self.preempt = preempt
+        self.rounds = 0          # dispatch rounds run
+        self.events_applied = 0  # timeline events popped by advance()
+        self.jobs_queued = 0     # pushes onto the pending-job heaps
+        self.lookups = 0         # best-tech lookups
+        self._running = RunningJobs(self.index.tech_masks) if preempt or order == "deadline" else None
+        self._upcoming = {}      # required-skills bitmask -> heap of (arrival, deadline, index), deadline order only
+
+        for index, job in enumerate(jobs):
+            if job.assigned:
+                continue
+            if job.submitted_hour > start_hour:
+                self._timeline.append((job.submitted_hour, JOB_ARRIVAL, index))
+                self._arrivals_left += 1
+                self._expect(index)
+            else:
+                self._enqueue(index)
+
+        heapq.heapify(self._timeline)
+        for index, tech in enumerate(technicians):
+            if tech.free_at_hour > start_hour:
+                heapq.heappush(self._timeline, (tech.free_at_hour, TECH_FREE, index))
+                if self._running is not None:
+                    # Work from before the scheduler started; ranked above every job so it is never bumped
+                    self._running.add(index, None, -1, start_hour, tech.free_at_hour - start_hour)
+            else:
+                self._release(index)
+
+        self._score_signatures(list(self._pending))
+
+    def _score_signatures(self, masks):
+        """Precompute one skill-score row per signature with a single score_matrix call"""
+        if not masks or not self.technicians:
+            return
+        width = max(len(self.skill_bits), max(masks).bit_length(), max(self.index.tech_masks).bit_length())
+        scores, _ = score_matrix(mask_matrix(self.index.tech_masks, width),
+                                 mask_matrix(masks, width), np.zeros(len(masks)))
+        for column, mask in enumerate(masks):
+            self._skill_rows[mask] = scores[:, column].tolist()
+
+    def _key(self, job, index):
+        if self.order == "deadline":
+            return deadline_key(job, index, self.sla_windows)
+        return dispatch_key(job, index)
+
+    def _deadline(self, job):
+        return job.submitted_hour + self.sla_windows.get(job.priority, 24)
+
+    def _expect(self, index):
+        """Note a job that is not submitted yet, for the deadline order's lookahead"""
+        if self.order == "deadline":
+            job = self.jobs[index]
+            heapq.heappush(self._upcoming.setdefault(job.skill_mask, []),
+                           (job.submitted_hour, self._deadline(job), index))
+
+    def _enqueue(self, index):
+        job = self.jobs[index]
+        queue = self._pending.setdefault(job.skill_mask, [])
+        heapq.heappush(queue, self._key(job, index))
+        self._pending_count += 1
+        self.jobs_queued += 1
+        if self._parked:
+            self._wake(job.skill_mask)
+
+    def pending_jobs(self):
+        """Jobs that have been submitted but not yet assigned, in input order"""
+        indices = sorted(key[-1] for queue in self._pending.values() for key in queue)
+        return [self.jobs[index] for index in indices]
+
+    def dispatch(self):
+        """
+        Assign pending jobs to techs free at the current clock, then (with
+        preempt) let jobs about to miss their SLA bump less urgent work.
+        Returns True if any jobs were assigned, False otherwise.
+        """
+        dispatch_round = self._dispatch_optimal if self.mode == "optimal" else self._dispatch_greedy
+        assigned = dispatch_round()
+        self.rounds += 1
+        # Bumped jobs are back in the queue; a free tech may take them, or they may bump something lower
+        while self.preempt and self._pending_count and self._preempt_round():
+            dispatch_round()
+            self.rounds += 1
+            assigned = True
+        return assigned
+
+    def counters(self):
+        """Work done so far, for profiling"""
+        return {"rounds": self.rounds, "events": self.events_applied, "jobs_queued": self.jobs_queued,
+                "tech_lookups": self.lookups, "techs_scanned": self.index.scanned + self.index.grid.visited}
+
+    def _dispatch_greedy(self):
+        # Merge the head of every signature queue; once a job finds no free
+        # tech, no later job with the same skills can find one this round.
+        heads = [(queue[0], mask) for mask, queue in self._pending.items() if queue]
+        heapq.heapify(heads)
+
+        assigned_this_round = False
+        held = set()      # techs kept free for an upcoming job this round
+        reserved = set()  # upcoming jobs a tech is held for
+
+        while heads:
+            key, mask = heapq.heappop(heads)
+            job = self.jobs[key[-1]]
+
+            best_index = self._best_tech(job, mask, held)
+            while best_index is not None and self._upcoming and self._hold(job, best_index, held, reserved):
+                held.add(best_index)
+                best_index = self._best_tech(job, mask, held)
+            if best_index is None:
+                continue  # No tech available for this skill set right now
+
+            queue = self._pending[mask]
+            heapq.heappop(queue)
+            self._pending_count -= 1
+            if queue:
+                heapq.heappush(heads, (queue[0], mask))
+
+            self._assign(job, best_index)
+            assigned_this_round = True
+
+        return assigned_this_round
+
+    def _best_tech(self, job, mask, held):
+        """Index of the free tech job should get (skipping held techs), or None"""
+        self.lookups += 1
+        if job.location is not None:
+            # Every qualified tech has the same skill score, so the travel
+            # penalty decides: take the nearest one from the spatial index.
+            nearest = self.index.nearest_free_with(mask, job.location)
+            if nearest is None:
+                return None
+            if nearest[0] not in held:
+                return nearest[0]
+            available_techs = self.index.free_techs_with(mask) - held
+            self.index.scanned += len(available_techs)
+            return min(available_techs, default=None, key=lambda i: (
+                travel_hours(self.technicians[i].location, job.location, self.travel_speed_kmh), i))
+
+        # Find best tech by match score (ties go to the earliest tech in the list).
+        # days_waited adds the same urgency to every tech, so the skill row decides.
+        if mask not in self._skill_rows:
+            self._score_signatures([mask])
+        row = self._skill_rows[mask]
+        if not held:
+            return self.index.best_free_with(mask, row)
+        available_techs = self.index.free_techs_with(mask) - held
+        self.index.scanned += len(available_techs)
+        return max(available_techs, default=None, key=lambda i: (row[i], -i))
+
+    def _hold(self, job, tech_index, held, reserved):
+        """
+        True if the tech should stay free for an upcoming job instead of
+        taking job: the upcoming job would breach its SLA waiting for this
+        tech, no other qualified tech frees up before its deadline, and job
+        still makes its own deadline once the tech has done the upcoming one.
+        """
+        tech = self.technicians[tech_index]
+        tech_mask = self.index.tech_masks[tech_index]
+        to_job = travel_hours(tech.location, job.location, self.travel_speed_kmh)
+        busy_until = self.clock + to_job + (job.remaining_hours or job.estimated_hours)
+
+        for mask, upcoming in self._upcoming.items():
+            if mask & ~tech_mask:
+                continue
+            while upcoming and (upcoming[0][0] <= self.clock or upcoming[0][2] in self._removed):
+                heapq.heappop(upcoming)  # submitted or cancelled since
+            if not upcoming:
+                continue
+            arrival, deadline, index = upcoming[0]
+            other = self.jobs[index]
+            if index in reserved or other.rank >= job.rank or arrival >= busy_until:
+                continue
+            site = job.location if job.location is not None else tech.location
+            if busy_until + travel_hours(site, other.location, self.travel_speed_kmh) <= deadline:
+                continue  # the tech is back in time anyway
+            done = (max(arrival, self.clock + travel_hours(tech.location, other.location, self.travel_speed_kmh))
+                    + other.estimated_hours)
+            if done + travel_hours(other.location, job.location, self.travel_speed_kmh) > self._deadline(job):
+                continue  # holding would make job breach instead
+            if self.index.free_techs_with(mask) - held - {tech_index}:
+                continue
+            if self._earliest_free(mask) <= deadline:
+                continue
+            reserved.add(index)
+            return True
         return False
-    
-    print("✓ Validation passed\n")
-    
-    # Step 10b: Run simulation with try/except
-    try:
-        print("=" * 80)
-        print("TIME SIMULATION: Jobs assigned based on priority and tech availability")
-        print("=" * 80 + "\n")
-        
-        current_hour = 0
-        max_hours = 100  # Safety limit to prevent infinite loops
-        
+
+    def _earliest_free(self, mask):
+        """The earliest hour a busy tech covering mask finishes their job"""
+        return min((self.technicians[i].free_at_hour for rank in self._running.ranks()
+                    for i in self._running.techs_with(mask, rank)), default=math.inf)
+
+    def _preempt_round(self):
+        """
+        Give each pending job that would miss its SLA waiting for a tech the
+        cheapest tech to preempt: the one on the least urgent job, then the
+        shortest drive, then the most work left. Returns True if any job was bumped.
+        """
+        heads = [(queue[0], mask) for mask, queue in self._pending.items() if queue]
+        heapq.heapify(heads)
+        bumped = False
+
+        while heads:
+            key, mask = heapq.heappop(heads)
+            queue = self._pending[mask]
+            if queue[0] != key:
+                # A job bumped this round rejoined the queue ahead of key
+                heapq.heappush(heads, (queue[0], mask))
+                continue
+            job = self.jobs[key[-1]]
+            candidate = self._preemption_candidate(job)
+            if candidate is None:
+                continue  # later jobs with this signature are no more urgent
+
+            heapq.heappop(queue)
+            self._pending_count -= 1
+            if queue:
+                heapq.heappush(heads, (queue[0], mask))
+            self._interrupt(candidate)
+            self._assign(job, candidate)
+            bumped = True
+
+        return bumped
+
+    def _preemption_candidate(self, job):
+        """Index of the tech job should bump, or None if it should wait"""
+        if self.index.free_techs_with(job.skill_mask):
+            return None
+        # The earliest a qualified tech frees up without bumping anyone
+        earliest = self._earliest_free(job.skill_mask)
+        if earliest <= self._deadline(job):
+            return None
+
+        for rank in self._running.ranks():
+            if rank <= job.rank:
+                return None
+            candidates = [(travel_hours(self.technicians[i].location, job.location, self.travel_speed_kmh),
+                           self.clock - self.technicians[i].free_at_hour, i)
+                          for i in self._running.techs_with(job.skill_mask, rank) if self._can_bump(i)]
+            if candidates:
+                travel, _, tech_index = min(candidates)
+                return tech_index if self.clock + travel < earliest else None
+        return None
+
+    def _can_bump(self, tech_index):
+        tech = self.technicians[tech_index]
+        return (tech.free_at_hour > self.clock and tech_index not in self._off_duty
+                and (tech.shift is None or tech.shift.window(self.clock) is not None))
+
+    def _interrupt(self, tech_index):
+        """Stop the tech's job at the current clock and put the rest of it back in the queue"""
+        job_index, _, start_hour, hours = self._running.discard(tech_index)
+        job = self.jobs[job_index]
+        tech = self.technicians[tech_index]
+        job.remaining_hours = hours - max(self.clock - start_hour, 0)
+        job.assigned = False
+        job.end_hour = None
+        tech.current_job = None
+        tech.free_at_hour = self.clock
+        self.events.append(ClockEvent("preempted", self.clock, tech.id, job_ids=(job.id,)))
+        self._enqueue(job_index)
+
+    def _dispatch_optimal(self):
+        """
+        Solve the round as a max-weight bipartite matching between free techs
+        and pending jobs. Each pair is worth its match_score plus a weight for
+        the job's priority rank. The rank weights are big enough that serving
+        a higher-priority job always beats any mix of lower-priority ones.
+        """
+        free = sorted(self.index.free_techs_with(0))
+        if not free:
+            return False
+
+        # Jobs sharing a signature are interchangeable to the techs, so only the
+        # first k of each queue can matter when k free techs could take them.
+        keys = []
+        for mask, queue in self._pending.items():
+            capacity = len(self.index.free_techs_with(mask))
+            if capacity and queue:
+                keys.extend(heapq.nsmallest(capacity, queue))
+        if not keys:
+            return False
+
+        width = max(len(self.skill_bits), max(self.index.tech_masks).bit_length(),
+                    max(self.jobs[key[-1]].skill_mask for key in keys).bit_length())
+        round_jobs = [self.jobs[key[-1]] for key in keys]
+        scores, qualified = score_matrix(
+            mask_matrix([self.index.tech_masks[i] for i in free], width),
+            mask_matrix([job.skill_mask for job in round_jobs], width),
+            [job.days_waited for job in round_jobs])
+
+        tech_rows, job_cols = np.nonzero(qualified)
+        if not len(tech_rows):
+            return False
+
+        # Travel hours count against a pair; adding the longest edge keeps every weight positive
+        edge_scores = scores[tech_rows, job_cols]
+        travel = self._edge_travel([free[r] for r in tech_rows], [round_jobs[c] for c in job_cols])
+        if travel.any():
+            edge_scores = edge_scores - travel + travel.max()
+
+        ranks = np.array([job.rank for job in round_jobs])
+        unit = min(len(free), len(keys)) * (max(scores.max(), edge_scores.max()) + 1) + 1
+        weights = edge_scores + unit ** (max(PRIORITY_ORDER.values()) - ranks[job_cols])
+
+        # Only qualified pairs become edges, which keeps the graph sparse. Each
+        # tech also gets a private dummy job so it can stay idle; costs are
+        # ceiling - weight, so the min-cost full matching is the max-weight one.
+        n_techs, n_jobs = qualified.shape
+        ceiling = weights.max() + 1
+        graph = csr_matrix(
+            (np.concatenate([ceiling - weights, np.full(n_techs, ceiling)]),
+             (np.concatenate([tech_rows, np.arange(n_techs)]),
+              np.concatenate([job_cols, n_jobs + np.arange(n_techs)]))),
+            shape=(n_techs, n_jobs + n_techs))
+        rows, cols = min_weight_full_bipartite_matching(graph)
+
+        chosen = sorted((keys[c], free[r]) for r, c in zip(rows, cols) if c < n_jobs)
+        if not chosen:
+            return False
+
+        taken = {key for key, _ in chosen}
+        for mask in {self.jobs[key[-1]].skill_mask for key in taken}:
+            queue = [key for key in self._pending[mask] if key not in taken]
+            heapq.heapify(queue)
+            self._pending[mask] = queue
+        self._pending_count -= len(chosen)
+
+        for key, tech_index in chosen:
+            self._assign(self.jobs[key[-1]], tech_index)
+        return True
+
+    def _edge_travel(self, tech_indices, jobs):
+        """Travel hours for parallel lists of tech indices and jobs (0 where a location is unknown)"""
+        if not any(job.location is not None for job in jobs):
+            return np.zeros(len(jobs))
+        origins = np.array([self.index.locations[i] or (np.nan, np.nan) for i in tech_indices], dtype=float)
+        sites = np.array([job.location or (np.nan, np.nan) for job in jobs], dtype=float)
+        km = haversine_km(origins[:, 0], origins[:, 1], sites[:, 0], sites[:, 1])
+        return np.round(np.nan_to_num(km) / self.travel_speed_kmh, 2)
+
+    def _assign(self, job, tech_index):
+        """
+        Send the tech at tech_index to job at the current clock; work starts
+        when they arrive. A preempted job resumes with the work it had left
+        and keeps the start hour and SLA result of its first start.
+        """
+        current_hour = self.clock
+        tech = self.technicians[tech_index]
+        travel = travel_hours(tech.location, job.location, self.travel_speed_kmh)
+        start_hour = current_hour + travel
+        resumed = job.remaining_hours is not None
+        hours = job.remaining_hours if resumed else job.estimated_hours
+        job.assigned = True
+        job.assigned_to = tech.id
+        if resumed:
+            job.travel_hours += travel
+        else:
+            response_hours = start_hour - job.submitted_hour
+            sla_window = self.sla_windows.get(job.priority, 24)
+            job.start_hour = start_hour
+            job.travel_hours = travel
+            job.sla_met = response_hours <= sla_window
+            if self.sketches is not None:
+                self.sketches.record(job.priority, job.required_skills, response_hours, job.sla_met)
+        tech.current_job = job.id
+        tech.free_at_hour = job.end_hour = start_hour + hours
+        self.index.mark_busy(tech_index)
+        if job.location is not None:
+            tech.location = job.location
+            self.index.move(tech_index, job.location)
+        heapq.heappush(self._timeline, (tech.free_at_hour, TECH_FREE, tech_index))
+        if self._running is not None:
+            self._running.add(tech_index, self._job_positions[job.id], job.rank, start_hour, hours)
+
+        if resumed:
+            self.events.append(ClockEvent("resumed", current_hour, tech.id, job_ids=(job.id,)))
+        else:
+            self.events.append(AssignmentEvent(
+                current_hour, tech.id, job.id, job.priority, job.estimated_hours,
+                response_hours, sla_window, job.sla_met, travel))
+
+    def advance(self):
+        """
+        Move the clock to the next event hour and apply every event due then.
+        Returns (hour, techs_freed, jobs_arrived), or None if no events are left.
+        """
+        if not self._timeline:
+            return None
+
+        hour = self._timeline[0][0]
+        techs_freed = 0
+        jobs_arrived = 0
+        self.clock = hour
+        while self._timeline and self._timeline[0][0] == hour:
+            _, kind, index = heapq.heappop(self._timeline)
+            self.events_applied += 1
+            if kind == TECH_FREE:
+                # Edits can free a tech early; the original event is then stale
+                if self.technicians[index].free_at_hour != hour or self.index.is_free(index):
+                    continue
+                techs_freed += self._release(index)
+            elif kind == JOB_ARRIVAL:
+                if index in self._removed:
+                    continue
+                self._enqueue(index)
+                self._arrivals_left -= 1
+                jobs_arrived += 1
+            else:
+                if self._shift_events.get(index) != (hour, kind):
+                    continue  # superseded by a later shift event for this tech
+                del self._shift_events[index]
+                if kind == SHIFT_END:
+                    if not self.index.is_free(index):
+                        continue  # working past the end; the job's TECH_FREE takes over
+                    self.index.mark_busy(index)
+                    self._release(index)
+                else:
+                    techs_freed += self._release(index)
+
+        return hour, techs_freed, jobs_arrived
+
+    def is_done(self):
+        """True once every job has been submitted and assigned"""
+        return self._pending_count == 0 and self._arrivals_left == 0
+
+    def _log_step(self, step):
+        hour, techs_freed, jobs_arrived = step
+        if techs_freed:
+            self.events.append(ClockEvent("tech_free", hour, techs_freed))
+        if jobs_arrived:
+            self.events.append(ClockEvent("submitted", hour, jobs_arrived))
+
+    def run_until(self, hour):
+        """
+        Dispatch at the current clock and at every event hour up to and
+        including hour, then leave the clock at hour. Returns the new events.
+        """
+        if hour < self.clock:
+            raise ValueError(f"Cannot move the clock back from hour {self.clock} to hour {hour}")
+        start = len(self.events)
+        self.dispatch()
+        while self._timeline and self._timeline[0][0] <= hour:
+            self._log_step(self.advance())
+            self.dispatch()
+        self.clock = max(self.clock, hour)
+        return self.events.events[start:]
+
+    def run(self, max_hours=None):
+        """
+        Dispatch at the current clock, then at every event hour until all jobs
+        are assigned or none of the rest can be. max_hours optionally stops early.
+        """
+        self.dispatch()
+
         while True:
-            # Try to assign jobs at current time
-            if assign_jobs_at_time(current_hour):
-                # Jobs were assigned, continue
-                pass
-            
             # Check if all jobs are assigned
-            if all(j["assigned"] for j in jobs):
-                print(f"\n✓ All jobs assigned!")
+            if self.is_done():
+                self.events.append(ClockEvent("all_assigned", self.clock))
                 break
-            
-            # Find next time when a tech becomes free
-            unassigned = [j for j in jobs if not j["assigned"]]
-            if not unassigned:
+
+            step = self.advance()
+
+            if step is None:
+                self.events.append(ClockEvent("unassignable", self.clock,
+                                              job_ids=tuple(j.id for j in self.pending_jobs())))
                 break
-            
-            busy_techs = [t for t in technicians if t["free_at_hour"] > current_hour]
-            
-            if not busy_techs:
-                print(f"\n✗ No techs available for remaining jobs:")
-                for job in unassigned:
-                    print(f"   - Job {job['id']} ({job['priority']}) requires {job['required_skills']}")
+
+            hour = step[0]
+            self._log_step(step)
+
+            if max_hours is not None and hour > max_hours:
+                self.events.append(ClockEvent("max_hours", hour, max_hours))
                 break
-            
-            next_free_hour = min(t["free_at_hour"] for t in busy_techs)
-            
-            if next_free_hour > current_hour:
-                print(f"Hour {next_free_hour}: Tech becomes available...")
-                current_hour = next_free_hour
+
+            self.dispatch()
+
+    # Live edits. Each one changes only the queues and techs it concerns, runs
+    # a dispatch round at the current clock, and returns the events it caused.
+
+    def has_job(self, job_id):
+        """True if a job with this id was ever added (cancelled ones included)"""
+        return job_id in self._job_positions
+
+    def job(self, job_id):
+        """The JobRecord with this id (UnknownIdError if unknown or cancelled)"""
+        index = self._job_positions.get(job_id)
+        if index is None or index in self._removed:
+            raise UnknownIdError("job", job_id)
+        return self.jobs[index]
+
+    def _tech_index(self, tech_id):
+        index = self._tech_positions.get(tech_id)
+        if index is None:
+            raise UnknownIdError("technician", tech_id)
+        return index
+
+    def add_job(self, job):
+        """Add a new JobRecord; it is queued now or when its submitted_hour comes"""
+        return self.add_jobs([job])
+
+    def add_jobs(self, jobs):
+        """Add several JobRecords with a single dispatch round for the ones already due"""
+        seen = set()
+        for job in jobs:
+            if job.id in self._job_positions or job.id in seen:
+                raise ValueError(f"Duplicate job ID: {job.id}")
+            seen.add(job.id)
+        start = len(self.events)
+        due = False
+        for job in jobs:
+            index = len(self.jobs)
+            self.jobs.append(job)
+            self._job_positions[job.id] = index
+            if job.submitted_hour > self.clock:
+                heapq.heappush(self._timeline, (job.submitted_hour, JOB_ARRIVAL, index))
+                self._arrivals_left += 1
+                self._expect(index)
             else:
-                # Safety break
-                break
-            
-            if current_hour > max_hours:
-                print(f"\nReached max simulation hours ({max_hours}). Stopping.")
-                break
-        
-        # Step 10c: Print final results
-        print_final_results()
-        return True
-        
+                self._enqueue(index)
+                due = True
+        if due:
+            self.dispatch()
+        return self.events.events[start:]
+
+    def cancel_job(self, job_id):
+        """Drop a job; a tech working on it goes back to the pool right away"""
+        job = self.job(job_id)
+        index = self._job_positions[job_id]
+        start = len(self.events)
+
+        if job.assigned:
+            tech_index = self._tech_index(job.assigned_to)
+            tech = self.technicians[tech_index]
+            if tech.current_job != job.id or tech.free_at_hour <= self.clock:
+                raise ValueError(f"Job {job_id} already finished at hour {job.end_hour}")
+            tech.free_at_hour = self.clock
+            tech.current_job = None
+            self._removed.add(index)
+            self.events.append(ClockEvent("cancelled", self.clock, job_ids=(job_id,)))
+            self._release(tech_index)
+            self.dispatch()
+            return self.events.events[start:]
+
+        if job.submitted_hour > self.clock:
+            self._arrivals_left -= 1    # its arrival event is skipped when it fires
+        else:
+            queue = self._pending[job.skill_mask]
+            queue.remove(self._key(job, index))
+            heapq.heapify(queue)
+            self._pending_count -= 1
+        self._removed.add(index)
+        self.events.append(ClockEvent("cancelled", self.clock, job_ids=(job_id,)))
+        return self.events.events[start:]
+
+    def complete_job(self, job_id):
+        """Mark a running job finished at the current clock and free its tech"""
+        job = self.job(job_id)
+        if not job.assigned:
+            raise ValueError(f"Job {job_id} has not been assigned")
+        tech_index = self._tech_index(job.assigned_to)
+        tech = self.technicians[tech_index]
+        if tech.current_job != job.id or tech.free_at_hour <= self.clock:
+            raise ValueError(f"Job {job_id} is not in progress")
+
+        start = len(self.events)
+        tech.free_at_hour = job.end_hour = self.clock
+        self._release(tech_index)
+        self.events.append(ClockEvent("completed", self.clock, job_ids=(job_id,)))
+        self.dispatch()
+        return self.events.events[start:]
+
+    def set_availability(self, tech_id, available):
+        """Take a tech out of the pool or put them back in"""
+        tech_index = self._tech_index(tech_id)
+        start = len(self.events)
+        if available:
+            self._off_duty.discard(tech_index)
+            self._release(tech_index)
+            self.events.append(ClockEvent("tech_on", self.clock, tech_id))
+            self.dispatch()
+        else:
+            self._off_duty.add(tech_index)
+            self.index.mark_busy(tech_index)
+            self.events.append(ClockEvent("tech_off", self.clock, tech_id))
+        return self.events.events[start:]
+
+    def _release(self, tech_index):
+        """
+        Return a tech to the free pool if they are done, on duty and on shift.
+        An off-shift tech is woken at their next shift if there is work they
+        could do, and parked otherwise. Returns True if the tech is now free.
+        """
+        tech = self.technicians[tech_index]
+        if tech.free_at_hour > self.clock:
+            return False
+        if self._running is not None:
+            self._running.discard(tech_index)
+        if tech_index in self._off_duty:
+            return False
+        self._unpark(tech_index)
+        if tech.shift is None:
+            self.index.mark_free(tech_index)
+            return True
+
+        window = tech.shift.window(self.clock)
+        if window is not None:
+            self.index.mark_free(tech_index)
+            self._shift_event(tech_index, window[1], SHIFT_END)
+            return True
+
+        next_start = tech.shift.next_start(self.clock)
+        if next_start is not None and (self._arrivals_left or self._has_work_for(tech_index)):
+            self._shift_event(tech_index, next_start, SHIFT_START)
+        else:
+            self._shift_events.pop(tech_index, None)
+            self._parked.setdefault(self.index.tech_masks[tech_index], set()).add(tech_index)
+        return False
+
+    def _shift_event(self, tech_index, hour, kind):
+        self._shift_events[tech_index] = (hour, kind)
+        heapq.heappush(self._timeline, (hour, kind, tech_index))
+
+    def _has_work_for(self, tech_index):
+        tech_mask = self.index.tech_masks[tech_index]
+        return any(queue and not mask & ~tech_mask for mask, queue in self._pending.items())
+
+    def _unpark(self, tech_index):
+        parked = self._parked.get(self.index.tech_masks[tech_index])
+        if parked:
+            parked.discard(tech_index)
+
+    def _wake(self, job_mask):
+        """Release parked techs who can do a newly pending job"""
+        for tech_mask in [m for m in self._parked if not job_mask & ~m]:
+            for tech_index in self._parked.pop(tech_mask):
+                self._release(tech_index)
+
+    def snapshot(self):
+        """Current techs and (non-cancelled) jobs as dicts"""
+        technicians = [t.to_dict() for t in self.technicians]
+        jobs = [j.to_dict() for i, j in enumerate(self.jobs) if i not in self._removed]
+        return technicians, jobs
+
+    # Pickling, for persisted sessions. Job records make up most of the state;
+    # stored column by column they load several times faster than one by one.
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["jobs"] = [[getattr(job, name) for job in self.jobs] for name in JobRecord.__slots__]
+        return state
+
+    def __setstate__(self, state):
+        state["jobs"] = list(map(JobRecord, *state["jobs"]))
+        self.__dict__.update(state)
+
+def assign_jobs_at_time(current_hour):
+    """
+    Find jobs submitted by current_hour and try to assign them to available techs.
+    Prioritizes by: priority level first, then days_waited
+    Returns True if any jobs were assigned, False otherwise.
+    """
+    tech_records, job_records, _ = to_records(technicians, jobs)
+    assigned = EventScheduler(tech_records, job_records, current_hour).dispatch()
+    for tech, record in zip(technicians, tech_records):
+        tech.update(record.to_dict())
+    for job, record in zip(jobs, job_records):
+        job.update(record.to_dict())
+    return assigned
+
+# Step 11: Stateless scheduling entry point
+@dataclass
+class ScheduleConfig:
+    """Settings for one schedule() call"""
+    sla_windows: dict = field(default_factory=lambda: dict(SLA_WINDOWS))
+    max_hours: Any = None   # Optional cut-off hour; by default run until every job is placed
+    mode: str = "greedy"    # "greedy" or "optimal" (see EventScheduler)
+    fail_fast: bool = False # Stop validating at the first bad record
+    travel_speed_kmh: float = TRAVEL_SPEED_KMH  # For techs and jobs with locations
+    preempt: bool = False   # Let jobs about to miss their SLA interrupt less urgent work
+    order: str = "priority" # "priority" or "deadline" dispatch order (see EventScheduler)
+
+@dataclass
+class ScheduleResult:
+    """Outcome of one schedule() call: updated copies of the inputs plus the event log"""
+    success: bool
+    technicians: list
+    jobs: list
+    events: EventLog = field(default_factory=EventLog)
+    errors: list = field(default_factory=list)  # ValidationIssue tuples
+    config: ScheduleConfig = field(default_factory=ScheduleConfig)
+    timings: dict = field(default_factory=dict)   # phase -> seconds spent in schedule()
+    counters: dict = field(default_factory=dict)  # EventScheduler.counters() after the run
+
+def schedule(technicians, jobs, config=None):
+    """
+    Validate and simulate one schedule without touching module state.
+    The dicts are converted to records for the run and back to fresh dicts
+    for the result, so the same lists can be scheduled concurrently from
+    several threads. The result records how long each phase took.
+    """
+    if config is None:
+        config = ScheduleConfig()
+
+    started = time.perf_counter()
+    errors = default_validator.validate(technicians, jobs, fail_fast=config.fail_fast)
+    validated = time.perf_counter()
+    if errors:
+        return ScheduleResult(False, [dict(t) for t in technicians], [dict(j) for j in jobs],
+                              errors=errors, config=config, timings={"validate": validated - started})
+
+    tech_records, job_records, skill_bits = to_records(technicians, jobs)
+    converted = time.perf_counter()
+    scheduler = EventScheduler(tech_records, job_records, sla_windows=config.sla_windows,
+                               skill_bits=skill_bits, mode=config.mode,
+                               travel_speed_kmh=config.travel_speed_kmh, preempt=config.preempt,
+                               order=config.order)
+    scheduler.run(max_hours=config.max_hours)
+    simulated = time.perf_counter()
+    tech_dicts, job_dicts = [t.to_dict() for t in tech_records], [j.to_dict() for j in job_records]
+    timings = {"validate": validated - started, "to_records": converted - validated,
+               "simulate": simulated - converted, "to_dicts": time.perf_counter() - simulated}
+    return ScheduleResult(True, tech_dicts, job_dicts, scheduler.events, errors, config,
+                          timings, scheduler.counters())
+
+class StreamingSchedule:
+    """
+    Schedule jobs as they are read instead of from a complete list.
+    Technicians come first; jobs should follow in submitted_hour order. Every
+    hour before the latest submitted_hour seen is final, so the scheduler runs
+    up to it and hands back the events right away. The result for a sorted
+    stream matches schedule() on the same input. Jobs that arrive after their
+    submitted_hour has been simulated are queued at the current clock.
+
+    Events are handed out once and dropped from the log, so memory grows with
+    the job records only. order="deadline" is refused: its lookahead holds
+    need the jobs that have not been read yet, so the stream could not match
+    schedule().
+    """
+
+    def __init__(self, config=None, validator=None):
+        self.config = ScheduleConfig() if config is None else config
+        if self.config.order != "priority":
+            raise ValueError(f"Streaming schedules only support order 'priority', not '{self.config.order}'")
+        self.validator = default_validator if validator is None else validator
+        self.technicians = []
+        self.scheduler = None
+        self.failed = False  # set when the tech list is invalid; nothing more is scheduled
+        self._tech_skills = set()
+        self._job_ids = set()
+        self._due = []       # jobs at or before the clock, added in one batch
+        self._horizon = 0    # latest submitted_hour seen so far
+
+    def add_technician(self, tech):
+        """Queue a tech dict; returns issues (techs are refused once the first job arrives)"""
+        if self.scheduler is not None or self.failed:
+            return [ValidationIssue("tech_after_jobs", "technician", tech.get("id"))]
+        self.technicians.append(tech)
+        return []
+
+    def _start(self):
+        """Validate the techs and build the scheduler; returns any issues"""
+        issues = []
+        if not self.technicians:
+            issues.append(ValidationIssue("no_technicians", "input"))
+            self.failed = True
+            return issues
+        self._tech_skills = self.validator.check_technicians(self.technicians, issues, self.config.fail_fast)
+        if issues:
+            self.failed = True
+            return issues
+        tech_records, _, skill_bits = to_records(self.technicians, [])
+        self.scheduler = EventScheduler(tech_records, [], sla_windows=self.config.sla_windows,
+                                        skill_bits=skill_bits, mode=self.config.mode,
+                                        travel_speed_kmh=self.config.travel_speed_kmh,
+                                        preempt=self.config.preempt, order=self.config.order)
+        return issues
+
+    def _drain(self):
+        log = self.scheduler.events.events
+        events = log[:]
+        log.clear()
+        return events
+
+    def _flush(self):
+        if self._due:
+            self.scheduler.add_jobs(self._due)
+            self._due = []
+
+    def add_job(self, job):
+        """
+        Add one job dict. Returns (issues, events): the job's validation
+        issues (it is skipped if there are any) and the events that became final.
+        The first job also validates the tech list; if that fails the issues
+        are returned here, failed is set, and later calls do nothing.
+        """
+        if self.failed:
+            return [], []
+        if self.scheduler is None:
+            issues = self._start()
+            if issues:
+                return issues, []
+
+        issues = []
+        self.validator.check_job_entry(job, self._job_ids, self._tech_skills, issues, issues)
+        if issues:
+            return issues, []
+
+        record = JobRecord.from_dict(job, self.scheduler.skill_bits)
+        if record.submitted_hour > self._horizon:
+            # Every job up to the old horizon is in, so those hours can be settled
+            self._flush()
+            self.scheduler.run_until(self._horizon)
+            self._horizon = record.submitted_hour
+
+        if record.submitted_hour > self.scheduler.clock:
+            self.scheduler.add_job(record)
+        else:
+            self._due.append(record)
+        return issues, self._drain()
+
+    def finish(self):
+        """Run the rest of the schedule; returns (issues, events)"""
+        if self.failed:
+            return [], []
+        if self.scheduler is None:
+            issues = self._start()
+            if not issues:
+                issues.append(ValidationIssue("no_jobs", "input"))
+            return issues, []
+        self._flush()
+        self.scheduler.run(max_hours=self.config.max_hours)
+        return [], self._drain()
+
+# Step 12: Render results as text
+def render_event(event):
+    """Return the log line for one scheduler event"""
+    kind = event.type
+    if kind == "assigned":
+        sla_indicator = "✓" if event.sla_met else "✗"
+        travel = f"{event.travel_hours}h travel, " if event.travel_hours else ""
+        return (f"Hour {event.hour}: Tech {event.tech_id} starts Job {event.job_id} "
+                f"({event.priority.upper()}, {travel}{event.estimated_hours}h, "
+                f"response: {event.response_hours}h/{event.sla_window}h {sla_indicator})")
+    if kind == "tech_free":
+        return f"Hour {event.hour}: Tech becomes available..."
+    if kind == "submitted":
+        return f"Hour {event.hour}: {event.value} new job(s) submitted..."
+    if kind == "preempted":
+        return f"Hour {event.hour}: Tech {event.value} stops Job {event.job_ids[0]} for a more urgent job"
+    if kind == "resumed":
+        return f"Hour {event.hour}: Tech {event.value} resumes Job {event.job_ids[0]}"
+    if kind == "all_assigned":
+        return "\n✓ All jobs assigned!"
+    if kind == "max_hours":
+        return f"\nReached max simulation hours ({event.value}). Stopping."
+    return f"\n✗ No techs available for remaining jobs:"
+
+def render_report(result):
+    """
+    Return the full simulation report for a ScheduleResult as one string.
+    This is the only place event text gets formatted, so callers that just
+    want the structured events never pay for it.
+    """
+    lines = [
+        "=" * 80,
+        "EMERGENCY PRIORITY SCHEDULING SYSTEM WITH SLA TRACKING",
+        "=" * 80 + "\n",
+        "Validating inputs...\n",
+    ]
+
+    if result.errors:
+        lines.append("VALIDATION ERRORS FOUND:\n")
+        lines.extend(f"  {error.message}" for error in result.errors)
+        lines.append("")
+
+    if not result.success:
+        lines.append("✗ Validation failed. Stopping simulation.\n")
+        return "\n".join(lines) + "\n"
+
+    lines.append("✓ Validation passed\n")
+    lines.append("=" * 80)
+    lines.append("TIME SIMULATION: Jobs assigned based on priority and tech availability")
+    lines.append("=" * 80 + "\n")
+
+    jobs_by_id = {j["id"]: j for j in result.jobs}
+    for event in result.events:
+        lines.append(render_event(event))
+        if event.type == "unassignable":
+            for job_id in event.job_ids:
+                job = jobs_by_id[job_id]
+                lines.append(f"   - Job {job['id']} ({job['priority']}) requires {job['required_skills']}")
+
+    lines.extend(format_final_results(result.technicians, result.jobs, result.config.sla_windows))
+    return "\n".join(lines) + "\n"
+
+# Step 13: Main simulation with error handling
+def run_simulation():
+    """Run the scheduling simulation on the module-level data and print the report"""
+    try:
+        result = schedule(technicians, jobs)
     except Exception as e:
         print(f"\n✗ SIMULATION ERROR: {str(e)}")
         print(f"Error type: {type(e).__name__}")
@@ -283,93 +1808,169 @@ def run_simulation():
         traceback.print_exc()
         return False
 
-# Step 11: Print final timeline, SLA metrics, and summary
-def print_final_results():
-    """Print final assignment timeline, SLA tracking, and tech summary"""
-    print("\n" + "=" * 80)
-    print("FINAL ASSIGNMENT TIMELINE")
-    print("=" * 80)
-    
-    for job in sorted(jobs, key=lambda j: j["start_hour"] if j["start_hour"] is not None else float('inf')):
+    # Keep the module-level lists in step with the result for callers that read them
+    technicians[:] = result.technicians
+    jobs[:] = result.jobs
+
+    print(render_report(result), end="")
+    return result.success
+
+# Step 14: Final metrics in one pass, then the printed timeline and summary
+RESPONSE_PERCENTILES = (50, 95, 99)
+
+def response_stats(hours):
+    """Count, mean, min, max and percentiles of some response times (None when there are none)"""
+    stats = {"count": len(hours), "mean": None, "min": None, "max": None}
+    stats.update((f"p{q}", None) for q in RESPONSE_PERCENTILES)
+    if hours:
+        stats.update(mean=sum(hours) / len(hours), min=min(hours), max=max(hours))
+        for q, value in zip(RESPONSE_PERCENTILES, np.percentile(hours, RESPONSE_PERCENTILES)):
+            stats[f"p{q}"] = float(value)
+    return stats
+
+def job_end_hour(job):
+    """When an assigned job dict's work ends; dicts from before end_hour was recorded fall back to the estimate"""
+    end_hour = job.get("end_hour")
+    return end_hour if end_hour is not None else job["start_hour"] + job["estimated_hours"]
+
+def aggregate_results(technicians, jobs, sla_windows=None):
+    """
+    JSON-ready metrics for a finished schedule: counts, SLA violations and
+    response-time percentiles per priority, plus each tech's jobs and
+    utilization (work hours over the makespan). One pass over the jobs.
+    """
+    if sla_windows is None:
+        sla_windows = SLA_WINDOWS
+    by_priority = {priority: {"jobs": 0, "assigned": 0, "sla_violations": 0, "sla_hours": window, "response": []}
+                   for priority, window in sla_windows.items()}
+    techs = {tech["id"]: {"id": tech["id"], "free_at_hour": tech["free_at_hour"], "jobs": [], "busy_hours": 0}
+             for tech in technicians}
+    makespan = 0
+
+    for job in jobs:
+        entry = by_priority.get(job["priority"])
+        if entry is None:
+            entry = by_priority[job["priority"]] = {"jobs": 0, "assigned": 0, "sla_violations": 0,
+                                                    "sla_hours": get_sla_window(job, sla_windows), "response": []}
+        entry["jobs"] += 1
+        if not job["assigned"]:
+            continue
+        entry["assigned"] += 1
+        end_hour = job_end_hour(job)
+        entry["response"].append(job["start_hour"] - job["submitted_hour"])
+        if not job["sla_met"]:
+            entry["sla_violations"] += 1
+        tech = techs.get(job["assigned_to"])
+        if tech is not None:
+            tech["jobs"].append(job["id"])
+            # A job completed early worked less than its estimate; a preempted one paused in between
+            tech["busy_hours"] += min(job["estimated_hours"], end_hour - job["start_hour"])
+        makespan = max(makespan, end_hour)
+
+    busy_hours = 0
+    for tech in techs.values():
+        busy_hours += tech["busy_hours"]
+        tech["utilization"] = tech["busy_hours"] / makespan if makespan else 0
+    assigned = sum(entry["assigned"] for entry in by_priority.values())
+    return {
+        "jobs": len(jobs),
+        "assigned": assigned,
+        "unassigned": len(jobs) - assigned,
+        "sla_violations": sum(entry["sla_violations"] for entry in by_priority.values()),
+        "response_hours": response_stats([hours for entry in by_priority.values() for hours in entry["response"]]),
+        "by_priority": {priority: {**{key: value for key, value in entry.items() if key != "response"},
+                                   "response_hours": response_stats(entry["response"])}
+                        for priority, entry in by_priority.items()},
+        "makespan_hours": makespan,
+        "utilization": busy_hours / (len(techs) * makespan) if techs and makespan else 0,
+        "technicians": list(techs.values()),
+    }
+
+def format_final_results(technicians, jobs, sla_windows=None):
+    """Return the final assignment timeline, SLA tracking, and tech summary as lines"""
+    if sla_windows is None:
+        sla_windows = SLA_WINDOWS
+    metrics = aggregate_results(technicians, jobs, sla_windows)
+    lines = []
+    lines.append("\n" + "=" * 80)
+    lines.append("FINAL ASSIGNMENT TIMELINE")
+    lines.append("=" * 80)
+
+    labels = {}     # job id -> "101(E)" for the tech summary
+    violations = [] # (input position, job)
+    order = sorted(range(len(jobs)),
+                   key=lambda i: jobs[i]["start_hour"] if jobs[i]["start_hour"] is not None else float('inf'))
+    for position in order:
+        job = jobs[position]
+        labels[job["id"]] = f"{job['id']}({job['priority'][0].upper()})"
         if job["assigned"]:
-            end_hour = job["start_hour"] + job["estimated_hours"]
+            end_hour = job_end_hour(job)
             response_time = job["start_hour"] - job["submitted_hour"]
-            sla_window = get_sla_window(job)
+            sla_window = get_sla_window(job, sla_windows)
             sla_status = "✓ SLA MET" if job["sla_met"] else "✗ SLA VIOLATED"
-            
-            print(f"Job {job['id']:>3} ({job['priority'].upper():>9}): "
-                  f"Tech {job['assigned_to']} | "
-                  f"Hours {job['start_hour']:>2}-{end_hour:<2} | "
-                  f"Response: {response_time}h/{sla_window}h | {sla_status}")
+            if not job["sla_met"]:
+                violations.append((position, job))
+
+            lines.append(f"Job {job['id']:>3} ({job['priority'].upper():>9}): "
+                         f"Tech {job['assigned_to']} | "
+                         f"Hours {job['start_hour']:>2}-{end_hour:<2} | "
+                         f"Response: {response_time}h/{sla_window}h | {sla_status}")
         else:
-            print(f"Job {job['id']:>3} ({job['priority'].upper():>9}): UNASSIGNED")
-    
-    # Calculate metrics
-    print("\n" + "=" * 80)
-    print("SLA AND PRIORITY METRICS")
-    print("=" * 80)
-    
-    emergencies = [j for j in jobs if j["priority"] == "emergency"]
-    urgents = [j for j in jobs if j["priority"] == "urgent"]
-    routines = [j for j in jobs if j["priority"] == "routine"]
-    
-    assigned_emergencies = [j for j in emergencies if j["assigned"]]
-    assigned_urgents = [j for j in urgents if j["assigned"]]
-    assigned_routines = [j for j in routines if j["assigned"]]
-    
-    sla_violations = [j for j in jobs if j["assigned"] and not j["sla_met"]]
-    emergency_violations = [j for j in emergencies if j["assigned"] and not j["sla_met"]]
-    
-    print(f"\nTotal Jobs: {len(jobs)}")
-    print(f"  - Emergency: {len(emergencies)} (SLA: {SLA_WINDOWS['emergency']}h)")
-    print(f"  - Urgent:    {len(urgents)} (SLA: {SLA_WINDOWS['urgent']}h)")
-    print(f"  - Routine:   {len(routines)} (SLA: {SLA_WINDOWS['routine']}h)")
-    
-    print(f"\nAssignment Rate:")
-    print(f"  - Emergency: {len(assigned_emergencies)}/{len(emergencies)} assigned")
-    print(f"  - Urgent:    {len(assigned_urgents)}/{len(urgents)} assigned")
-    print(f"  - Routine:   {len(assigned_routines)}/{len(routines)} assigned")
-    
-    print(f"\nSLA Performance:")
-    print(f"  - Total SLA Violations: {len(sla_violations)} job(s)")
-    print(f"  - Emergency SLA Violations: {len(emergency_violations)}")
-    
-    if sla_violations:
-        print(f"\nSLA Violation Details:")
-        for job in sla_violations:
+            lines.append(f"Job {job['id']:>3} ({job['priority'].upper():>9}): UNASSIGNED")
+
+    # Metrics
+    lines.append("\n" + "=" * 80)
+    lines.append("SLA AND PRIORITY METRICS")
+    lines.append("=" * 80)
+    by_priority = metrics["by_priority"]
+    names = {priority: f"{priority.capitalize() + ':':<10}" for priority in by_priority}
+
+    lines.append(f"\nTotal Jobs: {metrics['jobs']}")
+    for priority, entry in by_priority.items():
+        lines.append(f"  - {names[priority]} {entry['jobs']} (SLA: {entry['sla_hours']}h)")
+
+    lines.append(f"\nAssignment Rate:")
+    for priority, entry in by_priority.items():
+        lines.append(f"  - {names[priority]} {entry['assigned']}/{entry['jobs']} assigned")
+
+    lines.append(f"\nSLA Performance:")
+    lines.append(f"  - Total SLA Violations: {metrics['sla_violations']} job(s)")
+    for priority, entry in by_priority.items():
+        lines.append(f"  - {priority.capitalize()} SLA Violations: {entry['sla_violations']}")
+
+    if violations:
+        lines.append(f"\nSLA Violation Details:")
+        for _, job in sorted(violations, key=lambda entry: entry[0]):
             response_time = job["start_hour"] - job["submitted_hour"]
-            sla_window = get_sla_window(job)
+            sla_window = get_sla_window(job, sla_windows)
             overage = response_time - sla_window
-            print(f"  - Job {job['id']} ({job['priority']}): "
-                  f"Response {response_time}h exceeded SLA by {overage}h (SLA: {sla_window}h)")
-    
-    if assigned_emergencies:
-        emergency_response_times = [j["start_hour"] - j["submitted_hour"] for j in assigned_emergencies]
-        avg_emergency_response = sum(emergency_response_times) / len(emergency_response_times)
-        print(f"\nEmergency Response Times:")
-        print(f"  - Average: {avg_emergency_response:.1f} hours")
-        print(f"  - Min: {min(emergency_response_times)} hour(s)")
-        print(f"  - Max: {max(emergency_response_times)} hour(s)")
-
-    if assigned_urgents:
-        urgent_response_times = [j["start_hour"] - j["submitted_hour"] for j in assigned_urgents]
-        avg_urgent_response = sum(urgent_response_times) / len(urgent_response_times)
-        print(f"\nUrgent Response Times:")
-        print(f"  - Average: {avg_urgent_response:.1f} hours")
-        print(f"  - Min: {min(urgent_response_times)} hour(s)")
-        print(f"  - Max: {max(urgent_response_times)} hour(s)")
-        print("\n" + "=" * 80)
-        print("TECH AVAILABILITY SUMMARY")
-        print("=" * 80)
-    
-    for tech in technicians:
-        assigned_jobs = [j for j in jobs if j["assigned_to"] == tech["id"]]
-        total_hours = sum(j["estimated_hours"] for j in assigned_jobs)
-        job_list = [f"{j['id']}({j['priority'][0].upper()})" for j in assigned_jobs]
-        print(f"Tech {tech['id']}: Free at hour {tech['free_at_hour']} | "
-              f"Jobs: {job_list if job_list else 'None'} | "
-              f"Total hours: {total_hours}h")
-
-# Step 12: Run the simulation
+            lines.append(f"  - Job {job['id']} ({job['priority']}): "
+                         f"Response {response_time}h exceeded SLA by {overage}h (SLA: {sla_window}h)")
+
+    for priority, entry in by_priority.items():
+        stats = entry["response_hours"]
+        if stats["count"]:
+            lines.append(f"\n{priority.capitalize()} Response Times:")
+            lines.append(f"  - Average: {stats['mean']:.1f} hours")
+            lines.append(f"  - Min: {stats['min']} hour(s)")
+            lines.append(f"  - Max: {stats['max']} hour(s)")
+            lines.append(f"  - p50/p95/p99: {stats['p50']:.1f}/{stats['p95']:.1f}/{stats['p99']:.1f} hours")
+
+    lines.append("\n" + "=" * 80)
+    lines.append("TECH AVAILABILITY SUMMARY")
+    lines.append("=" * 80)
+    for tech in metrics["technicians"]:
+        job_list = [labels[job_id] for job_id in tech["jobs"]]
+        lines.append(f"Tech {tech['id']}: Free at hour {tech['free_at_hour']} | "
+                     f"Jobs: {job_list if job_list else 'None'} | "
+                     f"Total hours: {tech['busy_hours']}h")
+
+    return lines
+
+def print_final_results():
+    """Print final assignment timeline, SLA tracking, and tech summary"""
+    print("\n".join(format_final_results(technicians, jobs)))
+
+# Step 15: Run the simulation
 if __name__ == "__main__":
     run_simulation()
@@ -0,0 +1,61 @@
+"""
+The worker process pool shared by sharded scheduling and what-if scenarios.
+
+One pool serves every request. It is started on first use and kept for the
+life of the process, so requests neither pay for starting workers nor fork
+a multi-threaded server (forking copies locks other threads may be holding).
+Workers come from the forkserver start method where there is one, and from
+spawn elsewhere. Tasks carry their own data; nothing is kept in worker
+globals, so concurrent requests cannot see each other's inputs.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """The shared pool, with one worker per CPU"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            _pool = ProcessPoolExecutor(os.cpu_count() or 1, mp_context=context)
+        return _pool
+
+def process_map(fn, items):
+    """list(map(fn, items)) in the shared pool; fn and the items must pickle"""
+    global _pool
+    pool = get_pool()
+    try:
+        return list(pool.map(fn, items))
+    except BrokenProcessPool:
+        # A worker died; start a fresh pool for the next caller
+        with _pool_lock:
+            if _pool is pool:
+                _pool = None
+        raise
+
+def chunks(items, count):
+    """Split items into at most count lists of similar length, keeping their order"""
+    count = max(1, min(count, len(items)))
+    size, extra = divmod(len(items), count)
+    result, start = [], 0
+    for k in range(count):
+        end = start + size + (k < extra)
+        result.append(items[start:end])
+        start = end
+    return result
+
+def shutdown():
+    """Stop the shared pool's workers; the next call starts a new pool"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
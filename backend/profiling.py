@@ -0,0 +1,99 @@
+"""
+Per-request profiling for the API.
+
+With ?profile=1, /api/schedule returns a "profile" object: the time spent
+in each phase of the request (body parsing, dict conversion, validation,
+record building, the simulation, result conversion, report rendering) and
+the scheduler's counters (dispatch rounds, events, techs scanned, ...).
+
+A profiler can also be attached to those requests without code changes:
+set TTC_PROFILE_HOOK to "module:function", where function(name) returns a
+context manager wrapped around the request. Whatever dict it yields ends
+up in the response as profile["hook"]. cprofile_hook below is the built-in
+one (TTC_PROFILE_HOOK=profiling:cprofile_hook); it writes one .prof file
+per request to TTC_PROFILE_DIR (default: the temp directory).
+"""
+
+import contextvars
+import cProfile
+import importlib
+import os
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+
+PROFILE_HOOK_ENV = "TTC_PROFILE_HOOK"
+PROFILE_DIR_ENV = "TTC_PROFILE_DIR"
+
+# Step 1: Phase timers
+class PhaseTimer:
+    """Wall time per named phase, in the order the phases first ran"""
+
+    def __init__(self):
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def to_dict(self):
+        """Phase times in milliseconds"""
+        return {name: round(seconds * 1000, 3) for name, seconds in self.phases.items()}
+
+# Step 2: Request arrival times, so the time FastAPI spends parsing a body can be measured
+request_started = contextvars.ContextVar("request_started", default=None)
+
+class RequestClock:
+    """ASGI middleware that notes when each HTTP request arrived"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            request_started.set(time.perf_counter())
+        await self.app(scope, receive, send)
+
+def time_since_request(timer, name="parse"):
+    """Record the time from the request's arrival until now (None outside a request) as a phase"""
+    started = request_started.get()
+    if started is not None:
+        timer.add(name, time.perf_counter() - started)
+
+# Step 3: Profiler hooks
+_hooks = {}
+
+def load_hook(spec):
+    """The hook named by a "module:function" spec"""
+    if spec not in _hooks:
+        module, _, attr = spec.partition(":")
+        _hooks[spec] = getattr(importlib.import_module(module), attr)
+    return _hooks[spec]
+
+def request_hook(name):
+    """The TTC_PROFILE_HOOK context manager for one request, or one that does nothing"""
+    spec = os.environ.get(PROFILE_HOOK_ENV)
+    if not spec:
+        return nullcontext({})
+    return load_hook(spec)(name)
+
+@contextmanager
+def cprofile_hook(name):
+    """Run the request under cProfile and dump the stats to a .prof file"""
+    directory = os.environ.get(PROFILE_DIR_ENV) or tempfile.gettempdir()
+    info = {"file": os.path.join(directory, f"{name}-{uuid.uuid4().hex[:8]}.prof")}
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield info
+    finally:
+        profiler.disable()
+        profiler.dump_stats(info["file"])
@@ -0,0 +1,151 @@
+"""
+Monte Carlo SLA risk for a dispatch plan.
+
+schedule() treats estimated_hours as exact, so its sla_met flags are
+all-or-nothing. This module keeps the plan fixed (which tech does which
+jobs, in which order), samples real durations many times, and replays the
+plan in each replication: a tech sets off for their next job as soon as
+they are done with the previous one, the job has been submitted, and (if
+they have a shift) they are on shift, and starts it after the planned
+travel time. The fraction of replications in which a
+job starts after its SLA window is its breach probability.
+
+Replications are processed in batches as (replications x techs) arrays,
+one step per position in the techs' job sequences, so the Python loop
+runs over sequence positions rather than over replications.
+"""
+
+from dataclasses import dataclass, field
+
+import numpy as np
+
+import matcher
+
+# Durations are lognormal around estimated_hours (the mean is preserved);
+# sigma is the spread of log(duration). Jobs use their widest skill.
+DEFAULT_DURATION_SIGMA = 0.3
+DURATION_SIGMA = {}  # skill -> sigma, e.g. {"hvac": 0.5}
+
+@dataclass
+class SlaRisk:
+    """Outcome of estimate_sla_risk(): the plan plus per-job breach probabilities"""
+    result: matcher.ScheduleResult
+    replications: int
+    breach_probability: dict = field(default_factory=dict)  # job id -> P(SLA breach); None if unassigned
+    expected_breaches: float = 0.0
+
+# Step 1: Vectorized shift arithmetic
+class ShiftTable:
+    """Every tech's shift as arrays; techs without one work around the clock"""
+
+    def __init__(self, technicians):
+        shifts = [matcher.Shift.from_dict(tech["shift"]) if tech.get("shift") else None for tech in technicians]
+        self.start = np.array([s.start if s else 0 for s in shifts], dtype=float)
+        self.end = np.array([s.end if s else matcher.HOURS_PER_DAY for s in shifts], dtype=float)
+        self.off = np.array([[s is not None and day in s.days_off for day in range(matcher.DAYS_PER_WEEK)]
+                             for s in shifts], dtype=bool).reshape(len(shifts), matcher.DAYS_PER_WEEK)
+        self.shifted = np.array([s is not None for s in shifts], dtype=bool)
+
+    def next_start(self, hours, techs):
+        """Shift.next_start for a (replications, len(techs)) array of hours"""
+        day = np.floor(hours / matcher.HOURS_PER_DAY).astype(int)
+        start, end, off = self.start[techs], self.end[techs], self.off[techs]
+        best = np.full(hours.shape, np.inf)
+        for offset in range(-1, matcher.DAYS_PER_WEEK + 1):
+            d = day + offset
+            working = ~off[np.arange(len(techs)), d % matcher.DAYS_PER_WEEK]
+            begin = d * matcher.HOURS_PER_DAY + start
+            inside = working & (begin <= hours) & (hours < d * matcher.HOURS_PER_DAY + end)
+            ahead = working & (begin >= hours)
+            best = np.where(inside, np.minimum(best, hours), best)
+            best = np.where(ahead, np.minimum(best, begin), best)
+        return best
+
+# Step 2: The plan as per-tech job sequences
+def plan_sequences(technicians, jobs):
+    """
+    Return (positions, tech_of) where positions[p] is the array of job indices
+    that are p-th in their tech's sequence and tech_of[p] the matching tech indices
+    """
+    tech_index = {tech["id"]: i for i, tech in enumerate(technicians)}
+    sequences = {}
+    for index in sorted((i for i, job in enumerate(jobs) if job["assigned"]), key=lambda i: jobs[i]["start_hour"]):
+        sequences.setdefault(tech_index[jobs[index]["assigned_to"]], []).append(index)
+
+    depth = max((len(seq) for seq in sequences.values()), default=0)
+    positions, tech_of = [], []
+    for p in range(depth):
+        techs = [t for t, seq in sequences.items() if len(seq) > p]
+        tech_of.append(np.array(techs))
+        positions.append(np.array([sequences[t][p] for t in techs]))
+    return positions, tech_of
+
+def job_sigmas(jobs, duration_sigma):
+    return np.array([max(duration_sigma.get(skill, DEFAULT_DURATION_SIGMA) for skill in job["required_skills"])
+                     for job in jobs])
+
+# Step 3: Replications
+def estimate_sla_risk(technicians, jobs, config=None, replications=10000, duration_sigma=None,
+                      seed=None, batch_size=500):
+    """
+    Schedule the jobs, then estimate each job's SLA breach probability over
+    replications sampled duration sets. duration_sigma maps skills to the
+    lognormal spread (falls back to DURATION_SIGMA, then DEFAULT_DURATION_SIGMA).
+    """
+    if replications < 1:
+        raise ValueError(f"replications must be at least 1, got {replications}")
+    if config is None:
+        config = matcher.ScheduleConfig()
+    result = matcher.schedule(technicians, jobs, config)
+    if not result.success:
+        return SlaRisk(result, 0)
+    sigma_table = {**DURATION_SIGMA, **(duration_sigma or {})}
+
+    plan = result.jobs
+    positions, tech_of = plan_sequences(result.technicians, plan)
+    submitted = np.array([job["submitted_hour"] for job in plan], dtype=float)
+    estimated = np.array([job["estimated_hours"] for job in plan], dtype=float)
+    travel = np.array([job.get("travel_hours", 0) for job in plan], dtype=float)
+    windows = np.array([matcher.get_sla_window(job, config.sla_windows) for job in plan], dtype=float)
+    sigmas = job_sigmas(plan, sigma_table)
+    free_at = np.array([tech.get("free_at_hour", 0) for tech in technicians], dtype=float)
+    shifts = ShiftTable(technicians)
+    # Per sequence position, the columns whose tech has a shift to respect
+    shifted_columns = [np.flatnonzero(shifts.shifted[tech_ids]) for tech_ids in tech_of]
+
+    # duration = estimate * exp(sigma * Z - sigma^2 / 2) has the estimate as its mean
+    rng = np.random.default_rng(seed)
+    breaches = np.zeros(len(plan))
+
+    for start in range(0, replications, batch_size):
+        batch = min(batch_size, replications - start)
+        durations = estimated * np.exp(sigmas * rng.standard_normal((batch, len(plan))) - sigmas ** 2 / 2)
+        tech_free = np.broadcast_to(free_at, (batch, len(technicians))).copy()
+
+        for job_ids, tech_ids, columns in zip(positions, tech_of, shifted_columns):
+            starts = np.maximum(tech_free[:, tech_ids], submitted[job_ids])
+            if columns.size:
+                starts[:, columns] = shifts.next_start(starts[:, columns], tech_ids[columns])
+            starts += travel[job_ids]
+            tech_free[:, tech_ids] = starts + durations[:, job_ids]
+            breaches[job_ids] += (starts - submitted[job_ids] > windows[job_ids]).sum(axis=0)
+
+    probability = breaches / replications
+    breach_probability = {job["id"]: (float(probability[i]) if job["assigned"] else None)
+                          for i, job in enumerate(plan)}
+    expected = float(sum(p for p in breach_probability.values() if p is not None))
+    return SlaRisk(result, replications, breach_probability, expected)
+
+def format_risk(risk, threshold=0.05):
+    """Return lines listing the jobs whose breach probability is at least threshold, riskiest first"""
+    lines = [f"SLA RISK ({risk.replications} replications, expected breaches: {risk.expected_breaches:.1f})"]
+    jobs = {job["id"]: job for job in risk.result.jobs}
+    ranked = sorted(((p, job_id) for job_id, p in risk.breach_probability.items() if p is not None and p >= threshold),
+                    reverse=True)
+    for p, job_id in ranked:
+        job = jobs[job_id]
+        lines.append(f"  Job {job_id:>5} ({job['priority'].upper():>9}) Tech {job['assigned_to']} "
+                     f"planned hour {job['start_hour']}: {p:6.1%} breach risk")
+    if not ranked:
+        lines.append(f"  No job above {threshold:.0%} breach risk")
+    return lines
@@ -0,0 +1,127 @@
+"""
+What-if scenarios: run the same base schedule under several overrides
+("hire 2 more HVAC techs", "extend the emergency SLA to 3h") in parallel
+and compare SLA violations and utilization side by side.
+
+Scenarios run in the shared worker pool (parallel.py), split into one
+task per worker. The base techs and jobs are pickled once per task, and
+only the summaries come back.
+"""
+
+import os
+from dataclasses import dataclass, field, replace
+
+import matcher
+import parallel
+
+# Step 1: Scenario overrides
+@dataclass
+class Scenario:
+    """Changes applied on top of the base schedule; anything left empty keeps the base value"""
+    name: str
+    sla_windows: dict = field(default_factory=dict)     # merged over the base SLA windows
+    add_technicians: list = field(default_factory=list)
+    remove_technicians: list = field(default_factory=list)  # tech ids
+    add_jobs: list = field(default_factory=list)
+    remove_jobs: list = field(default_factory=list)         # job ids
+    mode: str = None
+    order: str = None
+
+    @classmethod
+    def from_dict(cls, scenario):
+        return cls(**scenario)
+
+    def apply(self, technicians, jobs, config):
+        """Return (technicians, jobs, config) for this scenario without touching the base"""
+        removed_techs = set(self.remove_technicians)
+        removed_jobs = set(self.remove_jobs)
+        technicians = [t for t in technicians if t["id"] not in removed_techs] + list(self.add_technicians)
+        jobs = [j for j in jobs if j["id"] not in removed_jobs] + list(self.add_jobs)
+        config = replace(config, sla_windows={**config.sla_windows, **self.sla_windows},
+                         mode=self.mode or config.mode, order=self.order or config.order)
+        return technicians, jobs, config
+
+BASELINE = Scenario("baseline")
+
+# Step 2: Per-scenario metrics
+def summarize(name, result):
+    """SLA and utilization figures for one ScheduleResult"""
+    if not result.success:
+        return {"name": name, "success": False, "errors": [issue.message for issue in result.errors]}
+
+    assigned = [j for j in result.jobs if j["assigned"]]
+    violations = [j for j in assigned if not j["sla_met"]]
+    busy_hours = sum(min(j["estimated_hours"], matcher.job_end_hour(j) - j["start_hour"]) for j in assigned)
+    makespan = max((matcher.job_end_hour(j) for j in assigned), default=0)
+    capacity = len(result.technicians) * makespan
+
+    violations_by_priority = {}
+    for job in violations:
+        violations_by_priority[job["priority"]] = violations_by_priority.get(job["priority"], 0) + 1
+
+    return {
+        "name": name,
+        "success": True,
+        "technicians": len(result.technicians),
+        "jobs": len(result.jobs),
+        "assigned": len(assigned),
+        "unassigned": len(result.jobs) - len(assigned),
+        "sla_violations": len(violations),
+        "violations_by_priority": violations_by_priority,
+        "avg_response_hours": (sum(j["start_hour"] - j["submitted_hour"] for j in assigned) / len(assigned)
+                               if assigned else 0),
+        "makespan_hours": makespan,
+        "utilization": busy_hours / capacity if capacity else 0,
+    }
+
+# Step 3: Running scenarios
+def _run_scenario(scenario, technicians, jobs, config):
+    return summarize(scenario.name, matcher.schedule(*scenario.apply(technicians, jobs, config)))
+
+def _run_scenarios(task):
+    """Summaries for a (technicians, jobs, config, scenarios) task, run in a pool worker"""
+    technicians, jobs, config, scenarios = task
+    return [_run_scenario(scenario, technicians, jobs, config) for scenario in scenarios]
+
+def run_scenarios(technicians, jobs, scenarios, config=None, workers=None):
+    """
+    Run the baseline plus every scenario and return their summaries in order.
+    workers=1 runs everything in this process; otherwise they are split into
+    up to workers tasks (default: one per CPU) for the shared worker pool.
+    """
+    if config is None:
+        config = matcher.ScheduleConfig()
+    scenarios = [BASELINE] + [s if isinstance(s, Scenario) else Scenario.from_dict(s) for s in scenarios]
+    for scenario in scenarios:
+        if scenario.mode is not None and scenario.mode not in matcher.DISPATCH_MODES:
+            raise ValueError(f"Scenario '{scenario.name}' has unknown dispatch mode '{scenario.mode}'")
+        if scenario.order is not None and scenario.order not in matcher.DISPATCH_ORDERS:
+            raise ValueError(f"Scenario '{scenario.name}' has unknown dispatch order '{scenario.order}'")
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(scenarios))
+
+    if workers <= 1:
+        return [_run_scenario(scenario, technicians, jobs, config) for scenario in scenarios]
+
+    tasks = [(technicians, jobs, config, chunk) for chunk in parallel.chunks(scenarios, workers)]
+    return [summary for summaries in parallel.process_map(_run_scenarios, tasks) for summary in summaries]
+
+# Step 4: Comparison table
+def format_comparison(summaries):
+    """Return the scenario comparison as lines of text, with changes against the first (baseline) row"""
+    lines = [
+        f"{'Scenario':<28} {'Assigned':>9} {'Unassigned':>11} {'SLA viol.':>10} {'vs base':>8} "
+        f"{'Avg resp.':>10} {'Makespan':>9} {'Util.':>7}",
+        "-" * 98,
+    ]
+    base = summaries[0] if summaries and summaries[0]["success"] else None
+    for summary in summaries:
+        if not summary["success"]:
+            lines.append(f"{summary['name']:<28} ✗ invalid: {summary['errors'][0]}")
+            continue
+        delta = f"{summary['sla_violations'] - base['sla_violations']:+d}" if base else "-"
+        lines.append(f"{summary['name']:<28} {summary['assigned']:>9} {summary['unassigned']:>11} "
+                     f"{summary['sla_violations']:>10} {delta:>8} {summary['avg_response_hours']:>9.1f}h "
+                     f"{summary['makespan_hours']:>8}h {summary['utilization']:>7.0%}")
+    return lines
@@ -0,0 +1,238 @@
+"""
+Sharded scheduling for large batches: split the techs and jobs into
+independent shards, schedule each shard in a worker process, and merge
+the results into one ScheduleResult (the shape schedule() returns).
+
+Techs and jobs may carry a region. Once any tech has a region, techs only
+serve jobs in their own region, and techs without one float between
+regions. Regional shards are the connected pieces of the (region, skill)
+graph: techs sharing a skill in the same region end up in the same shard,
+and each job goes to the shard of the techs who can do it. Shards share no
+techs, so scheduling them apart gives the same assignments as scheduling
+them together. Without regions this is a split by skill cluster and the
+result matches schedule() exactly.
+
+Floating techs are handled in a cross-shard pass once the regional shards
+are done. It takes the jobs with no region, the jobs their region cannot
+serve, and every regional job that missed its SLA. A job that missed its
+SLA moves to a floating tech if that tech can start it earlier. Shards that
+lost jobs are then scheduled again without them.
+"""
+
+import heapq
+import os
+
+import matcher
+import parallel
+
+TERMINAL_EVENTS = ("all_assigned", "unassignable", "max_hours")
+
+# Step 1: Partitioning
+def _find(parent, key):
+    while parent[key] != key:
+        parent[key] = parent[parent[key]]
+        key = parent[key]
+    return key
+
+def partition(technicians, jobs):
+    """
+    Split the input by region and skill cluster. Returns (components, floating, cross_jobs):
+    components is a list of (tech indices, job indices), floating the indices of
+    techs without a region, and cross_jobs the jobs no regional tech can do.
+    """
+    regional = any(tech.get("region") is not None for tech in technicians)
+    region_of = (lambda record: record.get("region")) if regional else (lambda record: None)
+
+    parent = {}
+    skill_sets = {}  # region -> distinct skill sets of its techs
+    floating, tech_keys = [], []
+    for i, tech in enumerate(technicians):
+        region = region_of(tech)
+        if regional and region is None:
+            floating.append(i)
+            continue
+        keys = [(region, skill) for skill in tech["skills"]]
+        for key in keys:
+            parent.setdefault(key, key)
+        root = _find(parent, keys[0])
+        for key in keys[1:]:
+            parent[_find(parent, key)] = root
+        skill_sets.setdefault(region, set()).add(frozenset(tech["skills"]))
+        tech_keys.append((i, keys[0]))
+
+    covered = {}  # (region, skills) -> whether one of the region's techs has them all
+    cross_jobs, job_keys = [], []
+    for j, job in enumerate(jobs):
+        region = region_of(job)
+        needed = (region, frozenset(job["required_skills"]))
+        if needed not in covered:
+            covered[needed] = any(needed[1] <= skills for skills in skill_sets.get(region, ()))
+        if covered[needed]:
+            job_keys.append((j, (region, job["required_skills"][0])))
+        else:
+            cross_jobs.append(j)
+
+    components = {}
+    for i, key in tech_keys:
+        components.setdefault(_find(parent, key), ([], []))[0].append(i)
+    for j, key in job_keys:
+        components[_find(parent, key)][1].append(j)
+    return list(components.values()), floating, cross_jobs
+
+def pack(components, shards):
+    """Group components into at most shards lists with similar job counts (largest first)"""
+    bins = [(0, k, []) for k in range(min(shards, len(components)))]
+    for component in sorted(components, key=lambda c: len(c[1]), reverse=True):
+        load, k, members = heapq.heappop(bins)
+        members.append(component)
+        heapq.heappush(bins, (load + len(component[1]), k, members))
+    return [members for _, _, members in sorted(bins, key=lambda b: b[1])]
+
+# Step 2: Running shards. Each task carries only its own components' techs and jobs.
+def _run_component(component_techs, component_jobs, config):
+    """Schedule one component's techs and jobs; returns (techs, jobs, events)"""
+    if not component_jobs:
+        return [matcher.TechRecord.from_dict(t, {}).to_dict() for t in component_techs], [], []
+    result = matcher.schedule(component_techs, component_jobs, config)
+    if not result.success:
+        raise ValueError(result.errors[0].message)
+    return result.technicians, result.jobs, result.events.events
+
+def _run_shard(task):
+    """
+    Schedule a shard's components one by one. Components from different
+    regions may share skills, so they are never scheduled as one.
+    """
+    config, components = task
+    return [_run_component(component_techs, component_jobs, config)
+            for component_techs, component_jobs in components]
+
+def _shard_task(technicians, jobs, config, shard):
+    """The (config, [(techs, jobs), ...]) task for a shard of (tech indices, job indices) components"""
+    return config, [([technicians[i] for i in component[0]], [jobs[j] for j in component[1]])
+                    for component in shard]
+
+# Step 3: Merging shard results
+def merge_events(logs, unassigned=()):
+    """
+    One event log from several shards' logs: tech_free and submitted counts
+    are summed per hour, other events keep their shard order within the hour,
+    and the shards' end-of-run events become one.
+    """
+    by_hour, terminal = {}, []
+    for events in logs:
+        for event in events:
+            if event.type in TERMINAL_EVENTS:
+                terminal.append(event)
+            else:
+                by_hour.setdefault(event.hour, []).append(event)
+
+    log = matcher.EventLog()
+    for hour in sorted(by_hour):
+        counts = {"tech_free": 0, "submitted": 0}
+        for event in by_hour[hour]:
+            if event.type in counts:
+                counts[event.type] += event.value
+        for kind, count in counts.items():
+            if count:
+                log.append(matcher.ClockEvent(kind, hour, count))
+        for event in by_hour[hour]:
+            if event.type not in counts:
+                log.append(event)
+
+    last = max((event.hour for event in terminal), default=0)
+    capped = [event for event in terminal if event.type == "max_hours"]
+    unassigned = tuple(job_id for event in terminal for job_id in event.job_ids) + tuple(unassigned)
+    if capped:
+        log.append(max(capped, key=lambda event: event.hour))
+    elif unassigned:
+        log.append(matcher.ClockEvent("unassignable", last, job_ids=unassigned))
+    else:
+        log.append(matcher.ClockEvent("all_assigned", last))
+    return log
+
+# Step 4: Sharded schedule
+def schedule_sharded(technicians, jobs, config=None, workers=None):
+    """
+    schedule() for large batches: the same result shape, computed in up to
+    workers shards (default: one per CPU) that run in the shared worker pool
+    (parallel.py). workers=1 runs every shard in this process.
+    """
+    if config is None:
+        config = matcher.ScheduleConfig()
+    errors = matcher.default_validator.validate(technicians, jobs, fail_fast=config.fail_fast)
+    if errors:
+        return matcher.ScheduleResult(False, [dict(t) for t in technicians], [dict(j) for j in jobs],
+                                      errors=errors, config=config)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, workers)
+
+    components, floating, cross_jobs = partition(technicians, jobs)
+    shards = pack(components, workers)
+
+    run_map = map if workers <= 1 else parallel.process_map
+
+    def run(shards):
+        tasks = [_shard_task(technicians, jobs, config, shard) for shard in shards]
+        return [outcome for shard_outcomes in run_map(_run_shard, tasks) for outcome in shard_outcomes]
+
+    return _schedule_shards(technicians, jobs, config, shards, floating, cross_jobs, run)
+
+def _schedule_shards(technicians, jobs, config, shards, floating, cross_jobs, run):
+    """The regional pass, the cross-shard pass and the reruns; run(shards) returns the components' outcomes"""
+    components = [component for shard in shards for component in shard]
+    outcomes = run(shards)
+
+    # Floating techs only see the jobs they can do; the rest stay unassigned
+    floating_skills = {frozenset(technicians[i]["skills"]) for i in floating}
+    can_float = lambda j: any(set(jobs[j]["required_skills"]) <= skills for skills in floating_skills)
+    stranded = [j for j in cross_jobs if not can_float(j)]
+    cross_jobs = [j for j in cross_jobs if can_float(j)]
+
+    if floating:
+        # Regional jobs that missed their SLA, with their component and planned start
+        missed = {}
+        for k, (component, outcome) in enumerate(zip(components, outcomes)):
+            for j, job in zip(component[1], outcome[1]):
+                if job["assigned"] and not job["sla_met"] and can_float(j):
+                    missed[j] = (k, job["start_hour"])
+
+        cross = (floating, sorted(cross_jobs + list(missed)))
+        cross_outcome = _run_component([technicians[i] for i in cross[0]], [jobs[j] for j in cross[1]], config)
+        moved = {j for j, job in zip(cross[1], cross_outcome[1])
+                 if j in missed and job["assigned"] and job["start_hour"] < missed[j][1]}
+
+        # Schedule the components that lost jobs again, and the cross pass with only the jobs it keeps
+        rerun = sorted({missed[j][0] for j in moved})
+        again = [(components[k][0], [j for j in components[k][1] if j not in moved]) for k in rerun]
+        kept = (floating, sorted(cross_jobs + list(moved)))
+        if kept != cross:
+            rerun.append(None)
+            again.append(kept)
+        repacked = pack(again, len(shards))
+        redone = run(repacked)
+        # pack() reorders; match the outcomes back to their components
+        order = [component for shard in repacked for component in shard]
+        for component, outcome in zip(order, redone):
+            k = rerun[again.index(component)]
+            if k is None:
+                cross_outcome = outcome
+            else:
+                components[k], outcomes[k] = component, outcome
+        components.append(kept)
+        outcomes.append(cross_outcome)
+    else:
+        stranded += cross_jobs
+
+    merged_techs, merged_jobs = [None] * len(technicians), [None] * len(jobs)
+    for component, (component_techs, component_jobs, _) in zip(components, outcomes):
+        for i, tech in zip(component[0], component_techs):
+            merged_techs[i] = tech
+        for j, job in zip(component[1], component_jobs):
+            merged_jobs[j] = job
+    for j in stranded:
+        merged_jobs[j] = matcher.JobRecord.from_dict(jobs[j], {}).to_dict()
+
+    events = merge_events([outcome[2] for outcome in outcomes], [jobs[j]["id"] for j in stranded])
+    return matcher.ScheduleResult(True, merged_techs, merged_jobs, events, [], config)
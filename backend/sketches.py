@@ -0,0 +1,123 @@
+"""
+Streaming response-time statistics for long-running schedules.
+
+ResponseSketches is updated by the scheduler on every assignment and can
+be read at any time without going back over the job list. Each priority
+and each skill gets a LogHistogram of response hours plus an SLA breach
+count. A LogHistogram keeps one counter per logarithmic bucket (the
+DDSketch / HDR-histogram idea), so its size depends on the spread of the
+values, never on how many there were, and every quantile it reports is
+within relative_accuracy of an actual value at that rank.
+"""
+
+import math
+
+RELATIVE_ACCURACY = 0.01
+MIN_VALUE = 0.01      # hours; responses at or below this count as immediate
+MAX_BUCKETS = 2048
+QUANTILES = (0.5, 0.95, 0.99)
+
+class LogHistogram:
+    """Constant-memory histogram with relative-accuracy quantiles"""
+
+    def __init__(self, relative_accuracy=RELATIVE_ACCURACY, min_value=MIN_VALUE, max_buckets=MAX_BUCKETS):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.min_value = min_value
+        self.max_buckets = max_buckets
+        self.buckets = {}   # bucket key -> count; bucket k holds values in (gamma^(k-1), gamma^k]
+        self.zero = 0       # values at or below min_value
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        if value <= self.min_value:
+            self.zero += 1
+            return
+        key = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def _collapse(self):
+        # Fold the lowest buckets into one; only the smallest values lose accuracy
+        keys = sorted(self.buckets)
+        keep = keys[-self.max_buckets]
+        for key in keys[:-self.max_buckets]:
+            self.buckets[keep] += self.buckets.pop(key)
+
+    def quantile(self, q):
+        """The value at quantile q (0..1), or None if nothing was added"""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero
+        if rank < seen:
+            return self.min
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                estimate = 2 * self.gamma ** key / (self.gamma + 1)
+                return min(max(estimate, self.min), self.max)
+        return self.max
+
+    def to_dict(self):
+        stats = {"count": self.count, "mean": self.total / self.count if self.count else None,
+                 "min": self.min, "max": self.max}
+        for q in QUANTILES:
+            stats[f"p{round(q * 100)}"] = self.quantile(q)
+        return stats
+
+class ResponseSketch:
+    """Response hours and SLA breaches for one group of jobs"""
+
+    def __init__(self):
+        self.hours = LogHistogram()
+        self.breaches = 0
+
+    def add(self, response_hours, sla_met):
+        self.hours.add(response_hours)
+        if not sla_met:
+            self.breaches += 1
+
+    def to_dict(self):
+        stats = self.hours.to_dict()
+        stats["sla_breaches"] = self.breaches
+        stats["breach_rate"] = self.breaches / self.hours.count if self.hours.count else None
+        return stats
+
+class ResponseSketches:
+    """
+    Per-priority and per-skill sketches, fed by EventScheduler(sketches=...)
+    with every job's first start. A job that needs several skills counts
+    once under each of them.
+    """
+
+    def __init__(self):
+        self.by_priority = {}
+        self.by_skill = {}
+
+    def record(self, priority, skills, response_hours, sla_met):
+        sketch = self.by_priority.get(priority)
+        if sketch is None:
+            sketch = self.by_priority[priority] = ResponseSketch()
+        sketch.add(response_hours, sla_met)
+        for skill in skills:
+            sketch = self.by_skill.get(skill)
+            if sketch is None:
+                sketch = self.by_skill[skill] = ResponseSketch()
+            sketch.add(response_hours, sla_met)
+
+    def to_dict(self):
+        return {
+            "by_priority": {priority: sketch.to_dict() for priority, sketch in self.by_priority.items()},
+            "by_skill": {skill: sketch.to_dict() for skill, sketch in sorted(self.by_skill.items())},
+        }
@@ -0,0 +1,144 @@
+"""
+Persistent store for schedule sessions, so they survive a restart.
+
+Each session gets a directory with two files:
+
+    snapshot.pickle   the pickled EventScheduler and the last edit it includes
+    wal.ndjson        one JSON line per edit made since, each with a sequence number
+
+Every edit is appended to the log (and fsynced) before the API answers it.
+After snapshot_every edits the scheduler is pickled again and the log starts
+over. Loading a session reads its snapshot and replays the log tail through
+the same code the API uses, so the rebuilt scheduler matches the one that
+was running. Snapshots are pickles: only point the store at a directory the
+server owns.
+"""
+
+import gc
+import json
+import os
+import pickle
+import shutil
+
+import matcher
+
+SNAPSHOT_EVERY = 1000
+SNAPSHOT_FILE = "snapshot.pickle"
+LOG_FILE = "wal.ndjson"
+
+# Step 1: Edits as JSON records, applied the same way live and on replay
+EDITS = {
+    "advance": lambda scheduler, edit: scheduler.run_until(edit["hour"]),
+    "add_job": lambda scheduler, edit: scheduler.add_job(matcher.JobRecord.from_dict(edit["job"], scheduler.skill_bits)),
+    "add_jobs": lambda scheduler, edit: scheduler.add_jobs(
+        [matcher.JobRecord.from_dict(job, scheduler.skill_bits) for job in edit["jobs"]]),
+    "cancel_job": lambda scheduler, edit: scheduler.cancel_job(edit["job_id"]),
+    "complete_job": lambda scheduler, edit: scheduler.complete_job(edit["job_id"]),
+    "set_availability": lambda scheduler, edit: scheduler.set_availability(edit["tech_id"], edit["available"]),
+}
+
+def apply(scheduler, edit):
+    """Apply one edit record, e.g. {"op": "advance", "hour": 12}, and return its events"""
+    return EDITS[edit["op"]](scheduler, edit)
+
+# Step 2: Snapshots and logs on disk
+class ScheduleStore:
+    """Snapshots plus write-ahead logs for sessions, one subdirectory per session id"""
+
+    def __init__(self, directory, snapshot_every=SNAPSHOT_EVERY, sync=True):
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.sync = sync
+        self._logs = {}  # session id -> [open log file, last sequence number, edits since snapshot]
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, session_id, name):
+        return os.path.join(self.directory, session_id, name)
+
+    def _write(self, f):
+        f.flush()
+        if self.sync:
+            os.fsync(f.fileno())
+
+    def create(self, session_id, scheduler):
+        """Start persisting a new session from its current state"""
+        os.makedirs(os.path.join(self.directory, session_id), exist_ok=True)
+        self.snapshot(session_id, scheduler, 0)
+
+    def snapshot(self, session_id, scheduler, sequence=None):
+        """Pickle the scheduler (written to a temp file, then renamed) and start a fresh log"""
+        if sequence is None:
+            sequence = self._logs[session_id][1]
+        path = self._path(session_id, SNAPSHOT_FILE)
+        with open(path + ".tmp", "wb") as f:
+            pickle.dump((sequence, scheduler), f, protocol=pickle.HIGHEST_PROTOCOL)
+            self._write(f)
+        os.replace(path + ".tmp", path)
+
+        # A crash before the truncation leaves old records behind; their sequence numbers mark them as done
+        if session_id in self._logs:
+            self._logs[session_id][0].close()
+        log = open(self._path(session_id, LOG_FILE), "w")
+        self._logs[session_id] = [log, sequence, 0]
+
+    def append(self, session_id, scheduler, edit):
+        """Log one applied edit; takes a new snapshot every snapshot_every edits"""
+        entry = self._logs[session_id]
+        entry[1] += 1
+        entry[2] += 1
+        entry[0].write(json.dumps({"seq": entry[1], **edit}) + "\n")
+        self._write(entry[0])
+        if entry[2] >= self.snapshot_every:
+            self.snapshot(session_id, scheduler)
+
+    def delete(self, session_id):
+        entry = self._logs.pop(session_id, None)
+        if entry is not None:
+            entry[0].close()
+        shutil.rmtree(os.path.join(self.directory, session_id), ignore_errors=True)
+
+    def close(self):
+        for log, _, _ in self._logs.values():
+            log.close()
+        self._logs.clear()
+
+    # Step 3: Warm restart
+    def load_session(self, session_id):
+        """Rebuild one session's scheduler from its snapshot and log tail"""
+        # Unpickling allocates an object per job; collection passes over them only slow it down
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            with open(self._path(session_id, SNAPSHOT_FILE), "rb") as f:
+                sequence, scheduler = pickle.load(f)
+        finally:
+            if collecting:
+                gc.enable()
+
+        replayed = 0
+        log_path = self._path(session_id, LOG_FILE)
+        with open(log_path, "a+b") as f:
+            f.seek(0)
+            good = 0  # end of the last complete record
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                edit = json.loads(line)
+                good += len(line)
+                if edit["seq"] > sequence:
+                    apply(scheduler, edit)
+                    sequence = edit["seq"]
+                    replayed += 1
+            # Drop a record cut short by a crash; it was never acknowledged
+            f.truncate(good)
+
+        self._logs[session_id] = [open(log_path, "a"), sequence, replayed]
+        return scheduler
+
+    def load(self):
+        """(session id, scheduler) for every session in the store"""
+        sessions = []
+        for session_id in sorted(os.listdir(self.directory)):
+            if os.path.exists(self._path(session_id, SNAPSHOT_FILE)):
+                sessions.append((session_id, self.load_session(session_id)))
+        return sessions
@@ -0,0 +1,196 @@
+"""
+Prometheus-style metrics for the API, served as text on /metrics.
+
+Counters and histograms are sharded per thread: each thread that records
+a value gets its own dict the first time, and from then on only writes to
+that dict, so recording never takes a lock or contends with a scrape. A
+scrape sums the shards. Gauges are read from a callback at scrape time.
+
+    ttc_request_duration_seconds{route,method}   request latency histogram
+    ttc_requests_total{route,method,status}      requests served
+    ttc_jobs_scheduled_total                     assignments made (rate() gives jobs/s)
+    ttc_sla_violations_total{priority}           assignments that missed their SLA
+    ttc_simulation_rounds                        dispatch rounds per schedule request
+    ttc_ingest_queue_depth                       jobs waiting in session ingest queues
+    ttc_sessions                                 open sessions
+"""
+
+import bisect
+import math
+import threading
+import time
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+ROUND_BUCKETS = (1, 10, 100, 1000, 10000, 100000)
+
+# Step 1: Metric types
+class _Sharded:
+    """Base for metrics whose values live in one dict per recording thread"""
+
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()  # only taken when a thread records for the first time
+
+    def _shard(self):
+        shard = getattr(self._local, "values", None)
+        if shard is None:
+            shard = self._local.values = {}
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def _label_text(self, values, extra=""):
+        pairs = [f'{name}="{value}"' for name, value in zip(self.labels, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter(_Sharded):
+    kind = "counter"
+
+    def inc(self, amount=1, *label_values):
+        shard = self._shard()
+        shard[label_values] = shard.get(label_values, 0) + amount
+
+    def values(self):
+        """label values -> total over all threads"""
+        totals = {} if self.labels else {(): 0}
+        for shard in list(self._shards):
+            for key, value in dict(shard).items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def samples(self):
+        return [f"{self.name}{self._label_text(key)} {value}" for key, value in sorted(self.values().items())]
+
+class Histogram(_Sharded):
+    kind = "histogram"
+
+    def __init__(self, name, help, buckets, labels=()):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *label_values):
+        shard = self._shard()
+        row = shard.get(label_values)
+        if row is None:
+            row = shard[label_values] = [0] * (len(self.buckets) + 1) + [0.0]  # bucket counts, +Inf, sum
+        row[bisect.bisect_left(self.buckets, value)] += 1
+        row[-1] += value
+
+    def values(self):
+        """label values -> (per-bucket counts including +Inf, sum) over all threads"""
+        totals = {}
+        for shard in list(self._shards):
+            for key, row in dict(shard).items():
+                total = totals.setdefault(key, [0] * len(row))
+                for i, value in enumerate(row):
+                    total[i] += value
+        return {key: (row[:-1], row[-1]) for key, row in totals.items()}
+
+    def samples(self):
+        lines = []
+        for key, (counts, total) in sorted(self.values().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == math.inf else f'le="{float(bound)!r}"'
+                lines.append(f"{self.name}_bucket{self._label_text(key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_text(key)} {total}")
+            lines.append(f"{self.name}_count{self._label_text(key)} {cumulative}")
+        return lines
+
+class Gauge:
+    kind = "gauge"
+
+    def __init__(self, name, help, read):
+        self.name = name
+        self.help = help
+        self.read = read  # called at scrape time
+
+    def samples(self):
+        return [f"{self.name} {self.read()}"]
+
+# Step 2: Registry and text exposition
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        """The Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+request_seconds = registry.register(Histogram(
+    "ttc_request_duration_seconds", "Time from request arrival to the end of the response",
+    LATENCY_BUCKETS, ("route", "method")))
+requests_total = registry.register(Counter(
+    "ttc_requests_total", "Requests served", ("route", "method", "status")))
+jobs_scheduled = registry.register(Counter("ttc_jobs_scheduled_total", "Jobs assigned to a tech"))
+sla_violations = registry.register(Counter(
+    "ttc_sla_violations_total", "Assignments that started after their SLA window", ("priority",)))
+simulation_rounds = registry.register(Histogram(
+    "ttc_simulation_rounds", "Dispatch rounds per schedule request", ROUND_BUCKETS))
+
+def record_assignments(events):
+    """Count the assignments and SLA violations in some scheduler events"""
+    assigned = 0
+    missed = {}
+    for event in events:
+        if event.type == "assigned":
+            assigned += 1
+            if not event.sla_met:
+                missed[event.priority] = missed.get(event.priority, 0) + 1
+    if assigned:
+        jobs_scheduled.inc(assigned)
+    for priority, count in missed.items():
+        sla_violations.inc(count, priority)
+
+def record_schedule(result):
+    """Count one schedule request's assignments, SLA violations and dispatch rounds"""
+    record_assignments(result.events)
+    rounds = result.counters.get("rounds")
+    if rounds is not None:
+        simulation_rounds.observe(rounds)
+
+# Step 3: Request latency middleware
+class RequestMetrics:
+    """ASGI middleware timing every HTTP request, labelled by its route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = [500]
+
+        async def send_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            request_seconds.observe(time.perf_counter() - started, path, scope["method"])
+            requests_total.inc(1, path, scope["method"], str(status[0]))
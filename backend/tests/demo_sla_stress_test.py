@@ -3,8 +3,9 @@ Demonstration: Emergency scheduler forced into SLA violation
 Shows what happens when too many emergencies hit with limited capacity
 """
 
+import os
 import sys
-sys.path.insert(0, '/Users/tanayshah/Documents/maintenance_tracker_mvp/Backend')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Temporarily override the jobs to force a violation scenario
 original_jobs = [
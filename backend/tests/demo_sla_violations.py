@@ -3,8 +3,9 @@ Demonstration of SLA violations with limited technician capacity
 Shows how the system flags when emergencies can't be handled in time
 """
 
+import os
 import sys
-sys.path.insert(0, '/Users/tanayshah/Documents/maintenance_tracker_mvp/Backend')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 print("=" * 80)
 print("SLA VIOLATION SCENARIO: High-demand emergency with limited capacity")
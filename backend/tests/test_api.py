@@ -0,0 +1,212 @@
+import asyncio
+import json
+import os
+import threading
+import pytest
+import matcher
+from fastapi import HTTPException
+from matcher import ScheduleConfig
+from api import (
+    ScheduleRequest,
+    AdvanceRequest,
+    AvailabilityRequest,
+    Job,
+    create_schedule,
+    create_sharded_schedule,
+    schedule_metrics,
+    create_session,
+    advance_session,
+    add_session_job,
+    cancel_session_job,
+    complete_session_job,
+    set_session_availability,
+    get_session_state,
+    delete_session,
+    ingest_session_job,
+    get_ingest_status,
+    get_session_stats,
+    metrics,
+    sessions,
+    stream_events
+)
+
+def make_request():
+    return ScheduleRequest(
+        technicians=[
+            {"id": 1, "skills": ["plumbing"]},
+            {"id": 2, "skills": ["hvac"]}
+        ],
+        jobs=[
+            {"id": 101, "required_skills": ["hvac"], "days_waited": 2, "estimated_hours": 2,
+             "priority": "emergency", "submitted_hour": 0},
+            {"id": 102, "required_skills": ["plumbing"], "days_waited": 1, "estimated_hours": 3,
+             "priority": "routine", "submitted_hour": 1}
+        ]
+    )
+
+def test_schedule_returns_events_without_output():
+    response = create_schedule(make_request())
+    assert response["success"]
+    assert "output" not in response
+    assigned = [e for e in response["events"] if e["type"] == "assigned"]
+    assert [(e["job_id"], e["tech_id"], e["hour"]) for e in assigned] == [(101, 2, 0), (102, 1, 1)]
+    assert all(j["assigned"] for j in response["jobs"])
+
+def test_schedule_renders_output_on_request():
+    response = create_schedule(make_request(), include_output=True)
+    assert "Hour 1: Tech 1 starts Job 102" in response["output"]
+
+def test_client_cannot_send_preemption_state():
+    request = make_request()
+    request = ScheduleRequest(technicians=[t.dict() for t in request.technicians],
+                              jobs=[dict(j.dict(), remaining_hours=1) for j in request.jobs])
+    response = create_schedule(request, include_output=True)
+    assert len([e for e in response["events"] if e["type"] == "assigned"]) == 2
+    assert all("remaining_hours" not in job for job in response["jobs"])
+    assert schedule_metrics(request)["metrics"]["assigned"] == 2
+
+def test_metrics_endpoint_returns_json_metrics():
+    response = schedule_metrics(make_request())
+    metrics = response["metrics"]
+    assert (metrics["jobs"], metrics["assigned"], metrics["sla_violations"]) == (2, 2, 0)
+    assert list(metrics["by_priority"]) == ["critical", "emergency", "urgent", "routine"]
+    assert metrics["by_priority"]["emergency"]["response_hours"]["p50"] == 0
+    assert metrics["by_priority"]["critical"]["response_hours"]["count"] == 0
+    assert [(t["id"], t["jobs"], t["busy_hours"]) for t in metrics["technicians"]] == [(1, [102], 3), (2, [101], 2)]
+    json.dumps(response)
+
+def test_metrics_exporter_counts_scheduled_jobs():
+    before = metrics().body.decode().splitlines()
+    create_schedule(make_request())
+    after = metrics().body.decode().splitlines()
+
+    def sample(lines, name):
+        return next(float(line.split()[-1]) for line in lines if line.startswith(name + " "))
+
+    assert sample(after, "ttc_jobs_scheduled_total") == sample(before, "ttc_jobs_scheduled_total") + 2
+    assert sample(after, "ttc_simulation_rounds_count") == sample(before, "ttc_simulation_rounds_count") + 1
+    assert "# TYPE ttc_ingest_queue_depth gauge" in after
+
+def test_profile_flag_adds_phase_timings_and_counters(monkeypatch, tmp_path):
+    assert "profile" not in create_schedule(make_request())
+    monkeypatch.setenv("TTC_PROFILE_HOOK", "profiling:cprofile_hook")
+    monkeypatch.setenv("TTC_PROFILE_DIR", str(tmp_path))
+    profile = create_schedule(make_request(), include_output=True, profile=True)["profile"]
+    assert list(profile["phases_ms"]) == ["model_dump", "validate", "to_records", "simulate", "to_dicts",
+                                          "response", "render"]
+    assert profile["counters"]["jobs_queued"] == 2 and profile["counters"]["rounds"] >= 1
+    assert os.path.exists(profile["hook"]["file"])
+
+def test_sharded_schedule_has_the_same_response_shape():
+    response = create_sharded_schedule(make_request(), workers=1)
+    expected = create_schedule(make_request())
+    assert response.keys() == expected.keys()
+    assert response["jobs"] == expected["jobs"]
+
+def test_session_rejects_unknown_mode_and_order_as_issues():
+    response = create_session(make_request(), mode="fast", order="random")
+    assert not response["success"]
+    assert [(e["code"], e["entity"]) for e in response["errors"]] == [("invalid_mode", "input"),
+                                                                      ("invalid_order", "input")]
+    assert "'fast'" in response["errors"][0]["message"]
+
+def test_session_applies_incremental_edits():
+    created = create_session(make_request())
+    session_id = created["session_id"]
+    assert [e["job_id"] for e in created["events"] if e["type"] == "assigned"] == [101]
+
+    update = advance_session(session_id, AdvanceRequest(hour=1))
+    assert [(e["type"], e.get("job_id")) for e in update["events"]] == [("submitted", None), ("assigned", 102)]
+
+    emergency = Job(id=103, required_skills=["hvac"], days_waited=0, estimated_hours=1,
+                    priority="emergency", submitted_hour=1)
+    assert add_session_job(session_id, emergency)["events"] == []
+
+    update = complete_session_job(session_id, 101)
+    assert [e["type"] for e in update["events"]] == ["completed", "assigned"]
+    assert update["events"][1]["job_id"] == 103
+
+    update = set_session_availability(session_id, 1, AvailabilityRequest(available=False))
+    assert update["events"][0]["type"] == "tech_off"
+    cancel_session_job(session_id, 102)
+    assert [j["id"] for j in get_session_state(session_id)["jobs"]] == [101, 103]
+
+    with pytest.raises(HTTPException) as error:
+        cancel_session_job(session_id, 999)
+    assert (error.value.status_code, error.value.detail) == (404, "Unknown job 999")
+    with pytest.raises(HTTPException) as error:
+        advance_session(session_id, AdvanceRequest(hour=0))
+    assert error.value.status_code == 400
+
+    stats = get_session_stats(session_id)
+    assert stats["by_priority"]["emergency"]["count"] == 2
+    assert stats["by_skill"]["plumbing"]["breach_rate"] == 0
+
+    delete_session(session_id)
+    with pytest.raises(HTTPException):
+        get_session_state(session_id)
+
+def collect_stream(lines, mode="greedy"):
+    async def chunks():
+        for line in lines:
+            yield (json.dumps(line) + "\n").encode()
+    async def collect():
+        return [json.loads(part) for chunk in [c async for c in stream_events(chunks(), ScheduleConfig(mode=mode))]
+                for part in chunk.splitlines()]
+    return asyncio.run(collect())
+
+def test_stream_matches_batch_schedule():
+    request = make_request()
+    lines = ([{"technician": t.dict()} for t in request.technicians] +
+             [{"job": j.dict()} for j in request.jobs])
+    assert collect_stream(lines) == json.loads(json.dumps(create_schedule(request)["events"]))
+
+def test_stream_schedules_off_the_event_loop(monkeypatch):
+    threads = set()
+    for name in ("add_job", "finish"):
+        original = getattr(matcher.StreamingSchedule, name)
+        def traced(self, *args, original=original):
+            threads.add(threading.current_thread() is threading.main_thread())
+            return original(self, *args)
+        monkeypatch.setattr(matcher.StreamingSchedule, name, traced)
+    request = make_request()
+    collect_stream([{"technician": t.dict()} for t in request.technicians] + [{"job": j.dict()} for j in request.jobs])
+    assert threads == {False}
+
+def test_stream_reports_bad_lines_and_keeps_going():
+    lines = [
+        {"technician": {"id": 1, "skills": ["plumbing"]}},
+        {"job": {"id": 101}},
+        {"truck": {}},
+        {"job": {"id": 102, "required_skills": ["plumbing"], "days_waited": 0, "estimated_hours": 1,
+                 "priority": "routine", "submitted_hour": 0}}
+    ]
+    records = collect_stream(lines)
+    assert [(r["type"], r.get("code"), r.get("id")) for r in records[:2]] == [
+        ("error", "invalid_line", 2), ("error", "invalid_line", 3)]
+    assert [r["type"] for r in records[2:]] == ["assigned", "all_assigned"]
+
+def test_stream_stops_on_invalid_technicians():
+    lines = [{"technician": {"id": 1, "skills": []}},
+             {"job": {"id": 101, "required_skills": ["plumbing"], "days_waited": 0, "estimated_hours": 1,
+                      "priority": "routine", "submitted_hour": 0}}]
+    assert [r["code"] for r in collect_stream(lines)] == ["tech_no_skills"]
+
+def test_ingested_jobs_are_scheduled_in_micro_batches():
+    session_id = create_session(make_request())["session_id"]
+    jobs = [Job(id=200 + k, required_skills=["plumbing"], days_waited=0, estimated_hours=1,
+                priority="routine", submitted_hour=0) for k in range(5)]
+
+    async def ingest_all():
+        responses = [await ingest_session_job(session_id, job) for job in jobs]
+        duplicate = await ingest_session_job(session_id, jobs[0])
+        await sessions[session_id].ingest.join()
+        return responses, duplicate
+
+    responses, duplicate = asyncio.run(ingest_all())
+    assert all(r["success"] for r in responses) and responses[-1]["pending"] == 5
+    assert duplicate["errors"][0]["code"] == "duplicate_job_id"
+    status = get_ingest_status(session_id)
+    assert (status["flushed"], status["batches"], status["pending"]) == (5, 1, 0)
+    assert {j["id"] for j in get_session_state(session_id)["jobs"]} >= {200, 201, 202, 203, 204}
+    delete_session(session_id)
@@ -0,0 +1,28 @@
+from bench import generate_workload, measure, compare, bench_validate_inputs, ARRIVALS
+from matcher import validate_inputs
+
+def test_workload_is_seeded_and_valid():
+    for arrival in ARRIVALS:
+        technicians, jobs = generate_workload(500, 20, seed=7, arrival=arrival)
+        assert (technicians, jobs) == generate_workload(500, 20, seed=7, arrival=arrival)
+        is_valid, errors = validate_inputs(technicians, jobs)
+        assert is_valid, errors[:3]
+        skill_sets = [set(tech["skills"]) for tech in technicians]
+        assert all(any(set(job["required_skills"]) <= skills for skills in skill_sets) for job in jobs)
+    assert generate_workload(50, 5, seed=1) != generate_workload(50, 5, seed=2)
+
+def test_priority_mix_is_respected():
+    _, jobs = generate_workload(200, 5, priority_mix={"emergency": 1})
+    assert {job["priority"] for job in jobs} == {"emergency"}
+
+def test_compare_flags_regressions():
+    technicians, jobs = generate_workload(100, 5)
+    result = measure(bench_validate_inputs, technicians, jobs, repeat=1)
+    assert result["seconds"] > 0 and "peak_mb" in result
+
+    baseline = {"results": {"case": {"validate_inputs": {"seconds": 1.0}, "run_simulation": {"seconds": 1.0}}}}
+    current = {"results": {"case": {"validate_inputs": {"seconds": 1.1}, "run_simulation": {"seconds": 2.0}},
+                           "new_case": {"validate_inputs": {"seconds": 5.0}}}}
+    lines, regressions = compare(current, baseline, tolerance=0.25)
+    assert len(lines) == 2
+    assert regressions == [("case", "run_simulation", 2.0)]
@@ -0,0 +1,50 @@
+import asyncio
+
+from ingest import IngestQueue
+
+def run_queue(items, max_batch, max_wait, gap=0):
+    batches = []
+
+    async def flush(batch):
+        batches.append(batch)
+
+    async def main():
+        queue = IngestQueue(flush, max_batch=max_batch, max_wait=max_wait)
+        for item in items:
+            queue.put(item)
+            if gap:
+                await asyncio.sleep(gap)
+        await queue.join()
+        queue.close()
+        return queue.stats()
+
+    return batches, asyncio.run(main())
+
+def test_full_batches_flush_without_waiting():
+    batches, stats = run_queue(range(10), max_batch=4, max_wait=0.05)
+    assert batches == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+    assert stats["received"] == stats["flushed"] == 10 and stats["pending"] == 0
+
+def test_partial_batch_flushes_after_max_wait():
+    batches, stats = run_queue(range(3), max_batch=100, max_wait=0.05, gap=0.01)
+    assert sum(batches, []) == [0, 1, 2]
+    assert len(batches) == stats["batches"] < 3
+
+def test_failed_flush_is_counted_and_draining_continues():
+    seen = []
+
+    async def flush(batch):
+        seen.append(batch)
+        if len(seen) == 1:
+            raise ValueError("boom")
+
+    async def main():
+        queue = IngestQueue(flush, max_batch=2, max_wait=60)
+        for item in range(4):
+            queue.put(item)
+        await queue.join()
+        queue.close()
+        return queue.stats()
+
+    stats = asyncio.run(main())
+    assert stats["failed"] == 2 and stats["flushed"] == 2 and stats["last_error"] == "boom"
@@ -5,6 +5,23 @@ from matcher import (
     can_do_job, 
     get_sla_window, 
     check_sla_met,
+    EventScheduler,
+    SkillIndex,
+    TechRecord,
+    JobRecord,
+    skill_mask,
+    to_records,
+    mask_matrix,
+    score_matrix,
+    ScheduleConfig,
+    InputValidator,
+    Shift,
+    GeoGrid,
+    distance_km,
+    schedule,
+    aggregate_results,
+    UnknownIdError,
+    StreamingSchedule,
     SLA_WINDOWS
 )
 
@@ -101,4 +118,522 @@ def test_valid_data():
     ]
     is_valid, errors = validate_inputs(technicians, jobs)
     assert is_valid
-    assert len(errors) == 0
\ No newline at end of file
+    assert len(errors) == 0
+def test_scheduler_serializes_emergencies_on_one_tech():
+    technicians = [
+        {"id": 1, "skills": ["hvac"], "free_at_hour": 0, "current_job": None},
+        {"id": 2, "skills": ["electrical"], "free_at_hour": 0, "current_job": None}
+    ]
+    jobs = [
+        {"id": 401, "required_skills": ["hvac"], "days_waited": 5, "estimated_hours": 3,
+         "priority": "emergency", "submitted_hour": 0,
+         "assigned": False, "assigned_to": None, "start_hour": None, "sla_met": None},
+        {"id": 402, "required_skills": ["hvac"], "days_waited": 4, "estimated_hours": 3,
+         "priority": "emergency", "submitted_hour": 0,
+         "assigned": False, "assigned_to": None, "start_hour": None, "sla_met": None},
+        {"id": 403, "required_skills": ["hvac"], "days_waited": 3, "estimated_hours": 3,
+         "priority": "emergency", "submitted_hour": 0,
+         "assigned": False, "assigned_to": None, "start_hour": None, "sla_met": None},
+        {"id": 404, "required_skills": ["electrical"], "days_waited": 2, "estimated_hours": 2,
+         "priority": "urgent", "submitted_hour": 0,
+         "assigned": False, "assigned_to": None, "start_hour": None, "sla_met": None}
+    ]
+    result = schedule(technicians, jobs)
+    assert [(j["assigned_to"], j["start_hour"]) for j in result.jobs] == [(1, 0), (1, 3), (1, 6), (2, 0)]
+    assert [j["sla_met"] for j in result.jobs] == [True, False, False, True]
+    assert result.technicians[0]["free_at_hour"] == 9
+
+def test_scheduler_waits_for_submitted_hour():
+    technicians = [{"id": 1, "skills": ["plumbing"], "free_at_hour": 0, "current_job": None}]
+    jobs = [
+        {"id": 104, "required_skills": ["plumbing"], "days_waited": 4, "estimated_hours": 3,
+         "priority": "urgent", "submitted_hour": 1,
+         "assigned": False, "assigned_to": None, "start_hour": None, "sla_met": None},
+        {"id": 105, "required_skills": ["plumbing"], "days_waited": 3, "estimated_hours": 2,
+         "priority": "routine", "submitted_hour": 2,
+         "assigned": False, "assigned_to": None, "start_hour": None, "sla_met": None}
+    ]
+    result = schedule(technicians, jobs)
+    assert [j["start_hour"] for j in result.jobs] == [1, 4]
+    assert all(j["start_hour"] >= j["submitted_hour"] for j in result.jobs)
+
+def test_scheduler_leaves_unservable_jobs_pending():
+    technicians = [{"id": 1, "skills": ["plumbing"], "free_at_hour": 0, "current_job": None}]
+    jobs = [
+        {"id": 101, "required_skills": ["plumbing", "hvac"], "days_waited": 2, "estimated_hours": 1,
+         "priority": "critical", "submitted_hour": 0,
+         "assigned": False, "assigned_to": None, "start_hour": None, "sla_met": None},
+        {"id": 102, "required_skills": ["plumbing"], "days_waited": 2, "estimated_hours": 1,
+         "priority": "routine", "submitted_hour": 0,
+         "assigned": False, "assigned_to": None, "start_hour": None, "sla_met": None}
+    ]
+    tech_records, job_records, _ = to_records(technicians, jobs)
+    scheduler = EventScheduler(tech_records, job_records)
+    scheduler.run()
+    assert job_records[1].assigned_to == 1
+    assert [j.id for j in scheduler.pending_jobs()] == [101]
+    assert scheduler.events.events[-1].job_ids == (101,)
+
+def test_skill_index_requires_all_skills():
+    technicians = [
+        {"id": 1, "skills": ["plumbing"]},
+        {"id": 2, "skills": ["electrical"]},
+        {"id": 3, "skills": ["plumbing", "electrical", "hvac"]}
+    ]
+    skill_bits = {}
+    index = SkillIndex([TechRecord.from_dict(t, skill_bits) for t in technicians])
+    for i in range(len(technicians)):
+        index.mark_free(i)
+    assert index.free_techs_with(skill_mask(["plumbing"], skill_bits)) == {0, 2}
+    assert index.free_techs_with(skill_mask(["plumbing", "electrical"], skill_bits)) == {2}
+    assert index.free_techs_with(skill_mask(["roofing"], skill_bits)) == set()
+    index.mark_busy(2)
+    assert index.free_techs_with(skill_mask(["plumbing"], skill_bits)) == {0}
+    assert index.free_techs_with(skill_mask(["hvac"], skill_bits)) == set()
+
+def test_skill_index_cache_follows_free_and_busy_techs():
+    technicians = [
+        {"id": 1, "skills": ["plumbing"]},
+        {"id": 2, "skills": ["plumbing", "electrical"]},
+        {"id": 3, "skills": ["plumbing", "electrical"]}
+    ]
+    skill_bits = {}
+    index = SkillIndex([TechRecord.from_dict(t, skill_bits) for t in technicians])
+    for i in range(len(technicians)):
+        index.mark_free(i)
+    mask = skill_mask(["plumbing"], skill_bits)
+    row = [1.0, 2.0, 2.0]
+    assert index.best_free_with(mask, row) == 1
+    index.mark_busy(1)
+    assert index.free_techs_with(mask) == {0, 2}
+    assert index.best_free_with(mask, row) == 2
+    index.mark_busy(2)
+    index.mark_busy(0)
+    assert index.best_free_with(mask, row) is None
+    index.mark_free(2)
+    index.mark_free(1)
+    assert index.free_techs_with(mask) == {1, 2}
+    assert index.best_free_with(mask, row) == 1
+
+def test_nearest_lookup_tracks_techs_without_a_location():
+    technicians = [
+        {"id": 1, "skills": ["plumbing"], "location": {"lat": 40.0, "lon": -75.0}},
+        {"id": 2, "skills": ["plumbing"]},
+        {"id": 3, "skills": ["plumbing", "hvac"]}
+    ]
+    skill_bits = {}
+    index = SkillIndex([TechRecord.from_dict(t, skill_bits) for t in technicians])
+    for i in range(len(technicians)):
+        index.mark_free(i)
+    mask = skill_mask(["plumbing"], skill_bits)
+    site = (40.1, -75.0)
+    assert index.nearest_free_with(mask, site) == (1, 0.0)
+    index.mark_busy(1)
+    assert index.nearest_free_with(mask, site) == (2, 0.0)
+    index.mark_busy(2)
+    assert index.nearest_free_with(mask, site)[0] == 0
+    index.move(1, site)
+    index.mark_free(1)
+    assert index.nearest_free_with(mask, site) == (1, 0.0)
+    index.mark_busy(1)
+    index.mark_busy(0)
+    assert index.nearest_free_with(mask, site) is None
+    index.mark_free(2)
+    assert index.nearest_free_with(mask, site) == (2, 0.0)
+
+def test_records_round_trip_dicts():
+    skill_bits = {}
+    tech = {"id": 1, "skills": ["plumbing", "hvac"], "free_at_hour": 3, "current_job": 100}
+    job = {"id": 100, "required_skills": ["hvac"], "days_waited": 2, "estimated_hours": 2,
+           "priority": "urgent", "submitted_hour": 1,
+           "assigned": True, "assigned_to": 1, "start_hour": 1, "sla_met": True}
+    tech_record = TechRecord.from_dict(tech, skill_bits)
+    job_record = JobRecord.from_dict(job, skill_bits)
+    assert tech_record.to_dict() == tech
+    assert job_record.to_dict() == job
+    assert job_record.rank == 2
+    assert tech_record.skill_mask & job_record.skill_mask == job_record.skill_mask
+
+def test_schedule_does_not_mutate_inputs():
+    technicians = [{"id": 1, "skills": ["hvac"], "free_at_hour": 0, "current_job": None}]
+    jobs = [
+        {"id": 101, "required_skills": ["hvac"], "days_waited": 2, "estimated_hours": 2,
+         "priority": "emergency", "submitted_hour": 0,
+         "assigned": False, "assigned_to": None, "start_hour": None, "sla_met": None}
+    ]
+    result = schedule(technicians, jobs)
+    assert result.success
+    assert result.jobs[0]["assigned_to"] == 1
+    assert result.technicians[0]["free_at_hour"] == 2
+    assert jobs[0]["assigned"] is False
+    assert technicians[0]["free_at_hour"] == 0
+    assert [e.type for e in result.events] == ["assigned", "all_assigned"]
+
+def test_schedule_uses_config_sla_windows():
+    technicians = [{"id": 1, "skills": ["hvac"], "free_at_hour": 0, "current_job": None}]
+    jobs = [
+        {"id": 101, "required_skills": ["hvac"], "days_waited": 2, "estimated_hours": 3,
+         "priority": "emergency", "submitted_hour": 0,
+         "assigned": False, "assigned_to": None, "start_hour": None, "sla_met": None},
+        {"id": 102, "required_skills": ["hvac"], "days_waited": 1, "estimated_hours": 3,
+         "priority": "emergency", "submitted_hour": 0,
+         "assigned": False, "assigned_to": None, "start_hour": None, "sla_met": None}
+    ]
+    assert schedule(technicians, jobs).jobs[1]["sla_met"] is False
+    config = ScheduleConfig(sla_windows={**SLA_WINDOWS, "emergency": 3})
+    assert schedule(technicians, jobs, config).jobs[1]["sla_met"] is True
+
+def test_schedule_reports_validation_errors():
+    result = schedule([], [])
+    assert not result.success
+    assert [issue.code for issue in result.errors] == ["no_technicians"]
+    assert result.errors[0].message == "ERROR: No technicians available"
+
+def test_validator_reports_codes_and_ids():
+    technicians = [{"id": 1, "skills": ["plumbing"]}, {"id": 1, "skills": []}]
+    jobs = [
+        {"id": 101, "required_skills": ["hvac"], "days_waited": 1, "estimated_hours": 0,
+         "priority": "someday", "submitted_hour": 0},
+        {"required_skills": ["plumbing"]}
+    ]
+    issues = InputValidator().validate(technicians, jobs)
+    assert [(i.code, i.id) for i in issues] == [
+        ("duplicate_tech_id", 1),
+        ("tech_no_skills", 1),
+        ("job_invalid_duration", 101),
+        ("job_invalid_priority", 101),
+        ("job_missing_id", None),
+        ("job_skills_unavailable", 101),
+    ]
+    assert issues[3].message.startswith("ERROR: Job 101 has invalid priority 'someday'")
+
+    first = InputValidator().validate(technicians, jobs, fail_fast=True)
+    assert [i.code for i in first] == ["duplicate_tech_id", "tech_no_skills"]
+
+def test_score_matrix_matches_match_score():
+    skill_bits = {}
+    technicians = [
+        {"id": 1, "skills": ["plumbing"]},
+        {"id": 2, "skills": ["electrical"]},
+        {"id": 3, "skills": ["plumbing", "electrical", "hvac"]}
+    ]
+    jobs = [
+        {"required_skills": ["plumbing", "electrical"], "days_waited": 5},
+        {"required_skills": ["hvac"], "days_waited": 2},
+        {"required_skills": ["electrical"], "days_waited": 0}
+    ]
+    tech_masks = [skill_mask(t["skills"], skill_bits) for t in technicians]
+    job_masks = [skill_mask(j["required_skills"], skill_bits) for j in jobs]
+    width = len(skill_bits)
+    scores, qualified = score_matrix(mask_matrix(tech_masks, width), mask_matrix(job_masks, width),
+                                     [j["days_waited"] for j in jobs])
+    for t, tech in enumerate(technicians):
+        for j, job in enumerate(jobs):
+            assert scores[t, j] == match_score(tech, job)
+            assert qualified[t, j] == can_do_job(tech, job)
+
+def test_optimal_mode_keeps_generalist_for_the_job_only_they_can_do():
+    technicians = [
+        {"id": 3, "skills": ["plumbing", "hvac"], "free_at_hour": 0, "current_job": None},
+        {"id": 1, "skills": ["plumbing"], "free_at_hour": 0, "current_job": None}
+    ]
+    jobs = [
+        {"id": 101, "required_skills": ["plumbing"], "days_waited": 2, "estimated_hours": 8,
+         "priority": "urgent", "submitted_hour": 0,
+         "assigned": False, "assigned_to": None, "start_hour": None, "sla_met": None},
+        {"id": 102, "required_skills": ["hvac"], "days_waited": 1, "estimated_hours": 1,
+         "priority": "routine", "submitted_hour": 0,
+         "assigned": False, "assigned_to": None, "start_hour": None, "sla_met": None}
+    ]
+    greedy = schedule(technicians, jobs)
+    assert [j["assigned_to"] for j in greedy.jobs] == [3, 3]
+    assert greedy.jobs[1]["start_hour"] == 8
+    optimal = schedule(technicians, jobs, ScheduleConfig(mode="optimal"))
+    assert [(j["assigned_to"], j["start_hour"]) for j in optimal.jobs] == [(1, 0), (3, 0)]
+
+def test_optimal_mode_serves_higher_priority_first():
+    technicians = [{"id": 1, "skills": ["plumbing", "hvac"], "free_at_hour": 0, "current_job": None}]
+    jobs = [
+        {"id": 101, "required_skills": ["plumbing"], "days_waited": 9, "estimated_hours": 1,
+         "priority": "routine", "submitted_hour": 0,
+         "assigned": False, "assigned_to": None, "start_hour": None, "sla_met": None},
+        {"id": 102, "required_skills": ["hvac"], "days_waited": 0, "estimated_hours": 1,
+         "priority": "emergency", "submitted_hour": 0,
+         "assigned": False, "assigned_to": None, "start_hour": None, "sla_met": None}
+    ]
+    result = schedule(technicians, jobs, ScheduleConfig(mode="optimal"))
+    assert [j["start_hour"] for j in result.jobs] == [1, 0]
+
+def test_unknown_dispatch_mode_is_rejected():
+    technicians = [{"id": 1, "skills": ["hvac"], "free_at_hour": 0, "current_job": None}]
+    jobs = [
+        {"id": 101, "required_skills": ["hvac"], "days_waited": 0, "estimated_hours": 1,
+         "priority": "routine", "submitted_hour": 0,
+         "assigned": False, "assigned_to": None, "start_hour": None, "sla_met": None}
+    ]
+    with pytest.raises(ValueError):
+        schedule(technicians, jobs, ScheduleConfig(mode="fastest"))
+
+def make_live_scheduler():
+    technicians = [
+        {"id": 1, "skills": ["hvac"], "free_at_hour": 0, "current_job": None},
+        {"id": 2, "skills": ["plumbing"], "free_at_hour": 0, "current_job": None}
+    ]
+    jobs = [
+        {"id": 101, "required_skills": ["hvac"], "days_waited": 1, "estimated_hours": 4,
+         "priority": "routine", "submitted_hour": 0,
+         "assigned": False, "assigned_to": None, "start_hour": None, "sla_met": None},
+        {"id": 102, "required_skills": ["hvac"], "days_waited": 1, "estimated_hours": 2,
+         "priority": "urgent", "submitted_hour": 0,
+         "assigned": False, "assigned_to": None, "start_hour": None, "sla_met": None}
+    ]
+    tech_records, job_records, skill_bits = to_records(technicians, jobs)
+    scheduler = EventScheduler(tech_records, job_records, skill_bits=skill_bits)
+    scheduler.run_until(0)
+    return scheduler, skill_bits
+
+def test_live_complete_job_frees_tech_early():
+    scheduler, _ = make_live_scheduler()
+    assert scheduler.job(102).assigned_to == 1
+    scheduler.run_until(1)
+    events = scheduler.complete_job(102)
+    assert [(e.type, e.job_id if e.type == "assigned" else e.job_ids) for e in events] == [
+        ("completed", (102,)), ("assigned", 101)]
+    assert scheduler.job(101).start_hour == 1
+    # The original hour-2 free event is stale and must not free the tech again
+    assert [e.type for e in scheduler.run_until(10)] == ["tech_free"]
+    assert scheduler.technicians[0].free_at_hour == 5
+
+def test_live_cancel_pending_and_add_job():
+    scheduler, skill_bits = make_live_scheduler()
+    scheduler.cancel_job(101)
+    assert [j["id"] for j in scheduler.snapshot()[1]] == [102]
+    new_job = {"id": 103, "required_skills": ["plumbing"], "days_waited": 0, "estimated_hours": 1,
+               "priority": "emergency", "submitted_hour": 0}
+    events = scheduler.add_job(JobRecord.from_dict(new_job, skill_bits))
+    assert [(e.type, e.tech_id, e.job_id) for e in events] == [("assigned", 2, 103)]
+    with pytest.raises(ValueError):
+        scheduler.add_job(JobRecord.from_dict(new_job, skill_bits))
+
+def test_live_off_duty_tech_is_skipped_until_back():
+    scheduler, _ = make_live_scheduler()
+    scheduler.set_availability(1, False)
+    assert scheduler.run_until(5) == []
+    assert scheduler.job(101).assigned is False
+    events = scheduler.set_availability(1, True)
+    assert [e.type for e in events] == ["tech_on", "assigned"]
+    assert scheduler.job(101).start_hour == 5
+
+def test_live_off_duty_works_for_busy_techs_and_unknown_ids_change_nothing():
+    technicians = [{"id": 1, "skills": ["hvac"], "free_at_hour": 3, "current_job": None}]
+    jobs = [{"id": 101, "required_skills": ["hvac"], "days_waited": 0, "estimated_hours": 1,
+             "priority": "routine", "submitted_hour": 0}]
+    tech_records, job_records, skill_bits = to_records(technicians, jobs)
+    scheduler = EventScheduler(tech_records, job_records, skill_bits=skill_bits)
+    scheduler.run_until(0)
+    assert [e.type for e in scheduler.set_availability(1, False)] == ["tech_off"]
+    assert scheduler.job(101).assigned is False
+    before = scheduler.snapshot()
+    with pytest.raises(UnknownIdError, match="Unknown technician 9"):
+        scheduler.set_availability(9, False)
+    with pytest.raises(UnknownIdError, match="Unknown job 999"):
+        scheduler.cancel_job(999)
+    assert scheduler.snapshot() == before
+    assert scheduler.run_until(5) == []
+    assert scheduler.job(101).assigned is False
+
+def test_shift_windows_skip_nights_and_days_off():
+    shift = Shift(8, 17, frozenset({5, 6}))
+    assert shift.window(10) == (8, 17)
+    assert shift.window(17) is None
+    assert shift.next_start(17) == 32          # 8am on day 1
+    assert shift.next_start(4 * 24 + 20) == 7 * 24 + 8  # Friday evening -> Monday morning
+    overnight = Shift(22, 30)
+    assert overnight.window(24 + 3) == (22, 30)
+
+def test_scheduler_respects_shifts_across_days():
+    technicians = [{"id": 1, "skills": ["hvac"], "shift": {"start": 8, "end": 12, "days_off": [1]}}]
+    jobs = [
+        {"id": 101, "required_skills": ["hvac"], "days_waited": 0, "estimated_hours": 3,
+         "priority": "routine", "submitted_hour": 0},
+        {"id": 102, "required_skills": ["hvac"], "days_waited": 0, "estimated_hours": 3,
+         "priority": "routine", "submitted_hour": 0},
+        {"id": 103, "required_skills": ["hvac"], "days_waited": 0, "estimated_hours": 3,
+         "priority": "routine", "submitted_hour": 200}
+    ]
+    result = schedule(technicians, jobs)
+    assert result.success
+    # Starts at 8, then at 11 (still on shift, overruns to 14). Job 103 arrives
+    # at 8am on day 8, which is weekday 1 and a day off, so it waits a day.
+    assert [job["start_hour"] for job in result.jobs] == [8, 11, 9 * 24 + 8]
+    assert result.events.events[-1].type == "all_assigned"
+
+def test_scheduler_finishes_past_old_hour_cap():
+    technicians = [{"id": 1, "skills": ["hvac"]}]
+    jobs = [{"id": 100 + i, "required_skills": ["hvac"], "days_waited": 0, "estimated_hours": 10,
+             "priority": "routine", "submitted_hour": 0} for i in range(30)]
+    result = schedule(technicians, jobs)
+    assert all(job["assigned"] for job in result.jobs)
+    assert result.jobs[-1]["start_hour"] == 290
+    capped = schedule(technicians, jobs, ScheduleConfig(max_hours=100))
+    assert capped.events.events[-1].type == "max_hours"
+
+def test_parked_off_shift_tech_wakes_for_new_job():
+    technicians = [{"id": 1, "skills": ["hvac"], "shift": {"start": 8, "end": 16}}]
+    tech_records, job_records, skill_bits = to_records(technicians, [])
+    scheduler = EventScheduler(tech_records, job_records, start_hour=20, skill_bits=skill_bits)
+    assert scheduler.run_until(40) == []
+    job = {"id": 101, "required_skills": ["hvac"], "days_waited": 0, "estimated_hours": 1,
+           "priority": "urgent", "submitted_hour": 40}
+    scheduler.add_job(JobRecord.from_dict(job, skill_bits))
+    events = scheduler.run_until(60)
+    assert [(e.type, e.hour) for e in events] == [("tech_free", 56), ("assigned", 56), ("tech_free", 57)]
+
+def test_invalid_shift_is_reported():
+    technicians = [{"id": 1, "skills": ["hvac"], "shift": {"start": 9, "end": 8}}]
+    jobs = [{"id": 101, "required_skills": ["hvac"], "days_waited": 0, "estimated_hours": 1,
+             "priority": "urgent", "submitted_hour": 0}]
+    assert [issue.code for issue in InputValidator().validate(technicians, jobs)] == ["tech_invalid_shift"]
+
+def test_geo_grid_nearest_matches_brute_force():
+    import random
+    rng = random.Random(7)
+    points = {i: (40 + rng.uniform(-1, 1), -74 + rng.uniform(-1, 1)) for i in range(300)}
+    grid = GeoGrid.for_locations(list(points.values()))
+    for index, location in points.items():
+        grid.add(index, location)
+    for _ in range(50):
+        job = (40 + rng.uniform(-1.2, 1.2), -74 + rng.uniform(-1.2, 1.2))
+        accept = lambda i: i % 3 != 0
+        expected = min((distance_km(job, where), i) for i, where in points.items() if accept(i))
+        assert grid.nearest(job, accept) == expected
+
+def test_scheduler_sends_nearest_tech_and_counts_travel():
+    technicians = [
+        {"id": 1, "skills": ["hvac"], "location": {"lat": 40.0, "lon": -74.0}},
+        {"id": 2, "skills": ["hvac"], "location": {"lat": 40.5, "lon": -74.0}}
+    ]
+    jobs = [
+        {"id": 101, "required_skills": ["hvac"], "days_waited": 0, "estimated_hours": 2,
+         "priority": "urgent", "submitted_hour": 0, "location": {"lat": 40.45, "lon": -74.0}},
+        {"id": 102, "required_skills": ["hvac"], "days_waited": 0, "estimated_hours": 2,
+         "priority": "urgent", "submitted_hour": 0, "location": {"lat": 40.0, "lon": -74.0}}
+    ]
+    result = schedule(technicians, jobs)
+    assert [job["assigned_to"] for job in result.jobs] == [2, 1]
+    # 0.05 degrees of latitude is about 5.6 km, 0.14h at 40 km/h
+    assert [job["travel_hours"] for job in result.jobs] == [0.14, 0]
+    assert [job["start_hour"] for job in result.jobs] == [0.14, 0]
+
+def test_invalid_location_is_reported():
+    technicians = [{"id": 1, "skills": ["hvac"], "location": {"lat": 95, "lon": 0}}]
+    jobs = [{"id": 101, "required_skills": ["hvac"], "days_waited": 0, "estimated_hours": 1,
+             "priority": "urgent", "submitted_hour": 0, "location": {"lat": 0}}]
+    codes = [issue.code for issue in InputValidator().validate(technicians, jobs)]
+    assert codes == ["tech_invalid_location", "job_invalid_location"]
+
+def preemption_jobs(routine_hours):
+    return [
+        {"id": 101, "required_skills": ["plumbing"], "days_waited": 0, "estimated_hours": routine_hours,
+         "priority": "routine", "submitted_hour": 0},
+        {"id": 102, "required_skills": ["plumbing"], "days_waited": 0, "estimated_hours": 1,
+         "priority": "critical", "submitted_hour": 2},
+        {"id": 103, "required_skills": ["plumbing"], "days_waited": 0, "estimated_hours": 8,
+         "priority": "urgent", "submitted_hour": 0}
+    ]
+
+def test_preemption_bumps_least_urgent_job_and_resumes_it():
+    technicians = [{"id": 1, "skills": ["plumbing"]}, {"id": 2, "skills": ["plumbing"]}]
+    result = schedule(technicians, preemption_jobs(8), ScheduleConfig(preempt=True))
+    events = [(e.type, e.hour, e.job_id if e.type == "assigned" else e.job_ids[0]) for e in result.events
+              if e.type in ("assigned", "preempted", "resumed")]
+    assert events == [("assigned", 0, 103), ("assigned", 0, 101), ("preempted", 2, 101),
+                      ("assigned", 2, 102), ("resumed", 3, 101)]
+    jobs = {job["id"]: job for job in result.jobs}
+    assert jobs[102]["sla_met"] and jobs[102]["assigned_to"] == 2
+    # 101 keeps its first start and finishes the 6 hours it had left
+    assert jobs[101]["start_hour"] == 0 and jobs[101]["remaining_hours"] == 6
+    assert result.technicians[1]["free_at_hour"] == 9
+    assert jobs[101]["end_hour"] == 9
+    metrics = aggregate_results(result.technicians, result.jobs)
+    assert metrics["makespan_hours"] == 9
+
+    assert not {j["id"]: j for j in schedule(technicians, preemption_jobs(8)).jobs}[102]["sla_met"]
+
+def test_resumed_job_can_be_cancelled_until_it_really_ends():
+    technicians = [{"id": 1, "skills": ["plumbing"]}]
+    jobs = [
+        {"id": 10, "required_skills": ["plumbing"], "days_waited": 0, "estimated_hours": 4,
+         "priority": "routine", "submitted_hour": 0},
+        {"id": 11, "required_skills": ["plumbing"], "days_waited": 0, "estimated_hours": 3,
+         "priority": "emergency", "submitted_hour": 1}
+    ]
+    tech_records, job_records, skill_bits = to_records(technicians, jobs)
+    scheduler = EventScheduler(tech_records, job_records, skill_bits=skill_bits, preempt=True)
+    scheduler.run_until(5)
+    job = scheduler.job(10)
+    assert (job.start_hour, job.end_hour) == (0, 7)  # preempted at 1, resumed at 4
+    assert [e.type for e in scheduler.cancel_job(10)] == ["cancelled"]
+    assert scheduler.technicians[0].free_at_hour == 5
+
+def test_no_preemption_when_a_tech_frees_up_in_time():
+    technicians = [{"id": 1, "skills": ["plumbing"]}, {"id": 2, "skills": ["plumbing"]}]
+    result = schedule(technicians, preemption_jobs(3), ScheduleConfig(preempt=True))
+    assert not [e for e in result.events if e.type == "preempted"]
+    assert result.jobs == schedule(technicians, preemption_jobs(3)).jobs
+
+def test_deadline_order_serves_the_job_closest_to_breaching_first():
+    technicians = [{"id": 1, "skills": ["plumbing"], "free_at_hour": 20}]
+    jobs = [
+        {"id": 101, "required_skills": ["plumbing"], "days_waited": 0, "estimated_hours": 2,
+         "priority": "routine", "submitted_hour": 0},
+        {"id": 102, "required_skills": ["plumbing"], "days_waited": 0, "estimated_hours": 5,
+         "priority": "urgent", "submitted_hour": 18}
+    ]
+    by_priority = {job["id"]: job for job in schedule(technicians, jobs).jobs}
+    assert by_priority[102]["start_hour"] == 20 and not by_priority[101]["sla_met"]
+
+    by_deadline = {job["id"]: job for job in schedule(technicians, jobs, ScheduleConfig(order="deadline")).jobs}
+    assert by_deadline[101]["start_hour"] == 20 and by_deadline[102]["start_hour"] == 22
+    assert all(job["sla_met"] for job in by_deadline.values())
+
+def test_streaming_refuses_the_deadline_order():
+    with pytest.raises(ValueError, match="deadline"):
+        StreamingSchedule(ScheduleConfig(order="deadline"))
+
+def test_deadline_order_holds_a_tech_for_an_upcoming_critical_job():
+    technicians = [{"id": 1, "skills": ["plumbing"]}, {"id": 2, "skills": ["plumbing"]}]
+    jobs = preemption_jobs(8)
+    jobs[1]["submitted_hour"] = 1
+    jobs[2]["estimated_hours"] = 10
+
+    assert not {job["id"]: job for job in schedule(technicians, jobs).jobs}[102]["sla_met"]
+
+    result = schedule(technicians, jobs, ScheduleConfig(order="deadline"))
+    assigned = [(e.hour, e.tech_id, e.job_id) for e in result.events if e.type == "assigned"]
+    # Tech 2 waits at hour 0 instead of starting the routine job, which still starts in time
+    assert assigned == [(0, 1, 103), (1, 2, 102), (2, 2, 101)]
+    assert all(job["sla_met"] for job in result.jobs)
+
+def test_unknown_dispatch_order_is_rejected():
+    with pytest.raises(ValueError):
+        EventScheduler([], [], order="fifo")
+
+def test_aggregate_results_matches_per_priority_filters():
+    from bench import generate_workload
+    technicians, jobs = generate_workload(300, 8, seed=4, horizon=24)
+    result = schedule(technicians, jobs)
+    metrics = aggregate_results(result.technicians, result.jobs)
+
+    for priority, entry in metrics["by_priority"].items():
+        group = [j for j in result.jobs if j["priority"] == priority]
+        assigned = [j for j in group if j["assigned"]]
+        responses = sorted(j["start_hour"] - j["submitted_hour"] for j in assigned)
+        assert (entry["jobs"], entry["assigned"]) == (len(group), len(assigned))
+        assert entry["sla_violations"] == sum(not j["sla_met"] for j in assigned)
+        assert entry["response_hours"]["max"] == responses[-1]
+        assert responses[0] <= entry["response_hours"]["p50"] <= entry["response_hours"]["p95"] <= responses[-1]
+
+    tech = metrics["technicians"][0]
+    assert tech["jobs"] == [j["id"] for j in result.jobs if j["assigned_to"] == tech["id"]]
+    assert tech["utilization"] == pytest.approx(tech["busy_hours"] / metrics["makespan_hours"])
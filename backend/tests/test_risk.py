@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from pydantic import ValidationError
+from api import RiskRequest
+from matcher import Shift
+from risk import estimate_sla_risk, format_risk, ShiftTable
+
+def make_day():
+    technicians = [{"id": 1, "skills": ["hvac"]}, {"id": 2, "skills": ["plumbing"]}]
+    jobs = [
+        {"id": 101, "required_skills": ["hvac"], "days_waited": 0, "estimated_hours": 2,
+         "priority": "emergency", "submitted_hour": 0},
+        {"id": 102, "required_skills": ["hvac"], "days_waited": 0, "estimated_hours": 3,
+         "priority": "emergency", "submitted_hour": 0},
+        {"id": 103, "required_skills": ["plumbing"], "days_waited": 0, "estimated_hours": 1,
+         "priority": "routine", "submitted_hour": 0},
+        {"id": 104, "required_skills": ["hvac", "plumbing"], "days_waited": 0, "estimated_hours": 1,
+         "priority": "routine", "submitted_hour": 0}
+    ]
+    return technicians, jobs
+
+def test_exact_durations_reproduce_the_plan():
+    technicians, jobs = make_day()
+    estimate = estimate_sla_risk(technicians, jobs, replications=10, duration_sigma={"hvac": 0, "plumbing": 0})
+    # Job 102 starts at hour 2, exactly on its emergency SLA
+    assert estimate.breach_probability == {101: 0.0, 102: 0.0, 103: 0.0, 104: None}
+
+def test_breach_probability_reflects_duration_spread():
+    technicians, jobs = make_day()
+    estimate = estimate_sla_risk(technicians, jobs, replications=4000, seed=7)
+    # Job 102 waits for job 101, which overruns its 2h estimate a bit under half the time
+    assert 0.35 < estimate.breach_probability[102] < 0.55
+    assert estimate.breach_probability[101] == 0.0
+    assert "Job   102" in format_risk(estimate)[1]
+
+def test_batches_do_not_change_the_estimate():
+    technicians, jobs = make_day()
+    small = estimate_sla_risk(technicians, jobs, replications=1000, seed=3, batch_size=64)
+    large = estimate_sla_risk(technicians, jobs, replications=1000, seed=3, batch_size=1000)
+    assert small.breach_probability == large.breach_probability
+
+def test_replications_must_be_positive():
+    technicians, jobs = make_day()
+    with pytest.raises(ValueError, match="replications"):
+        estimate_sla_risk(technicians, jobs, replications=0)
+    with pytest.raises(ValidationError):
+        RiskRequest(technicians=technicians, jobs=jobs, replications=0)
+
+def test_shift_table_matches_shift_next_start():
+    technicians = [{"id": 1, "skills": ["hvac"], "shift": {"start": 22, "end": 30, "days_off": [2]}},
+                   {"id": 2, "skills": ["hvac"], "shift": {"start": 8, "end": 17, "days_off": [5, 6]}},
+                   {"id": 3, "skills": ["hvac"]}]
+    table = ShiftTable(technicians)
+    hours = np.arange(0, 24 * 9, 0.5)
+    grid = np.repeat(hours[:, None], 3, axis=1)
+    starts = table.next_start(grid, np.arange(3))
+    for column, tech in enumerate(technicians[:2]):
+        shift = Shift.from_dict(tech["shift"])
+        assert starts[:, column].tolist() == [shift.next_start(hour) for hour in hours]
+    assert starts[:, 2].tolist() == hours.tolist()
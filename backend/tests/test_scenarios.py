@@ -0,0 +1,47 @@
+from concurrent.futures import ThreadPoolExecutor
+from scenarios import Scenario, run_scenarios, format_comparison
+
+def make_base():
+    technicians = [{"id": 1, "skills": ["hvac"]}, {"id": 2, "skills": ["plumbing"]}]
+    jobs = [{"id": 100 + i, "required_skills": ["hvac"], "days_waited": 0, "estimated_hours": 3,
+             "priority": "emergency", "submitted_hour": 0} for i in range(3)]
+    return technicians, jobs
+
+SCENARIOS = [
+    {"name": "hire HVAC tech", "add_technicians": [{"id": 3, "skills": ["hvac"]}]},
+    Scenario("emergency SLA 6h", sla_windows={"emergency": 6}),
+    {"name": "drop plumber", "remove_technicians": [2], "remove_jobs": [102]},
+]
+
+def test_scenarios_compare_against_baseline():
+    technicians, jobs = make_base()
+    summaries = run_scenarios(technicians, jobs, SCENARIOS, workers=1)
+    assert [s["name"] for s in summaries] == ["baseline", "hire HVAC tech", "emergency SLA 6h", "drop plumber"]
+    # One HVAC tech does the three 3h emergencies at hours 0, 3 and 6
+    assert [s["sla_violations"] for s in summaries] == [2, 1, 0, 1]
+    assert summaries[0]["utilization"] == 9 / (2 * 9)
+    assert summaries[3]["utilization"] == 1.0
+    assert technicians == make_base()[0] and jobs == make_base()[1]
+
+    table = format_comparison(summaries)
+    assert "hire HVAC tech" in table[3] and "-1" in table[3]
+
+def test_process_pool_matches_serial_run():
+    technicians, jobs = make_base()
+    assert run_scenarios(technicians, jobs, SCENARIOS, workers=2) == run_scenarios(technicians, jobs, SCENARIOS, workers=1)
+
+def test_invalid_scenario_is_reported_not_raised():
+    technicians, jobs = make_base()
+    summaries = run_scenarios(technicians, jobs, [{"name": "no techs", "remove_technicians": [1, 2]}], workers=1)
+    assert summaries[1]["success"] is False
+    assert "No technicians" in summaries[1]["errors"][0]
+
+def test_concurrent_runs_keep_their_own_workloads():
+    def base(n_jobs):
+        technicians, jobs = make_base()
+        return technicians, [dict(jobs[0], id=100 + i) for i in range(n_jobs)]
+
+    inputs = [base(n) for n in (3, 8, 3, 8)]
+    with ThreadPoolExecutor(4) as threads:
+        results = list(threads.map(lambda b: run_scenarios(*b, SCENARIOS[:1], workers=1), inputs))
+    assert [[s["jobs"] for s in summaries] for summaries in results] == [[3, 3], [8, 8], [3, 3], [8, 8]]
@@ -0,0 +1,77 @@
+from concurrent.futures import ThreadPoolExecutor
+from bench import SKILLS, generate_workload
+from matcher import schedule
+from shards import partition, schedule_sharded
+
+def job(job_id, skills, priority="emergency", region=None, hours=3):
+    job = {"id": job_id, "required_skills": skills, "days_waited": 0, "estimated_hours": hours,
+           "priority": priority, "submitted_hour": 0}
+    if region:
+        job["region"] = region
+    return job
+
+def test_skill_clusters_match_unsharded_schedule():
+    technicians, jobs = generate_workload(300, 20, seed=4)
+    for i, tech in enumerate(technicians):
+        tech["skills"] = [SKILLS[i % len(SKILLS)]]
+    for j in jobs:
+        j["required_skills"] = j["required_skills"][:1]
+    assert len(partition(technicians, jobs)[0]) == len(SKILLS)
+
+    expected = schedule(technicians, jobs)
+    assert expected.success
+    for workers in (1, 2):
+        result = schedule_sharded(technicians, jobs, workers=workers)
+        assert result.technicians == expected.technicians
+        assert result.jobs == expected.jobs
+        assert len(result.events.assignments()) == len(expected.events.assignments())
+        assert result.events.events[-1] == expected.events.events[-1]
+
+def test_floating_tech_takes_unregioned_and_late_jobs():
+    technicians = [
+        {"id": 1, "skills": ["hvac"], "region": "north"},
+        {"id": 2, "skills": ["hvac"], "region": "south"},
+        {"id": 3, "skills": ["hvac"]}
+    ]
+    jobs = [job(101, ["hvac"], region="north"), job(102, ["hvac"], region="north"),
+            job(103, ["hvac"], priority="routine")]
+    for workers in (1, 2):
+        result = schedule_sharded(technicians, jobs, workers=workers)
+        assert result.success
+        # Tech 1 would start 102 at hour 3, past its SLA; the floating tech can start it at once
+        assert [(j["assigned_to"], j["start_hour"]) for j in result.jobs] == [(1, 0), (3, 0), (3, 3)]
+        assert result.technicians[1]["free_at_hour"] == 0
+        assert [t.get("region") for t in result.technicians] == ["north", "south", None]
+        assert [j.get("region") for j in result.jobs] == ["north", "north", None]
+        assert result.events.events[-1].type == "all_assigned"
+
+def test_concurrent_sharded_schedules_keep_their_own_inputs():
+    def workload(k):
+        technicians = [{"id": 1, "skills": ["hvac"], "region": "north"}, {"id": 2, "skills": ["hvac"]}]
+        return technicians, [job(100 * k + n, ["hvac"], region="north" if n % 2 else None) for n in range(k)]
+
+    inputs = [workload(k) for k in (2, 5, 2, 5)]
+    with ThreadPoolExecutor(4) as threads:
+        results = list(threads.map(lambda base: schedule_sharded(*base, workers=1), inputs))
+    for (technicians, jobs), result in zip(inputs, results):
+        assert [j["id"] for j in result.jobs] == [j["id"] for j in jobs]
+        assert result.jobs == schedule_sharded(technicians, jobs, workers=1).jobs
+
+def test_jobs_no_region_can_serve_are_unassignable():
+    technicians = [{"id": 1, "skills": ["hvac"], "region": "north"},
+                   {"id": 2, "skills": ["plumbing"], "region": "south"}]
+    jobs = [job(101, ["hvac"], region="north"), job(102, ["hvac"], region="south")]
+    result = schedule_sharded(technicians, jobs, workers=1)
+    assert [j["assigned"] for j in result.jobs] == [True, False]
+    assert result.events.events[-1].job_ids == (102,)
+
+def test_worker_counts_below_one_run_in_process():
+    technicians, jobs = generate_workload(40, 5, seed=1)
+    expected = schedule_sharded(technicians, jobs, workers=1).jobs
+    for workers in (0, -2):
+        assert schedule_sharded(technicians, jobs, workers=workers).jobs == expected
+
+def test_sharded_schedule_reports_validation_errors():
+    result = schedule_sharded([], [job(101, ["hvac"])], workers=1)
+    assert not result.success
+    assert [issue.code for issue in result.errors] == ["no_technicians"]
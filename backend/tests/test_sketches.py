@@ -0,0 +1,38 @@
+import numpy as np
+
+import matcher
+from bench import generate_workload
+from sketches import LogHistogram, ResponseSketches
+
+def test_quantiles_are_within_relative_accuracy():
+    values = np.random.default_rng(1).lognormal(1.0, 1.5, 50000)
+    histogram = LogHistogram(relative_accuracy=0.01)
+    for value in values:
+        histogram.add(float(value))
+    ordered = np.sort(values)
+    for q in (0.5, 0.95, 0.99):
+        exact = ordered[int(q * (len(values) - 1))]
+        assert abs(histogram.quantile(q) - exact) <= 0.01 * exact
+    assert histogram.count == len(values) and histogram.max == values.max()
+
+def test_bucket_count_stays_bounded():
+    histogram = LogHistogram(max_buckets=64)
+    for k in range(10000):
+        histogram.add(1.001 ** k)
+    assert len(histogram.buckets) == 64
+    assert histogram.quantile(0.99) > 1.001 ** 9800
+
+def test_scheduler_feeds_sketches_on_every_assignment():
+    technicians, jobs = generate_workload(400, 10, seed=3, horizon=24)
+    tech_records, job_records, skill_bits = matcher.to_records(technicians, jobs)
+    stats = ResponseSketches()
+    matcher.EventScheduler(tech_records, job_records, skill_bits=skill_bits, sketches=stats).run()
+
+    metrics = matcher.aggregate_results([t.to_dict() for t in tech_records], [j.to_dict() for j in job_records])
+    for priority, sketch in stats.by_priority.items():
+        entry = metrics["by_priority"][priority]
+        assert sketch.hours.count == entry["assigned"]
+        assert sketch.breaches == entry["sla_violations"]
+        assert sketch.hours.max == entry["response_hours"]["max"]
+    plumbing = sum(j.assigned and "plumbing" in j.required_skills for j in job_records)
+    assert stats.by_skill["plumbing"].hours.count == plumbing
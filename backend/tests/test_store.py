@@ -0,0 +1,104 @@
+import os
+import random
+
+import api
+import matcher
+from bench import generate_workload
+from store import LOG_FILE, ScheduleStore, apply
+
+EDITS = [
+    {"op": "advance", "hour": 5},
+    {"op": "add_job", "job": {"id": 9001, "required_skills": ["hvac"], "days_waited": 0, "estimated_hours": 2,
+                              "priority": "emergency", "submitted_hour": 5}},
+    {"op": "cancel_job", "job_id": 150},
+    {"op": "complete_job", "job_id": 100},
+    {"op": "set_availability", "tech_id": 2, "available": False},
+    {"op": "advance", "hour": 12},
+]
+
+def make_scheduler(busy_until=0):
+    technicians, jobs = generate_workload(200, 10, seed=2, horizon=20)
+    for tech in technicians[::2]:
+        tech["free_at_hour"] = busy_until  # still on an earlier job when the session starts
+    tech_records, job_records, skill_bits = matcher.to_records(technicians, jobs)
+    scheduler = matcher.EventScheduler(tech_records, job_records, skill_bits=skill_bits)
+    scheduler.run_until(0)
+    return scheduler
+
+def run_edits(store, scheduler, edits):
+    for edit in edits:
+        try:
+            apply(scheduler, edit)
+        except (KeyError, ValueError):
+            continue
+        store.append("s1", scheduler, edit)
+
+def test_restart_rebuilds_scheduler_from_snapshot_and_log(tmp_path):
+    live = make_scheduler()
+    store = ScheduleStore(str(tmp_path), snapshot_every=4, sync=False)
+    store.create("s1", live)
+    run_edits(store, live, EDITS)
+    store.close()
+
+    [(session_id, restored)] = ScheduleStore(str(tmp_path)).load()
+    assert session_id == "s1"
+    assert restored.clock == live.clock
+    assert restored.snapshot() == live.snapshot()
+    assert restored.run_until(40) == live.run_until(40)
+
+def test_random_edits_replay_to_the_live_state(tmp_path):
+    rng = random.Random(7)
+    live = make_scheduler(busy_until=4)
+    edits, hour = [], 0
+    for _ in range(40):
+        hour += rng.choice((0, 1))
+        edits.append(rng.choice([
+            {"op": "advance", "hour": hour},
+            {"op": "cancel_job", "job_id": rng.choice(live.jobs).id},
+            {"op": "complete_job", "job_id": rng.choice(live.jobs).id},
+            {"op": "set_availability", "tech_id": rng.choice(live.technicians).id,
+             "available": rng.random() < 0.5},
+        ]))
+    store = ScheduleStore(str(tmp_path), sync=False)
+    store.create("s1", live)
+    run_edits(store, live, edits)
+    store.close()
+
+    [(_, restored)] = ScheduleStore(str(tmp_path)).load()
+    assert restored.snapshot() == live.snapshot()
+    assert restored.run_until(40) == live.run_until(40)
+
+def test_torn_log_record_is_dropped(tmp_path):
+    live = make_scheduler()
+    store = ScheduleStore(str(tmp_path), sync=False)
+    store.create("s1", live)
+    run_edits(store, live, EDITS[:1])
+    store.close()
+    with open(os.path.join(str(tmp_path), "s1", LOG_FILE), "a") as f:
+        f.write('{"seq": 2, "op": "adv')
+
+    store = ScheduleStore(str(tmp_path), sync=False)
+    [(_, restored)] = store.load()
+    assert restored.clock == 5
+    run_edits(store, restored, EDITS[5:])
+    store.close()
+    [(_, again)] = ScheduleStore(str(tmp_path)).load()
+    assert again.clock == 12
+
+def test_api_sessions_survive_restart(tmp_path, monkeypatch):
+    monkeypatch.setattr(api, "sessions", {})
+    monkeypatch.setattr(api, "session_store", None)
+    api.open_store(str(tmp_path))
+    technicians, jobs = generate_workload(50, 5, seed=3, horizon=10)
+    created = api.create_session(api.ScheduleRequest(technicians=technicians, jobs=jobs))
+    session_id = created["session_id"]
+    api.advance_session(session_id, api.AdvanceRequest(hour=8))
+    before = api.get_session_state(session_id)
+
+    api.session_store.close()
+    monkeypatch.setattr(api, "sessions", {})
+    api.open_store(str(tmp_path))
+    assert api.get_session_state(session_id) == before
+    api.delete_session(session_id)
+    api.session_store.close()
+    assert not os.path.exists(os.path.join(str(tmp_path), session_id))
@@ -0,0 +1,62 @@
+import asyncio
+import threading
+from telemetry import Counter, Gauge, Histogram, Registry, RequestMetrics, request_seconds, requests_total
+
+def test_counts_from_many_threads_are_summed_at_scrape_time():
+    counter = Counter("test_total", "Things", ("kind",))
+    histogram = Histogram("test_seconds", "Durations", (0.1, 1))
+
+    def work():
+        for k in range(1000):
+            counter.inc(1, "a" if k % 2 else "b")
+            histogram.observe(0.5)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert counter.values() == {("a",): 4000, ("b",): 4000}
+    assert len(counter._shards) == 8
+    counts, total = histogram.values()[()]
+    assert counts == [0, 8000, 0] and total == 4000
+
+def test_render_uses_the_prometheus_text_format():
+    registry = Registry()
+    counter = registry.register(Counter("test_total", "Things", ("kind",)))
+    histogram = registry.register(Histogram("test_seconds", "Durations", (0.1, 1)))
+    registry.register(Gauge("test_depth", "Depth", lambda: 3))
+    counter.inc(2, "a")
+    histogram.observe(0.05)
+    histogram.observe(5)
+    assert registry.render().splitlines() == [
+        "# HELP test_total Things",
+        "# TYPE test_total counter",
+        'test_total{kind="a"} 2',
+        "# HELP test_seconds Durations",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{le="0.1"} 1',
+        'test_seconds_bucket{le="1.0"} 1',
+        'test_seconds_bucket{le="+Inf"} 2',
+        "test_seconds_sum 5.05",
+        "test_seconds_count 2",
+        "# HELP test_depth Depth",
+        "# TYPE test_depth gauge",
+        "test_depth 3",
+    ]
+
+def test_middleware_times_requests_by_route_template():
+    class Route:
+        path = "/api/items/{item_id}"
+
+    async def app(scope, receive, send):
+        scope["route"] = Route()
+        await send({"type": "http.response.start", "status": 204})
+
+    async def send(message):
+        pass
+
+    before = requests_total.values().get((Route.path, "GET", "204"), 0)
+    asyncio.run(RequestMetrics(app)({"type": "http", "method": "GET"}, None, send))
+    assert requests_total.values()[(Route.path, "GET", "204")] == before + 1
+    assert (Route.path, "GET") in request_seconds.values()